@@ -0,0 +1,137 @@
+"""
+This module provides the class AssetBundle.
+
+The bundle holds the sprite atlas as raw pixels and the sound effects as
+decoded PCM, so startup does not have to decode the PNG and OGG files. Build
+it after changing the assets, for the audio mode the game is run with:
+
+    python asset_bundle.py [--audio-mode low-latency]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import pygame
+
+from audio import AUDIO_MODES, SOUND_FILES
+from sprite import ATLAS_FILE
+
+BUNDLE_FILE = "assets/bundle.bin"
+MAGIC = b"TRXB"
+VERSION = 1
+ATLAS_FORMAT = "RGBX"
+ALIGNMENT = 16
+
+class AssetBundle(object):
+    """
+    Memory-mapped asset bundle.
+    """
+    def __init__(self, path):
+        """
+        Map the bundle file and read its header.
+        """
+        with open(path, "rb") as bundle_file:
+            self.data = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = struct.unpack("<4sI", self.data[:8])
+        if magic != MAGIC:
+            raise ValueError("not an asset bundle: %s" % path)
+        self.header = json.loads(self.data[8:8 + header_size].decode("utf-8"))
+        if self.header["version"] != VERSION:
+            raise ValueError("unsupported asset bundle version: %s" % self.header["version"])
+        self.data_offset = 8 + header_size
+
+    @classmethod
+    def open(cls, path=BUNDLE_FILE):
+        """
+        Return the bundle at path, or None if there is no usable bundle.
+        """
+        try:
+            return cls(path)
+        except (IOError, OSError, ValueError, struct.error):
+            return None
+
+    def get_blob(self, entry):
+        """
+        Return a view of the bytes of a header entry in the map, without
+        copying them.
+        """
+        start = self.data_offset + entry["offset"]
+        try:
+            view = memoryview(self.data)
+        except TypeError:
+            # Maps only have the old buffer interface on Python 2.
+            return buffer(self.data, start, entry["length"])
+        return view[start:start + entry["length"]]
+
+    def load_atlas(self):
+        """
+        Return the atlas as a surface wrapping the raw pixels.
+        """
+        atlas = self.header["atlas"]
+        return pygame.image.frombuffer(
+            self.get_blob(atlas),
+            tuple(atlas["size"]),
+            atlas["format"]
+        )
+
+    def load_sound(self, name):
+        """
+        Return a sound built from the decoded PCM, or None if the sound is
+        missing or was decoded for other mixer settings than the current ones.
+        """
+        sounds = self.header["sounds"]
+        if name not in sounds or tuple(self.header["mixer"]) != pygame.mixer.get_init():
+            return None
+        return pygame.mixer.Sound(buffer=self.get_blob(sounds[name]))
+
+def write_bundle(path, atlas_file, sound_files):
+    """
+    Decode the atlas and the sounds and write them to a bundle. The mixer must
+    be initialized with the settings the game uses.
+    """
+    blobs = []
+    header = {"version": VERSION, "mixer": list(pygame.mixer.get_init()), "sounds": {}}
+    offset = 0
+
+    def add_blob(data):
+        """
+        Queue a blob and return its header entry.
+        """
+        padding = -offset % ALIGNMENT
+        blobs.append(b"\0" * padding + data)
+        return {"offset": offset + padding, "length": len(data)}
+
+    atlas = pygame.image.load(atlas_file)
+    header["atlas"] = add_blob(pygame.image.tostring(atlas, ATLAS_FORMAT))
+    header["atlas"]["size"] = list(atlas.get_size())
+    header["atlas"]["format"] = ATLAS_FORMAT
+    offset += len(blobs[-1])
+    for name in sorted(sound_files):
+        header["sounds"][name] = add_blob(pygame.mixer.Sound(sound_files[name]).get_raw())
+        offset += len(blobs[-1])
+    header_data = json.dumps(header, sort_keys=True).encode("utf-8")
+    header_data += b" " * (-(8 + len(header_data)) % ALIGNMENT)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as bundle_file:
+        bundle_file.write(struct.pack("<4sI", MAGIC, len(header_data)))
+        bundle_file.write(header_data)
+        for blob in blobs:
+            bundle_file.write(blob)
+    os.rename(temp_path, path)
+
+def main():
+    """
+    Build the asset bundle with the mixer settings of an audio mode.
+    """
+    parser = argparse.ArgumentParser(description="Build the asset bundle.")
+    parser.add_argument("--audio-mode", choices=sorted(AUDIO_MODES), default="default")
+    args = parser.parse_args()
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init(*AUDIO_MODES[args.audio_mode])
+    write_bundle(BUNDLE_FILE, ATLAS_FILE, SOUND_FILES)
+    print("wrote %s (%d bytes)" % (BUNDLE_FILE, os.path.getsize(BUNDLE_FILE)))
+
+if __name__ == "__main__":
+    main()
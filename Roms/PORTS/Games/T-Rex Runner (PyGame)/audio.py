@@ -0,0 +1,91 @@
+"""
+This module provides the class Audio.
+"""
+
+import sys
+import pygame
+
+AUDIO_MODES = {
+    "default": (44100, -16, 2, 8192),
+    "low-latency": (22050, -16, 1, 512)
+}
+SOUND_FILES = {
+    "BUTTON_PRESS": "assets/button-press.ogg",
+    "HIT": "assets/hit.ogg",
+    "SCORE_REACHED": "assets/score-reached.ogg"
+}
+
+class Audio(object):
+    """
+    Sound effects. The mixer is started lazily, so the first frame can be shown
+    before the sounds are decoded; until then playing a sound does nothing.
+    Every sound plays on its own reserved channel, so effects never wait for
+    a free channel or cut each other off.
+    """
+    def __init__(self, sound_files, bundle=None, mode="default"):
+        """
+        Initialize the audio with a mapping of sound names to files, an
+        optional asset bundle holding the decoded sounds and an audio mode.
+        """
+        self.sound_files = sound_files
+        self.bundle = bundle
+        self.mode = mode
+        self.settings = AUDIO_MODES[mode]
+        self.sounds = {}
+        self.channels = {}
+        self.started = False
+        self.ready = False
+        self.buffer_latency = 0
+        self.latencies = []
+
+    def init(self):
+        """
+        Start the mixer and load the sounds. Audio stays silent if the mixer
+        cannot be opened.
+        """
+        self.started = True
+        try:
+            pygame.mixer.init(*self.settings)
+        except pygame.error:
+            return
+        frequency = pygame.mixer.get_init()[0]
+        self.buffer_latency = self.settings[3] * 1000.0 / frequency
+        pygame.mixer.set_reserved(len(self.sound_files))
+        for index, name in enumerate(sorted(self.sound_files)):
+            sound = self.bundle.load_sound(name) if self.bundle else None
+            if sound is None:
+                sound = pygame.mixer.Sound(self.sound_files[name])
+            if not sound.get_length():
+                # Some mixer builds fail to resample a file and return an
+                # empty sound, which crashes when played on a fixed channel.
+                continue
+            self.sounds[name] = sound
+            self.channels[name] = pygame.mixer.Channel(index)
+        self.ready = True
+
+    def play(self, name, input_time=None):
+        """
+        Play a sound if the audio is ready. When the sound answers an input,
+        the time the input was read is used to measure the latency from the
+        input to the sound leaving the mixer buffer.
+        """
+        if self.ready and name in self.sounds:
+            self.channels[name].play(self.sounds[name])
+            if input_time is not None:
+                self.latencies.append(
+                    pygame.time.get_ticks() - input_time + self.buffer_latency
+                )
+
+    def report(self, stream=sys.stdout):
+        """
+        Write the measured input to sound latency in milliseconds.
+        """
+        if not self.latencies:
+            return
+        stream.write("audio: %s mode, buffer %d ms, input to sound %d ms average, %d ms max\n" % (
+            self.mode,
+            self.buffer_latency,
+            sum(self.latencies) / len(self.latencies),
+            max(self.latencies)
+        ))
+        stream.flush()
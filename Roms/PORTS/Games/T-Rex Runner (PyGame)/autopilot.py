@@ -0,0 +1,308 @@
+"""
+This module provides the class Autopilot.
+"""
+
+import sys
+import time
+import pygame
+
+from controls import InputEvent
+from policy import get_features, get_key_changes
+
+from constants import FPS
+
+LOOKAHEAD_FRAMES = 50
+SLACK_FRAMES = 2
+FOLLOW_UP_STEP = 3
+FRAME_BUDGET_MS = 4
+RESTART_DELAY = 1000
+
+def apply_key(t_rex, action, pressed, speed):
+    """
+    Apply a JUMP or DUCK key event to a t-rex that is playing, as
+    Game.on_action_down and Game.on_action_up do.
+    """
+    if action == "JUMP":
+        if not pressed:
+            t_rex.end_jump()
+        elif not t_rex.jumping and not t_rex.ducking:
+            t_rex.start_jump(speed)
+    elif pressed:
+        if t_rex.jumping:
+            t_rex.set_speed_drop()
+        elif not t_rex.ducking:
+            t_rex.set_duck(True)
+    else:
+        t_rex.speed_drop = False
+        t_rex.set_duck(False)
+
+class Autopilot(object):
+    """
+    Plays the game by simulating candidate plans over the obstacles on the
+    screen. A plan is a list of (frame, action, pressed) key events in frame
+    order; it is played on a clone of the t-rex with the game's own jump
+    physics and collision check, against the obstacles moved ahead once per
+    frame, as they move the same whatever the t-rex does. Frames are
+    stepped by whole milliseconds like the game clock, as obstacle steps
+    are rounded to pixels.
+
+    Every frame the current keys are kept if that survives the lookahead.
+    Otherwise, if a plan still survives when started SLACK_FRAMES later, the
+    autopilot waits; else it starts the first plan that survives from now.
+    Single actions (jump, short jump, duck, release, speed drop) are tried
+    before the same actions followed by a second one later on. If no plan
+    survives, the one that lives longest is followed, waiting if that is a
+    delayed one. Plans are tried until the frame budget is spent.
+
+    Given a trained policy, the autopilot holds the keys the policy picks
+    each frame instead of planning.
+    """
+    def __init__(self, game, budget_ms=FRAME_BUDGET_MS, policy=None):
+        """
+        Initialize the autopilot for a game.
+        """
+        self.game = game
+        self.policy = policy
+        self.budget_ms = budget_ms
+        self.frame_times = [
+            (frame + 1) * 1000 // FPS - frame * 1000 // FPS
+            for frame in range(LOOKAHEAD_FRAMES)
+        ]
+        self.jump_held = False
+        self.duck_held = False
+        self.crash_time = None
+        self.track = []
+        self.speeds = []
+        self.ground_hits = {}
+        self.outcomes = {}
+        self.planned = 0
+        self.over_budget = 0
+
+    def get_inputs(self):
+        """
+        Return the key events for the coming frame.
+        """
+        game = self.game
+        now = pygame.time.get_ticks()
+        if not game.playing:
+            if game.crashed:
+                if self.crash_time is None:
+                    self.crash_time = now
+                if now - self.crash_time < RESTART_DELAY:
+                    return []
+            self.crash_time = None
+            self.jump_held = False
+            self.duck_held = False
+            return [InputEvent("START", True, now)]
+        if self.policy:
+            action = self.policy.act(get_features(game.t_rex, game.horizon.obstacles, game.current_speed))
+            plan = [
+                (0, key, pressed)
+                for key, pressed in get_key_changes(action, self.jump_held, self.duck_held)
+            ]
+        else:
+            plan = self.choose_plan(time.time() + self.budget_ms / 1000.0)
+        inputs = []
+        for frame, action, pressed in plan:
+            if frame == 0:
+                inputs.append(InputEvent(action, pressed, now))
+                if action == "JUMP":
+                    self.jump_held = pressed
+                else:
+                    self.duck_held = pressed
+        return inputs
+
+    def get_plans(self, start):
+        """
+        Return the plans of a single action at a frame from now.
+        """
+        t_rex = self.game.t_rex
+        plans = []
+        if t_rex.jumping:
+            if self.jump_held:
+                plans.append([(start, "JUMP", False)])
+            if not t_rex.speed_drop:
+                plans.append([(start, "DUCK", True)])
+        else:
+            jump = [(start, "DUCK", False)] if t_rex.ducking else []
+            if self.jump_held:
+                jump.append((start, "JUMP", False))
+            jump.append((start, "JUMP", True))
+            plans.append(jump)
+            plans.append(jump + [(start + 1, "JUMP", False)])
+            if not t_rex.ducking:
+                plans.append([(start, "DUCK", True)])
+        return plans
+
+    def get_follow_ups(self, plan):
+        """
+        Return the plan followed by a second action before the frame it is
+        hit: releasing the jump or speed dropping while it is in the air,
+        ducking or jumping again on the ground.
+        """
+        frames, takeoff, landing = self.outcomes[tuple(plan)]
+        jump_held = self.jump_held
+        speed_drop = self.game.t_rex.speed_drop
+        for _, action, pressed in plan:
+            if action == "JUMP":
+                jump_held = pressed
+            elif pressed:
+                speed_drop = True
+        follow_ups = []
+        for frame in range(plan[-1][0] + FOLLOW_UP_STEP, frames, FOLLOW_UP_STEP):
+            if takeoff is not None and takeoff <= frame <= landing:
+                if jump_held:
+                    follow_ups.append(plan + [(frame, "JUMP", False)])
+                if not speed_drop:
+                    follow_ups.append(plan + [(frame, "DUCK", True)])
+            else:
+                follow_ups.append(plan + [(frame, "DUCK", True)])
+                follow_ups.append(plan + [
+                    (frame, "DUCK", False),
+                    (frame, "JUMP", False),
+                    (frame, "JUMP", True)
+                ])
+        return follow_ups
+
+    def get_candidates(self):
+        """
+        Yield the plans to try, in order of preference, each with the plan
+        to follow if it survives: nothing for a delayed plan. Follow-ups are
+        made from the outcomes of the plans they extend.
+        """
+        t_rex = self.game.t_rex
+        if t_rex.ducking and not t_rex.jumping:
+            yield [(0, "DUCK", False)], [(0, "DUCK", False)]
+        yield [], []
+        delayed = self.get_plans(SLACK_FRAMES)
+        plans = self.get_plans(0)
+        for plan in delayed:
+            yield plan, []
+        for plan in plans:
+            yield plan, plan
+        for plan in delayed:
+            for follow_up in self.get_follow_ups(plan):
+                yield follow_up, []
+        for plan in plans:
+            for follow_up in self.get_follow_ups(plan):
+                yield follow_up, follow_up
+
+    def choose_plan(self, deadline):
+        """
+        Return the plan to follow from this frame.
+        """
+        self.planned += 1
+        self.move_obstacles()
+        self.outcomes = {}
+        best_plan = []
+        best_frames = -1
+        for plan, chosen in self.get_candidates():
+            if time.time() > deadline:
+                self.over_budget += 1
+                break
+            outcome = self.simulate(plan)
+            self.outcomes[tuple(plan)] = outcome
+            frames = outcome[0]
+            if frames == LOOKAHEAD_FRAMES:
+                return chosen
+            if frames > best_frames:
+                best_plan = chosen
+                best_frames = frames
+        return best_plan
+
+    def move_obstacles(self):
+        """
+        Move clones of the obstacles through the lookahead. For each frame
+        keep the speed, and the obstacle a collision is checked with if it
+        overlaps the t-rex horizontally, which is the first test of
+        Game.check_for_collision; for a t-rex running or ducking on the
+        ground, keep the first frame from then on that it is hit.
+        """
+        game = self.game
+        t_rex = game.t_rex
+        left = t_rex.x_pos + 1
+        right = left + t_rex.config.WIDTH - 2
+        obstacles = [obstacle.clone() for obstacle in game.horizon.obstacles]
+        speed = game.current_speed
+        self.track = []
+        self.speeds = []
+        for frame_time in self.frame_times:
+            self.speeds.append(speed)
+            for obstacle in obstacles:
+                obstacle.update(frame_time, speed)
+            while obstacles and obstacles[0].remove:
+                obstacles.pop(0)
+            obstacle = obstacles[0] if obstacles else None
+            if (
+                    obstacle and obstacle.x_pos + 1 < right and
+                    obstacle.x_pos + obstacle.type_config.width * obstacle.size - 1 > left
+            ):
+                self.track.append(obstacle.clone())
+            else:
+                self.track.append(None)
+            if speed < game.config.MAX_SPEED:
+                speed += game.config.ACCELERATION
+        self.ground_hits = {}
+        for ducking in [False, True]:
+            grounded = t_rex.clone()
+            grounded.y_pos = grounded.ground_y_pos
+            grounded.ducking = ducking
+            hits = [LOOKAHEAD_FRAMES] * (LOOKAHEAD_FRAMES + 1)
+            for frame in range(LOOKAHEAD_FRAMES - 1, -1, -1):
+                obstacle = self.track[frame]
+                if obstacle and game.check_for_collision(obstacle, grounded):
+                    hits[frame] = frame
+                else:
+                    hits[frame] = hits[frame + 1]
+            self.ground_hits[ducking] = hits
+
+    def simulate(self, plan):
+        """
+        Play a plan forward from the current state. Returns the number of
+        frames survived, up to LOOKAHEAD_FRAMES, the first frame the t-rex
+        is in the air, or None, and the frame it lands, or LOOKAHEAD_FRAMES.
+        On the ground the t-rex is moved straight to the next key event,
+        unless it is hit before.
+        """
+        check_for_collision = self.game.check_for_collision
+        t_rex = self.game.t_rex.clone()
+        frame_times = self.frame_times
+        takeoff = None
+        landing = LOOKAHEAD_FRAMES
+        event_index = 0
+        frame = 0
+        while frame < LOOKAHEAD_FRAMES:
+            while event_index < len(plan) and plan[event_index][0] == frame:
+                _, action, pressed = plan[event_index]
+                apply_key(t_rex, action, pressed, self.speeds[frame])
+                event_index += 1
+            if not t_rex.jumping:
+                next_frame = plan[event_index][0] if event_index < len(plan) else LOOKAHEAD_FRAMES
+                hit = self.ground_hits[t_rex.ducking][frame]
+                if hit < next_frame:
+                    return hit, takeoff, landing
+                frame = next_frame
+                continue
+            if takeoff is None:
+                takeoff = frame
+            t_rex.update_jump(frame_times[frame])
+            if not t_rex.jumping:
+                landing = min(landing, frame)
+            obstacle = self.track[frame]
+            if obstacle and check_for_collision(obstacle, t_rex):
+                return frame, takeoff, landing
+            frame += 1
+        return LOOKAHEAD_FRAMES, takeoff, landing
+
+    def report(self, stream=sys.stdout):
+        """
+        Write how often planning ran out of its frame budget.
+        """
+        if not self.planned:
+            return
+        stream.write("autopilot: %d frames planned, %d over the %d ms budget\n" % (
+            self.planned,
+            self.over_budget,
+            self.budget_ms
+        ))
+        stream.flush()
@@ -0,0 +1,126 @@
+"""
+This module provides the class FrameCapture.
+"""
+
+import os
+import threading
+import pygame
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from constants import FPS
+
+CAPTURE_DIRECTORY = "captures"
+CAPTURE_FORMATS = ["png", "gif"]
+
+class FrameCapture(object):
+    """
+    Keeps the last seconds of play in a ring of surfaces allocated up front.
+    Every Nth presented frame is copied into the ring, reduced by an integer
+    factor; when a save is triggered the ring is handed to a background
+    thread that writes a PNG sequence or an animated GIF. Frames are not
+    captured while a save is being written, so the thread owns the ring.
+    GIF export needs Pillow and falls back to PNG without it.
+    """
+    def __init__(self, surface, seconds=4, every=3, reduction=2, capture_format="png",
+                 directory=CAPTURE_DIRECTORY):
+        """
+        Allocate the ring for frames of the surface that is presented.
+        """
+        width, height = surface.get_size()
+        self.size = (max(width // reduction, 1), max(height // reduction, 1))
+        self.every = every
+        self.frame_duration = 1000 * every // FPS
+        self.capture_format = capture_format if Image or capture_format == "png" else "png"
+        self.directory = directory
+        self.frames = [
+            pygame.Surface(self.size, 0, surface)
+            for _ in range(max(seconds * FPS // every, 1))
+        ]
+        self.index = 0
+        self.count = 0
+        self.frame_counter = 0
+        self.pending_name = None
+        self.writer = None
+
+    def add_frame(self, surface):
+        """
+        Copy a presented frame into the ring if it is due, then start a
+        triggered save.
+        """
+        if self.is_saving():
+            return
+        self.frame_counter += 1
+        if self.frame_counter >= self.every or self.pending_name:
+            self.frame_counter = 0
+            frame = self.frames[self.index]
+            if surface.get_size() == self.size:
+                frame.blit(surface, (0, 0))
+            else:
+                pygame.transform.scale(surface, self.size, frame)
+            self.index = (self.index + 1) % len(self.frames)
+            self.count = min(self.count + 1, len(self.frames))
+        if self.pending_name:
+            if self.count:
+                self.start_save(self.pending_name)
+            self.pending_name = None
+
+    def trigger(self, name):
+        """
+        Save the frames in the ring once the next frame is captured, under
+        name in the capture directory.
+        """
+        if not self.is_saving():
+            self.pending_name = name
+
+    def is_saving(self):
+        """
+        Return whether a save is being written.
+        """
+        return self.writer is not None and self.writer.is_alive()
+
+    def start_save(self, name):
+        """
+        Hand the captured frames, oldest first, to a writer thread.
+        """
+        start = (self.index - self.count) % len(self.frames)
+        frames = [self.frames[(start + i) % len(self.frames)] for i in range(self.count)]
+        self.count = 0
+        self.writer = threading.Thread(target=self.write, args=(name, frames))
+        self.writer.daemon = True
+        self.writer.start()
+
+    def write(self, name, frames):
+        """
+        Write frames as a PNG sequence in a directory, or as a GIF.
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        path = os.path.join(self.directory, name)
+        if self.capture_format == "gif":
+            images = [
+                Image.frombytes("RGB", self.size, pygame.image.tostring(frame, "RGB"))
+                for frame in frames
+            ]
+            images[0].save(
+                path + ".gif",
+                save_all=True,
+                append_images=images[1:],
+                duration=self.frame_duration,
+                loop=0
+            )
+        else:
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            for i, frame in enumerate(frames):
+                pygame.image.save(frame, os.path.join(path, "%04d.png" % i))
+
+    def close(self, timeout=5.0):
+        """
+        Wait at most timeout seconds for a save being written.
+        """
+        if self.writer is not None:
+            self.writer.join(timeout)
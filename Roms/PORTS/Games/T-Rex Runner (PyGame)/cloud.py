@@ -6,50 +6,55 @@ import math
 import random
 import pygame
 
+from game_config import get_config
 from sprite import Sprite
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from constants import get_sky_y_pos
 
 class Cloud(object):
     """
     Cloud background item.
     """
-    def __init__(self, screen, sprite_pos, container_width):
+    __slots__ = (
+        "screen", "sprite_pos", "container_width", "x_pos", "y_pos",
+        "remove", "config", "max_sky_level", "min_sky_level", "cloud_gap", "image_sprite"
+    )
+
+    def __init__(self, screen, sprite_pos, dimensions):
+        """
+        Creates the cloud.
         """
-        Initializes the cloud. Sets the cloud height.
+        sky_y_pos = get_sky_y_pos(dimensions["HEIGHT"])
+        self.config = get_config().cloud
+        self.max_sky_level = sky_y_pos + self.config.MAX_SKY_OFFSET
+        self.min_sky_level = sky_y_pos + self.config.MIN_SKY_OFFSET
+        self.init(screen, sprite_pos, dimensions)
+
+    def init(self, screen, sprite_pos, dimensions):
+        """
+        Initializes the cloud. Sets the cloud height. Called again when the
+        cloud is recycled from the pool.
         """
         self.screen = screen
         self.sprite_pos = sprite_pos
-        self.container_width = container_width
-        self.x_pos = container_width
+        self.container_width = dimensions["WIDTH"]
+        self.x_pos = self.container_width
         self.y_pos = 0
         self.remove = False
-        self.config = {
-            "HEIGHT": 14,
-            "MAX_CLOUD_GAP": 400,
-            "MAX_SKY_LEVEL": (SCREEN_HEIGHT / 3) + 30,
-            "MIN_CLOUD_GAP": 100,
-            "MIN_SKY_LEVEL": (SCREEN_HEIGHT / 3) + 71,
-            "WIDTH": 46
-        }
-        self.cloud_gap = random.randint(self.config["MIN_CLOUD_GAP"], self.config["MAX_CLOUD_GAP"])
+        self.cloud_gap = random.randint(self.config.MIN_CLOUD_GAP, self.config.MAX_CLOUD_GAP)
         self.image_sprite = Sprite.image
-        self.y_pos = random.randint(self.config["MAX_SKY_LEVEL"], self.config["MIN_SKY_LEVEL"])
-        self.draw()
+        self.y_pos = random.randint(self.max_sky_level, self.min_sky_level)
 
-    def draw(self):
+    def draw(self, layer):
         """
-        Draw the cloud.
+        Draw the cloud into the cloud layer.
         """
-        source_width = self.config["WIDTH"]
-        source_height = self.config["HEIGHT"]
         sprite_position = pygame.Rect(
             self.sprite_pos["x"],
             self.sprite_pos["y"],
-            source_width,
-            source_height
+            self.config.WIDTH,
+            self.config.HEIGHT
         )
-        destination_rect = pygame.Rect(self.x_pos, self.y_pos, source_width, source_height)
-        self.screen.blit(self.image_sprite, destination_rect, sprite_position)
+        layer.blit_sprite(sprite_position, self.x_pos, self.y_pos)
 
     def update(self, speed):
         """
@@ -57,12 +62,25 @@ class Cloud(object):
         """
         if not self.remove:
             self.x_pos -= math.ceil(speed)
-            self.draw()
             if not self.is_visible():
                 self.remove = True
 
+    def get_state(self):
+        """
+        Return the cloud position and gap.
+        """
+        return {"x_pos": self.x_pos, "y_pos": self.y_pos, "cloud_gap": self.cloud_gap}
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state.
+        """
+        self.x_pos = state["x_pos"]
+        self.y_pos = state["y_pos"]
+        self.cloud_gap = state["cloud_gap"]
+
     def is_visible(self):
         """
         Check if the cloud is visible on the stage.
         """
-        return self.x_pos + self.config["WIDTH"] > 0
+        return self.x_pos + self.config.WIDTH > 0
@@ -6,8 +6,84 @@ class CollisionBox(object):
     """
     Collision box class.
     """
+    __slots__ = ("x", "y", "width", "height")
+
     def __init__(self, x, y, w, h):
         self.x = x
         self.y = y
         self.width = w
         self.height = h
+
+def create_adjusted_collision_box(box, adjustment):
+    """
+    Adjust the collision box.
+    """
+    return CollisionBox(
+        box.x + adjustment.x,
+        box.y + adjustment.y,
+        box.width,
+        box.height
+    )
+
+def box_compare(t_rex_box, obstacle_box):
+    """
+    Compare two collision boxes for a collision.
+    """
+    crashed = False
+    if (
+            t_rex_box.x < obstacle_box.x + obstacle_box.width and
+            t_rex_box.x + t_rex_box.width > obstacle_box.x and
+            t_rex_box.y < obstacle_box.y + obstacle_box.height and
+            t_rex_box.y + t_rex_box.height > obstacle_box.y
+    ):
+        crashed = True
+    return crashed
+
+def check_collision(t_rex_box, t_rex_collision_boxes, obstacle_box, obstacle_collision_boxes):
+    """
+    Check the t-rex and obstacle outer boxes, then their detailed collision
+    boxes. Returns the colliding pair of adjusted boxes or False.
+    """
+    if box_compare(t_rex_box, obstacle_box):
+        for t_rex_collision_box in t_rex_collision_boxes:
+            for collision_box in obstacle_collision_boxes:
+                adj_t_rex_box = create_adjusted_collision_box(
+                    t_rex_collision_box,
+                    t_rex_box
+                )
+                adj_obstacle_box = create_adjusted_collision_box(
+                    collision_box,
+                    obstacle_box
+                )
+                crashed = box_compare(adj_t_rex_box, adj_obstacle_box)
+                if crashed:
+                    return [adj_t_rex_box, adj_obstacle_box]
+    return False
+
+def check_obstacle_collision(t_rex, obstacle):
+    """
+    Check a t-rex against an obstacle: their outer boxes, then the t-rex
+    running or ducking boxes against the obstacle's. Returns the colliding
+    pair of adjusted boxes or False.
+    """
+    t_rex_box = CollisionBox(
+        t_rex.x_pos + 1,
+        t_rex.y_pos + 1,
+        t_rex.config.WIDTH - 2,
+        t_rex.config.HEIGHT - 2
+    )
+    obstacle_box = CollisionBox(
+        obstacle.x_pos + 1,
+        obstacle.y_pos + 1,
+        obstacle.type_config.width * obstacle.size - 2,
+        obstacle.type_config.height - 2
+    )
+    t_rex_collision_boxes = (t_rex.collision_boxes["DUCKING"]
+                             if t_rex.ducking
+                             else t_rex.collision_boxes["RUNNING"])
+    return check_collision(
+        t_rex_box,
+        t_rex_collision_boxes,
+        obstacle_box,
+        obstacle.collision_boxes
+    )
@@ -6,3 +6,11 @@ SCREEN_WIDTH = 640
 SCREEN_HEIGHT = 480
 FPS = 60
 BOTTOM_PAD = 10
+GAME_HEIGHT = 150
+
+def get_sky_y_pos(height):
+    """
+    Return the top of the sky, where clouds, moon and stars are placed, for
+    a screen height. Screens taller than the game leave a margin above it.
+    """
+    return min(height // 3, height - GAME_HEIGHT)
@@ -0,0 +1,174 @@
+"""
+This module provides the class Controls.
+"""
+
+import collections
+import sys
+import pygame
+
+DEFAULT_BINDINGS = {
+    "JUMP": ["UP", "SPACE", "BUTTON_0", "HAT_UP"],
+    "DUCK": ["DOWN", "BUTTON_1", "HAT_DOWN"],
+    "START": ["RETURN", "BUTTON_7"],
+    "QUIT": ["ESCAPE"],
+    "CAPTURE": [],
+    "JUMP_2": [],
+    "DUCK_2": []
+}
+TWO_PLAYER_BINDINGS = {
+    "JUMP": ["UP", "HAT_UP"],
+    "DUCK": ["DOWN", "HAT_DOWN"],
+    "JUMP_2": ["SPACE", "BUTTON_0"],
+    "DUCK_2": ["LCTRL", "BUTTON_1"]
+}
+HAT_DIRECTIONS = {
+    "HAT_UP": (1, 1),
+    "HAT_DOWN": (1, -1),
+    "HAT_LEFT": (0, -1),
+    "HAT_RIGHT": (0, 1)
+}
+WAKE_EVENT = pygame.USEREVENT
+ALLOWED_EVENTS = [
+    WAKE_EVENT,
+    pygame.QUIT,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.JOYBUTTONDOWN,
+    pygame.JOYBUTTONUP,
+    pygame.JOYHATMOTION
+]
+
+InputEvent = collections.namedtuple("InputEvent", ["action", "pressed", "time"])
+
+class Controls(object):
+    """
+    Turns keyboard and joystick events into game actions. Bindings map an
+    action to key names (as in pygame.K_<name>), joystick buttons (BUTTON_<n>)
+    and hat directions (HAT_UP, HAT_DOWN, HAT_LEFT, HAT_RIGHT).
+    """
+    def __init__(self, bindings=None):
+        """
+        Initialize the controls, restrict the event queue to input events
+        and open the joysticks.
+        """
+        self.keys = {}
+        self.buttons = {}
+        self.hats = {}
+        self.hat_actions = {}
+        self.pending_events = []
+        self.latencies = []
+        for action, names in (bindings or DEFAULT_BINDINGS).items():
+            self.bind(action, names)
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+        pygame.joystick.init()
+        self.joysticks = [pygame.joystick.Joystick(index) for index in range(pygame.joystick.get_count())]
+        for joystick in self.joysticks:
+            joystick.init()
+
+    def bind(self, action, names):
+        """
+        Bind inputs to an action, replacing the inputs bound to it so far.
+        """
+        for table in (self.keys, self.buttons, self.hats):
+            for input_id in [input_id for input_id in table if table[input_id] == action]:
+                del table[input_id]
+        for name in names:
+            if name.startswith("BUTTON_") and name[7:].isdigit():
+                self.buttons[int(name[7:])] = action
+            elif name in HAT_DIRECTIONS:
+                self.hats[HAT_DIRECTIONS[name]] = action
+            elif hasattr(pygame, "K_" + name):
+                self.keys[getattr(pygame, "K_" + name)] = action
+            else:
+                raise ValueError("unknown input: %s" % name)
+
+    def poll(self):
+        """
+        Return the input events queued since the last poll. An event that
+        ended a wait is stamped with the time it arrived; the others with
+        the time of the poll, as Pygame does not record when an event was
+        queued, so the time they waited in the queue is not counted.
+        """
+        now = pygame.time.get_ticks()
+        inputs = []
+        events = self.pending_events + [(event, now) for event in pygame.event.get()]
+        self.pending_events = []
+        for event, event_time in events:
+            if event.type == pygame.QUIT:
+                inputs.append(InputEvent("QUIT", True, event_time))
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                if event.key in self.keys:
+                    inputs.append(InputEvent(
+                        self.keys[event.key],
+                        event.type == pygame.KEYDOWN,
+                        event_time
+                    ))
+            elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+                if event.button in self.buttons:
+                    inputs.append(InputEvent(
+                        self.buttons[event.button],
+                        event.type == pygame.JOYBUTTONDOWN,
+                        event_time
+                    ))
+            elif event.type == pygame.JOYHATMOTION:
+                inputs.extend(self.get_hat_inputs(event, event_time))
+        return inputs
+
+    def wait(self, timeout=None):
+        """
+        Block until an event is queued, or for at most timeout milliseconds.
+        The event is kept for the next poll, stamped with the time it
+        arrived. Returns whether the wait was ended by an event rather than
+        the timeout.
+        """
+        if timeout is not None:
+            pygame.time.set_timer(WAKE_EVENT, max(int(timeout), 1))
+        event = pygame.event.wait()
+        if timeout is not None:
+            pygame.time.set_timer(WAKE_EVENT, 0)
+        if event.type == WAKE_EVENT:
+            return False
+        self.pending_events.append((event, pygame.time.get_ticks()))
+        return True
+
+    def get_hat_inputs(self, event, now):
+        """
+        Return the actions pressed and released by a hat motion.
+        """
+        hat = (event.joy, event.hat)
+        active = set()
+        for (axis, direction), action in self.hats.items():
+            if event.value[axis] == direction:
+                active.add(action)
+        previous = self.hat_actions.get(hat, set())
+        self.hat_actions[hat] = active
+        return ([InputEvent(action, False, now) for action in previous - active] +
+                [InputEvent(action, True, now) for action in active - previous])
+
+    def record_latency(self, inputs):
+        """
+        Record the latency of inputs whose effect was just shown on screen.
+        """
+        now = pygame.time.get_ticks()
+        for input_event in inputs:
+            if input_event.pressed:
+                self.latencies.append(now - input_event.time)
+
+    def report(self, stream=sys.stdout):
+        """
+        Write the measured input to frame latency in milliseconds. Inputs
+        read by a poll are timed from the poll, so up to a frame spent
+        waiting in the event queue is not included.
+        """
+        if not self.latencies:
+            return
+        stream.write(
+            "input: %d inputs, input to frame %d ms average, %d ms max, "
+            "not counting time queued\n" % (
+                len(self.latencies),
+                sum(self.latencies) / len(self.latencies),
+                max(self.latencies)
+            )
+        )
+        stream.flush()
@@ -0,0 +1,233 @@
+"""
+This module provides the classes SpeedCurve and Course.
+"""
+
+import collections
+import itertools
+import json
+import math
+import random
+
+from game_config import get_config
+from obstacle import get_gap
+from obstacle_sampler import ObstacleSampler
+
+from constants import FPS
+
+LOOKAHEAD_SCREENS = 3
+
+ObstacleRecord = collections.namedtuple(
+    "ObstacleRecord",
+    ["type", "size", "y_pos", "speed_offset", "gap", "speed"]
+)
+
+class SpeedCurve(object):
+    """
+    Predicts the game speed from the distance ran. The game adds a fixed
+    acceleration to the speed every frame and runs the speed in pixels every
+    frame, so the speed grows with the square root of the distance.
+    """
+    def __init__(self, initial_speed, acceleration, max_speed, clear_time):
+        """
+        Initialise the speed curve from the game config.
+        """
+        self.initial_speed = initial_speed
+        self.acceleration = acceleration
+        self.max_speed = max_speed
+        self.clear_time = clear_time
+        frames = clear_time * float(FPS) / 1000
+        self.start_distance = initial_speed * frames + acceleration * frames * (frames - 1) / 2
+
+    def speed_at(self, distance):
+        """
+        Return the speed reached after running the given distance.
+        """
+        return min(
+            math.sqrt(self.initial_speed ** 2 + 2 * self.acceleration * distance),
+            self.max_speed
+        )
+
+class Course(object):
+    """
+    Lazily generated stream of obstacle records for one run.
+
+    Records are produced from a seed and the speed curve, so the same seed
+    always yields the same course, and kept buffered a few screens ahead of
+    the horizon.
+    """
+    def __init__(self, types, gap_coefficient, speed_curve, screen_width, seed=None):
+        """
+        Initialise the course.
+        """
+        self.types = types
+        self.types_by_name = dict((obstacle_type.type, obstacle_type) for obstacle_type in types)
+        self.config = get_config().obstacles
+        self.gap_coefficient = gap_coefficient
+        self.speed_curve = speed_curve
+        self.screen_width = screen_width
+        self.rng = random.Random()
+        self.sampler = ObstacleSampler(
+            types,
+            self.config.MAX_OBSTACLE_DUPLICATION,
+            self.config.MAX_OBSTACLE_LENGTH,
+            self.rng
+        )
+        self.seed = None
+        self.history = []
+        self.distance = 0
+        self.buffer = collections.deque()
+        self.buffered_distance = 0
+        self.records = None
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Restart the course from a seed. A random seed is chosen if none is given.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng.seed(self.seed)
+        self.history = []
+        self.distance = self.speed_curve.start_distance
+        self.buffer.clear()
+        self.buffered_distance = 0
+        self.records = self.generate()
+
+    def get_state(self):
+        """
+        Return the seed, the generator state and the buffered records.
+        Records passed to play are not kept beyond the buffer.
+        """
+        return {
+            "seed": self.seed,
+            "rng": self.rng.getstate(),
+            "history": list(self.history),
+            "distance": self.distance,
+            "buffer": [tuple(record) for record in self.buffer],
+            "buffered_distance": self.buffered_distance
+        }
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state. Generation carries on from
+        the restored random state.
+        """
+        self.seed = state["seed"]
+        self.rng.setstate(state["rng"])
+        self.history = list(state["history"])
+        self.distance = state["distance"]
+        self.buffer = collections.deque(ObstacleRecord(*record) for record in state["buffer"])
+        self.buffered_distance = state["buffered_distance"]
+        self.records = self.generate()
+
+    def play(self, records):
+        """
+        Replace the course with precomputed records, e.g. a cached daily
+        course, played from the start of the run. Generation then carries on
+        from the distance and obstacle history the records end at.
+        """
+        records = list(records)
+        self.history = []
+        self.distance = self.speed_curve.start_distance
+        for record in records:
+            obstacle_type = self.types_by_name[record.type]
+            self.history.insert(0, record.type)
+            del self.history[self.config.MAX_OBSTACLE_DUPLICATION:]
+            self.distance += self.get_spacing(
+                obstacle_type,
+                obstacle_type.width * record.size,
+                record.gap,
+                self.speed_curve.speed_at(self.distance),
+                record.speed_offset
+            )
+        self.buffer.clear()
+        self.buffered_distance = 0
+        self.records = itertools.chain(records, self.generate())
+
+    def generate(self):
+        """
+        Yield the obstacle records of the course.
+        """
+        while True:
+            speed = self.speed_curve.speed_at(self.distance)
+            obstacle_type, size = self.sampler.sample(speed, self.history)
+            self.history.insert(0, obstacle_type.type)
+            del self.history[self.config.MAX_OBSTACLE_DUPLICATION:]
+            if isinstance(obstacle_type.y_pos, tuple):
+                y_pos_config = obstacle_type.y_pos
+                y_pos = y_pos_config[self.rng.randint(0, len(y_pos_config) - 1)]
+            else:
+                y_pos = obstacle_type.y_pos
+            speed_offset = 0
+            if obstacle_type.speed_offset:
+                speed_offset = (
+                    obstacle_type.speed_offset
+                    if self.rng.random() > 0.5
+                    else -obstacle_type.speed_offset
+                )
+            width = obstacle_type.width * size
+            gap = get_gap(
+                width,
+                obstacle_type.min_gap,
+                self.gap_coefficient,
+                speed,
+                self.rng
+            )
+            self.distance += self.get_spacing(obstacle_type, width, gap, speed, speed_offset)
+            yield ObstacleRecord(obstacle_type.type, size, y_pos, speed_offset, gap, speed)
+
+    def get_spacing(self, obstacle_type, width, gap, speed, speed_offset):
+        """
+        Return the distance the game runs between the spawn of an obstacle
+        and the spawn of the one following it.
+        """
+        spacing = obstacle_type.width + width + gap
+        return spacing * speed / (speed + speed_offset)
+
+    def prefetch(self):
+        """
+        Generate one record ahead if the buffer is short. Returns whether a
+        record was generated.
+        """
+        if self.buffered_distance >= self.screen_width * LOOKAHEAD_SCREENS:
+            return False
+        record = next(self.records)
+        self.buffer.append(record)
+        self.buffered_distance += record.gap
+        return True
+
+    def fill(self):
+        """
+        Fill the whole lookahead buffer.
+        """
+        while self.prefetch():
+            pass
+
+    def next_record(self):
+        """
+        Return the next obstacle record.
+        """
+        if not self.buffer:
+            self.prefetch()
+        record = self.buffer.popleft()
+        self.buffered_distance -= record.gap
+        return record
+
+    def take(self, count):
+        """
+        Return the next count records, e.g. to precompute a whole course.
+        """
+        return [self.next_record() for _ in range(count)]
+
+def save_course(path, records):
+    """
+    Write course records to a JSON file.
+    """
+    with open(path, "w") as course_file:
+        json.dump([list(record) for record in records], course_file)
+
+def load_course(path):
+    """
+    Read course records written by save_course.
+    """
+    with open(path) as course_file:
+        return [ObstacleRecord(*record) for record in json.load(course_file)]
@@ -5,8 +5,14 @@ This module provides the class DistanceMeter.
 import math
 import pygame
 
+from game_config import get_config
 from sprite import Sprite
 
+STATE_ATTRIBUTES = (
+    "max_score", "max_score_units", "digits", "high_score", "achievement",
+    "flash_timer", "flash_iterations", "paint"
+)
+
 class DistanceMeter(object):
     """
     Handles displaying the distance meter.
@@ -29,14 +35,8 @@ class DistanceMeter(object):
         self.flash_timer = 0
         self.flash_iterations = 0
         self.invert_trigger = False
-        self.config = {
-            "MAX_DISTANCE_UNITS": 5,
-            "ACHIEVEMENT_DISTANCE": 100,
-            "COEFFICIENT": 0.025,
-            "FLASH_DURATION": 250,
-            "FLASH_ITERATIONS": 3
-        }
-        self.max_score_units = self.config["MAX_DISTANCE_UNITS"]
+        self.config = get_config().distance_meter
+        self.max_score_units = self.config.MAX_DISTANCE_UNITS
         self.dimensions = {
             "WIDTH": 10,
             "HEIGHT": 13,
@@ -45,14 +45,15 @@ class DistanceMeter(object):
         self.y_pos = [0, 13, 27, 40, 53, 67, 80, 93, 107, 120]
         self.image_sprite = Sprite.image
         self.alpha = 255
+        self.paint = True
         max_distance_str = ''
         self.calc_x_pos(screen_width)
         self.max_score = self.max_score_units
         for i in range(self.max_score_units):
-            self.draw(i, 0)
             self.default_string += '0'
             max_distance_str += '9'
         self.max_score = int(max_distance_str)
+        self.digits = list(self.default_string)
 
     def calc_x_pos(self, screen_width):
         """
@@ -98,11 +99,11 @@ class DistanceMeter(object):
         """
         Convert pixel distance to a 'real' distance.
         """
-        return int(math.floor(distance * self.config['COEFFICIENT'] + 0.5)) if distance else 0
+        return int(math.floor(distance * self.config.COEFFICIENT + 0.5)) if distance else 0
 
     def update(self, delta_time, distance):
         """
-        Update the distance meter.
+        Update the distance meter. Returns whether an achievement was reached.
         """
         paint = True
         play_sound = False
@@ -110,12 +111,12 @@ class DistanceMeter(object):
             distance = self.get_actual_distance(distance)
             if (
                     distance > self.max_score and
-                    self.max_score_units == self.config["MAX_DISTANCE_UNITS"]
+                    self.max_score_units == self.config.MAX_DISTANCE_UNITS
             ):
                 self.max_score_units += 1
                 self.max_score = int(str(self.max_score) + '9')
             if distance > 0:
-                if distance % self.config["ACHIEVEMENT_DISTANCE"] == 0:
+                if distance % self.config.ACHIEVEMENT_DISTANCE == 0:
                     self.achievement = True
                     self.flash_timer = 0
                     play_sound = True
@@ -124,22 +125,28 @@ class DistanceMeter(object):
             else:
                 self.digits = list(self.default_string)
         else:
-            if self.flash_iterations <= self.config["FLASH_ITERATIONS"]:
+            if self.flash_iterations <= self.config.FLASH_ITERATIONS:
                 self.flash_timer += delta_time
-                if self.flash_timer < self.config["FLASH_DURATION"]:
+                if self.flash_timer < self.config.FLASH_DURATION:
                     paint = False
-                elif self.flash_timer > self.config["FLASH_DURATION"] * 2:
+                elif self.flash_timer > self.config.FLASH_DURATION * 2:
                     self.flash_timer = 0
                     self.flash_iterations += 1
             else:
                 self.achievement = False
                 self.flash_iterations = 0
                 self.flash_timer = 0
-        if paint:
+        self.paint = paint
+        return play_sound
+
+    def render(self):
+        """
+        Draw the distance, unless it is flashing off, and the high score.
+        """
+        if self.paint:
             for i in range(len(self.digits) - 1, -1, -1):
                 self.draw(i, int(self.digits[i]))
         self.draw_high_score()
-        return play_sound
 
     def draw_high_score(self):
         """
@@ -159,6 +166,19 @@ class DistanceMeter(object):
         high_score_str = (self.default_string + str(distance))[-self.max_score_units:]
         self.high_score = ['10', '11', '12'] + list(high_score_str)
 
+    def get_state(self):
+        """
+        Return the shown digits, the high score and the flash state.
+        """
+        return dict((name, getattr(self, name)) for name in STATE_ATTRIBUTES)
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state.
+        """
+        for name in STATE_ATTRIBUTES:
+            setattr(self, name, state[name])
+
     def reset(self):
         """
         Reset the distance meter back to '00000'.
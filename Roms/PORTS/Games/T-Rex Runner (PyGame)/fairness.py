@@ -0,0 +1,416 @@
+"""
+Offline jumpability checker for generated obstacle courses.
+
+The horizon of a course is replayed frame by frame at a steady 60 FPS, and
+every t-rex state reachable from any sequence of key presses (jump, early
+release, speed drop, duck) is tracked with the game's own jump physics and
+collision code. An obstacle is reported as impossible when no reachable
+state survives it. Jump trajectories are enumerated once per speed bucket
+into a transition table, reachable states are propagated as NumPy masks,
+and courses are checked in parallel across processes.
+
+Usage:
+    python fairness.py --seeds 1000 --obstacles 500 --workers 4
+    python fairness.py --course daily.json
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import collections
+import math
+import multiprocessing
+import sys
+
+import numpy
+import pygame
+
+from collision_box import CollisionBox, check_collision
+from course import Course, SpeedCurve, load_course
+from game_config import get_config, load_config
+from horizon import get_obstacle_types
+from jump_physics import start_jump_velocity, end_jump_velocity, step_jump
+from obstacle import Obstacle
+from sprite import Sprite
+from t_rex import TRex
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+
+SPEED_BUCKET = 0.1
+
+CHECKERS = {}
+
+WorldObstacle = collections.namedtuple("WorldObstacle", ["index", "record", "shape", "x_pos"])
+
+class Checker(object):
+    """
+    Explores the reachable t-rex states over a course.
+
+    Every state reachable from a jump at any speed bucket is enumerated once
+    into a transition table, so the set of reachable states can be carried
+    from frame to frame as a boolean mask.
+    """
+    def __init__(self, curve):
+        """
+        Initialise the checker with a t-rex and obstacles drawn to a scratch surface.
+        """
+        if Sprite.image is None:
+            pygame.display.init()
+            pygame.display.set_mode((1, 1))
+            Sprite.load()
+        self.curve = curve
+        self.surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.t_rex = TRex(
+            self.surface,
+            {"x": 0, "y": 0},
+            {"WIDTH": SCREEN_WIDTH, "HEIGHT": SCREEN_HEIGHT}
+        )
+        self.config = self.t_rex.config
+        self.ground_y_pos = self.t_rex.ground_y_pos
+        self.min_jump_height = self.t_rex.min_jump_height
+        self.reach = self.t_rex.x_pos + self.config.WIDTH_DUCK + 2
+        self.types = get_obstacle_types(SCREEN_HEIGHT)
+        self.types_by_name = dict((obstacle_type.type, obstacle_type)
+                                  for obstacle_type in self.types)
+        self.obstacles = {}
+        self.collisions = {}
+        self.collision_masks = {}
+        self.states = []
+        self.state_ids = {}
+        self.successors = []
+        self.running = self.add_state((False, self.ground_y_pos, 0, False, False, False))
+        self.ducking = self.add_state((False, self.ground_y_pos, 0, False, False, True))
+        self.min_bucket = int(curve.initial_speed / SPEED_BUCKET)
+        self.max_bucket = int(math.ceil(curve.max_speed / SPEED_BUCKET))
+        self.jump_starts = [
+            self.add_state(self.step_air(
+                self.ground_y_pos,
+                start_jump_velocity(self.config, bucket * SPEED_BUCKET),
+                False,
+                False
+            ))
+            for bucket in range(self.min_bucket, self.max_bucket + 1)
+        ]
+        self.successor_array = numpy.array(self.successors, dtype=numpy.intp)
+        codes = {}
+        self.state_codes = numpy.array(
+            [codes.setdefault((state[1], state[5]), len(codes)) for state in self.states],
+            dtype=numpy.intp
+        )
+        self.codes = sorted(codes, key=codes.get)
+
+    def add_state(self, state):
+        """
+        Add a state and every airborne state reachable from it. Returns its id.
+        """
+        if state in self.state_ids:
+            return self.state_ids[state]
+        state_id = len(self.states)
+        self.state_ids[state] = state_id
+        self.states.append(state)
+        self.successors.append(None)
+        if state[0]:
+            following = [self.add_state(next_state) for next_state in self.get_air_transitions(state)]
+        else:
+            following = [state_id]
+        following += following[-1:] * (3 - len(following))
+        self.successors[state_id] = following
+        return state_id
+
+    def get_obstacle(self, record):
+        """
+        Return an obstacle shaped like the record, used for its collision boxes.
+        """
+        shape = (record.type, record.size, record.y_pos)
+        if shape not in self.obstacles:
+            obstacle_type = self.types_by_name[record.type]
+            self.obstacles[shape] = Obstacle(
+                self.surface,
+                obstacle_type,
+                {"x": 0, "y": 0},
+                {"WIDTH": SCREEN_WIDTH, "HEIGHT": SCREEN_HEIGHT},
+                record,
+                0
+            )
+        return shape
+
+    def get_collisions(self, shape, y_pos, ducking):
+        """
+        Return the obstacle x positions that collide with the t-rex at a height.
+        """
+        key = (shape, y_pos, ducking)
+        if key not in self.collisions:
+            obstacle = self.obstacles[shape]
+            t_rex_box = CollisionBox(
+                self.t_rex.x_pos + 1,
+                y_pos + 1,
+                self.config.WIDTH - 2,
+                self.config.HEIGHT - 2
+            )
+            t_rex_collision_boxes = self.t_rex.collision_boxes[
+                "DUCKING" if ducking else "RUNNING"
+            ]
+            colliding = set()
+            for x_pos in range(-obstacle.width - 2, self.reach):
+                obstacle_box = CollisionBox(
+                    x_pos + 1,
+                    obstacle.y_pos + 1,
+                    obstacle.width - 2,
+                    obstacle.type_config.height - 2
+                )
+                if check_collision(t_rex_box, t_rex_collision_boxes,
+                                   obstacle_box, obstacle.collision_boxes):
+                    colliding.add(x_pos)
+            self.collisions[key] = frozenset(colliding)
+        return self.collisions[key]
+
+    def get_collision_mask(self, shape, x_pos):
+        """
+        Return the mask of states that collide with an obstacle at a position.
+        """
+        key = (shape, x_pos)
+        if key not in self.collision_masks:
+            code_mask = numpy.array(
+                [x_pos in self.get_collisions(shape, y_pos, ducking)
+                 for y_pos, ducking in self.codes],
+                dtype=bool
+            )
+            self.collision_masks[key] = code_mask[self.state_codes]
+        return self.collision_masks[key]
+
+    def step_air(self, y_pos, jump_velocity, reached_min_height, speed_drop):
+        """
+        Advance an airborne state by one frame, landing it if it hits the ground.
+        """
+        y_pos, jump_velocity, reached_min_height = step_jump(
+            self.config,
+            self.min_jump_height,
+            y_pos,
+            jump_velocity,
+            reached_min_height,
+            speed_drop,
+            1
+        )
+        if y_pos > self.ground_y_pos:
+            return (False, self.ground_y_pos, 0, False, False, False)
+        return (True, y_pos, round(jump_velocity, 9), reached_min_height, speed_drop, False)
+
+    def get_air_transitions(self, state):
+        """
+        Return the states following an airborne state: keep holding, release
+        the jump key, or speed drop.
+        """
+        _, y_pos, jump_velocity, reached_min_height, speed_drop, _ = state
+        following = [self.step_air(y_pos, jump_velocity, reached_min_height, speed_drop)]
+        released = self.step_air(
+            y_pos,
+            end_jump_velocity(self.config, jump_velocity, reached_min_height),
+            reached_min_height,
+            speed_drop
+        )
+        if released not in following:
+            following.append(released)
+        if not speed_drop:
+            following.append(self.step_air(y_pos, 1, reached_min_height, True))
+        return following
+
+    def get_jump_start(self, speed):
+        """
+        Return the id of the state one frame into a jump started at the given speed.
+        """
+        bucket = int(speed / SPEED_BUCKET + 0.5)
+        bucket = min(max(bucket, self.min_bucket), self.max_bucket)
+        return self.jump_starts[bucket - self.min_bucket]
+
+    def world(self, records):
+        """
+        Yield the game speed and the first obstacle for every frame of the
+        course, following Horizon.update_obstacles.
+        """
+        delta_time = 1000.0 / FPS
+        pixels_per_ms = get_config().game.PIXELS_PER_MS
+        speed = self.curve.initial_speed
+        running_time = 0
+        obstacles = []
+        pending = iter(enumerate(records))
+        exhausted = False
+        while not exhausted or obstacles:
+            running_time += delta_time
+            if running_time > self.curve.clear_time:
+                for obstacle in obstacles:
+                    obstacle[0] -= math.floor(
+                        (speed + obstacle[1].speed_offset) * pixels_per_ms * delta_time + 0.5
+                    )
+                while obstacles and obstacles[0][0] + obstacles[0][3] <= 0:
+                    obstacles.pop(0)
+                last = obstacles[-1] if obstacles else None
+                if last is None or (
+                        not last[5] and
+                        last[0] + last[3] + last[1].gap < SCREEN_WIDTH
+                ):
+                    try:
+                        index, record = next(pending)
+                        shape = self.get_obstacle(record)
+                        type_width = self.types_by_name[record.type].width
+                        obstacles.append([
+                            SCREEN_WIDTH + type_width,
+                            record,
+                            index,
+                            type_width * record.size,
+                            shape,
+                            False
+                        ])
+                        if last is not None:
+                            last[5] = True
+                    except StopIteration:
+                        exhausted = True
+            if obstacles and running_time > self.curve.clear_time:
+                first = obstacles[0]
+                yield speed, WorldObstacle(first[2], first[1], first[4], first[0])
+            else:
+                yield speed, None
+            if speed < self.curve.max_speed:
+                speed += self.curve.acceleration
+
+    def check(self, records):
+        """
+        Return the indexes of the obstacles that no input sequence can clear.
+        """
+        impossible = []
+        num_states = len(self.states)
+        states = numpy.zeros(num_states, dtype=bool)
+        states[self.running] = True
+        dead_index = None
+        for speed, obstacle in self.world(records):
+            if dead_index is not None:
+                if obstacle is not None and obstacle.index == dead_index:
+                    continue
+                dead_index = None
+                states[:] = False
+                states[self.running] = True
+                states[self.ducking] = True
+            following = numpy.zeros(num_states, dtype=bool)
+            following[self.successor_array[numpy.flatnonzero(states)]] = True
+            if following[self.running] or following[self.ducking]:
+                following[self.running] = True
+                following[self.ducking] = True
+                following[self.get_jump_start(speed)] = True
+            if obstacle is not None and obstacle.x_pos < self.reach:
+                following &= ~self.get_collision_mask(obstacle.shape, obstacle.x_pos)
+                if not following.any():
+                    impossible.append(obstacle.index)
+                    dead_index = obstacle.index
+            states = following
+        return impossible
+
+def describe(record):
+    """
+    Return a short label for an obstacle record.
+    """
+    if record.speed_offset:
+        return "%s@%d" % (record.type, record.y_pos)
+    return "%s x%d" % (record.type, record.size)
+
+def check_seed(job):
+    """
+    Generate and check one seeded course. Returns the number of obstacles and
+    the impossible ones.
+    """
+    seed, count, curve_args, gap_coefficient = job
+    if curve_args not in CHECKERS:
+        CHECKERS[curve_args] = Checker(SpeedCurve(*curve_args))
+    checker = CHECKERS[curve_args]
+    records = Course(checker.types, gap_coefficient, checker.curve, SCREEN_WIDTH, seed).take(count)
+    return seed, count, report_failures(checker, records)
+
+def report_failures(checker, records):
+    """
+    Check records and describe the impossible obstacles.
+    """
+    failures = []
+    for index in checker.check(records):
+        record = records[index]
+        previous = describe(records[index - 1]) if index else "-"
+        failures.append((index, describe(record), previous, record.gap, record.speed))
+    return failures
+
+def main():
+    """
+    Run the checker over a course file or a range of seeds and print a report.
+    """
+    parser = argparse.ArgumentParser(description="Check generated courses for impossible obstacles.")
+    parser.add_argument("--course", help="course file written by course.save_course")
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds to check")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--obstacles", type=int, default=500, help="obstacles per seed")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--config", help="JSON file of tuning values, instead of config.json")
+    parser.add_argument("--speed", type=float)
+    parser.add_argument("--acceleration", type=float)
+    parser.add_argument("--max-speed", type=float)
+    parser.add_argument("--clear-time", type=float)
+    parser.add_argument("--gap-coefficient", type=float)
+    args, _ = parser.parse_known_args()
+    try:
+        game_config = load_config(args.config).game
+    except (IOError, OSError, ValueError) as error:
+        parser.error("invalid config %s: %s" % (args.config or "config.json", error))
+    parser.set_defaults(
+        speed=game_config.SPEED,
+        acceleration=game_config.ACCELERATION,
+        max_speed=game_config.MAX_SPEED,
+        clear_time=game_config.CLEAR_TIME,
+        gap_coefficient=game_config.GAP_COEFFICIENT
+    )
+    args = parser.parse_args()
+    curve_args = (args.speed, args.acceleration, args.max_speed, args.clear_time)
+
+    if args.course:
+        records = load_course(args.course)
+        results = [(None, len(records), report_failures(Checker(SpeedCurve(*curve_args)), records))]
+    else:
+        jobs = [
+            (seed, args.obstacles, curve_args, args.gap_coefficient)
+            for seed in range(args.first_seed, args.first_seed + args.seeds)
+        ]
+        if args.workers > 1:
+            pool = multiprocessing.Pool(args.workers, load_config, (args.config,))
+            try:
+                results = list(pool.imap_unordered(check_seed, jobs))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [check_seed(job) for job in jobs]
+
+    total = sum(count for _, count, _ in results)
+    by_type_speed = collections.Counter()
+    by_pair = collections.Counter()
+    failing_seeds = []
+    for seed, _, failures in results:
+        if failures:
+            failing_seeds.append(seed)
+        for _, label, previous, gap, speed in failures:
+            by_type_speed[(label, math.floor(speed * 2) / 2)] += 1
+            by_pair[(previous, label)] += 1
+    impossible = sum(by_type_speed.values())
+    print("checked %d obstacles, %d impossible (%.4f%%)" % (
+        total, impossible, 100.0 * impossible / max(total, 1)))
+    if impossible:
+        print("")
+        print("impossible by obstacle and speed:")
+        for (label, speed), count in sorted(by_type_speed.items()):
+            print("  %-24s speed %5.1f  %d" % (label, speed, count))
+        print("")
+        print("impossible by preceding obstacle:")
+        for (previous, label), count in by_pair.most_common():
+            print("  %-24s -> %-24s %d" % (previous, label, count))
+        if failing_seeds and failing_seeds[0] is not None:
+            print("")
+            print("failing seeds: %s" % " ".join(str(seed) for seed in sorted(failing_seeds)[:50]))
+    return 1 if impossible else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
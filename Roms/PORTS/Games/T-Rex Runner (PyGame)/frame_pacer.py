@@ -0,0 +1,77 @@
+"""
+This module provides the class FramePacer.
+"""
+
+COST_SMOOTHING = 0.1
+RAISE_FRAMES = 10
+LOWER_FRAMES = 120
+LOWER_HEADROOM = 0.8
+
+class FramePacer(object):
+    """
+    Decides which simulated frames are rendered. The game is simulated at the
+    full frame rate; when updating and rendering every frame costs more than
+    the frame budget, only every second or third frame is rendered. Raising
+    the skip reacts within a few frames, lowering it again needs a long run
+    of frames with headroom, so the rate does not flip back and forth.
+    """
+    def __init__(self, fps, target_fps, max_skip=2):
+        """
+        Initialize the pacer for the simulation rate and the target render rate.
+        """
+        self.frame_budget = 1000.0 / fps
+        self.min_skip = max(int(round(float(fps) / target_fps)) - 1, 0)
+        self.max_skip = max(max_skip, self.min_skip)
+        self.skip = self.min_skip
+        self.frames_to_skip = 0
+        self.update_cost = 0
+        self.render_cost = 0
+        self.over_budget_count = 0
+        self.under_budget_count = 0
+
+    def should_render(self):
+        """
+        Return whether the current frame is rendered.
+        """
+        if self.frames_to_skip:
+            self.frames_to_skip -= 1
+            return False
+        self.frames_to_skip = self.skip
+        return True
+
+    def add_update_cost(self, cost):
+        """
+        Record the milliseconds spent simulating a frame.
+        """
+        self.update_cost += (cost - self.update_cost) * COST_SMOOTHING
+
+    def add_render_cost(self, cost):
+        """
+        Record the milliseconds spent rendering a frame and adjust the skip.
+        """
+        self.render_cost += (cost - self.render_cost) * COST_SMOOTHING
+        if self.get_cycle_cost(self.skip) > (self.skip + 1) * self.frame_budget:
+            self.over_budget_count += 1
+            self.under_budget_count = 0
+            if self.over_budget_count >= RAISE_FRAMES and self.skip < self.max_skip:
+                self.skip += 1
+                self.over_budget_count = 0
+        elif (
+                self.skip > self.min_skip and
+                self.get_cycle_cost(self.skip - 1) < self.skip * self.frame_budget * LOWER_HEADROOM
+        ):
+            self.over_budget_count = 0
+            self.under_budget_count += 1
+            if self.under_budget_count >= LOWER_FRAMES:
+                self.skip -= 1
+                self.under_budget_count = 0
+        else:
+            self.over_budget_count = 0
+            self.under_budget_count = 0
+
+    def get_cycle_cost(self, skip):
+        """
+        Return the estimated cost of simulating skip + 1 frames and rendering
+        the last one.
+        """
+        return (skip + 1) * self.update_cost + self.render_cost
@@ -2,120 +2,261 @@
 This module provides the class Game.
 """
 
+import argparse
 import math
+import random
 import sys
+import time
 import pygame
 
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
-
-pygame.init()
-INFO = pygame.display.Info()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-
-from collision_box import CollisionBox
+from asset_bundle import AssetBundle
+from audio import Audio, AUDIO_MODES, SOUND_FILES
+from autopilot import Autopilot
+from capture import FrameCapture, CAPTURE_FORMATS
+from collision_box import check_obstacle_collision
+from controls import Controls, DEFAULT_BINDINGS, TWO_PLAYER_BINDINGS
+from course import SpeedCurve
 from distance_meter import DistanceMeter
+from frame_pacer import FramePacer
+from game_config import get_config, load_config
 from game_over_panel import GameOverPanel
+from ghost import Ghost
 from horizon import Horizon
+from jump_table import JumpTable
+from policy import Policy
+from render_target import RenderTarget
+from replay import Replay, REPLAY_ACTIONS
+from runner import Runner
+from save_state import SaveState
+from score_store import ScoreStore
+from sprite import Sprite
+from startup_timer import StartupTimer
 from t_rex import TRex
+from telemetry import Telemetry
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+
+SPRITE_DEFINITION = {
+    "CACTUS_LARGE": {'x': 332, 'y': 2},
+    "CACTUS_SMALL": {'x': 228, 'y': 2},
+    "CLOUD": {'x': 86, 'y': 2},
+    "HORIZON": {'x': 2, 'y': 54},
+    "MOON": {'x': 484, 'y': 2},
+    "PTERODACTYL": {'x': 134, 'y': 2},
+    "RESTART": {'x': 2, 'y': 2},
+    "TEXT_SPRITE": {'x': 655, 'y': 2},
+    "TREX": {'x': 848, 'y': 2},
+    "STAR": {'x': 645, 'y': 2}
+}
+
+SECOND_PLAYER_ALPHA = 160
+SECOND_PLAYER_ACTIONS = {"JUMP_2": "JUMP", "DUCK_2": "DUCK"}
+
+STATE_ATTRIBUTES = (
+    "distance_ran", "highest_score", "running_time", "current_speed", "inverted",
+    "invert_timer", "invert_trigger", "play_count"
+)
 
 class Game(object):
     """
     T-Rex runner game.
     """
-    def __init__(self):
+    def __init__(
+            self, render_target, audio, controls, target_fps=FPS, score_store=None,
+            save_state=None, telemetry=None, capture=None, autopilot=False, policy=None,
+            ghosts=None, record_replays=False, two_player=False, get_ticks=None
+    ):
         """
-        Game initializer.
+        Game initializer. The display must be set up and the sprite atlas loaded.
+        The game is simulated at FPS and rendered at up to target_fps. Runs are
+        recorded in the score store, if any, which also holds the high score.
+        A run in progress at quit is kept in the save state, if any. Frame
+        times, actions and deaths are logged to the telemetry, if any. The
+        frame capture, if any, records the last seconds of play and saves
+        them for a new high score or on the CAPTURE action. With autopilot,
+        or a trained policy to follow, the game plays itself; its runs are
+        logged to the telemetry but do not count for the high score. Every
+        run is played on the course of the ghost replays, if any, with their
+        ghosts racing the t-rex. With record_replays each run is saved as a
+        replay when it ends. With two_player a second t-rex, played with the
+        JUMP_2 and DUCK_2 actions, races the first on the same course; the
+        first to crash loses, and the run does not count for the high score.
+        Game time is read from get_ticks, Pygame's clock by default, so a
+        run can be played at set times.
         """
-        self.screen = screen
-        pygame.display.set_caption("T-Rex Runner")
+        self.render_target = render_target
+        self.screen = render_target.surface
+        self.audio = audio
+        self.controls = controls
+        self.score_store = score_store
+        self.save_state = save_state
+        self.telemetry = telemetry
+        self.capture = capture
+        self.autopilot = None
+        self.replay = None
+        self.record_replays = record_replays
+        self.course_seed = ghosts[0].seed if ghosts else None
         self.clock = pygame.time.Clock()
-        self.config = {
-            "ACCELERATION": 0.001,
-            "BG_CLOUD_SPEED": 0.2,
-            "BOTTOM_PAD": 10,
-            "CLEAR_TIME": 3000,
-            "CLOUD_FREQUENCY": 0.5,
-            "GAMEOVER_CLEAR_TIME": 750,
-            "GAP_COEFFICIENT": 0.6,
-            "GRAVITY": 0.6,
-            "INITIAL_JUMP_VELOCITY": 12,
-            "INVERT_FADE_DURATION": 12000,
-            "INVERT_DISTANCE": 700,
-            "MAX_BLINK_COUNT": 3,
-            "MAX_CLOUDS": 6,
-            "MAX_OBSTACLE_LENGTH": 3,
-            "MAX_OBSTACLE_DUPLICATION": 2,
-            "MAX_SPEED": 13,
-            "MIN_JUMP_HEIGHT": 35,
-            "SPEED": 6,
-            "SPEED_DROP_COEFFICIENT": 3,
-        }
-        self.dimensions = {
-            "WIDTH": SCREEN_WIDTH,
-            "HEIGHT": SCREEN_HEIGHT
-        }
+        self.get_ticks = get_ticks or pygame.time.get_ticks
+        self.config = get_config().game
+        self.dimensions = render_target.get_dimensions()
         self.t_rex = None
         self.distance_meter = None
         self.distance_ran = 0
         self.highest_score = 0
         self.time = 0
+        self.input_time = 0
         self.running_time = 0
-        self.ms_per_frame = 1000 / FPS
-        self.current_speed = self.config["SPEED"]
-        self.obstacles = []
+        self.ms_per_frame = self.config.MS_PER_FRAME
+        self.current_speed = self.config.SPEED
         self.playing = False
         self.crashed = False
         self.paused = False
         self.inverted = False
         self.invert_timer = 0
+        self.invert_trigger = False
         self.play_count = 0
-        pygame.mixer.pre_init(44100, -16, 2, 8192)
-        pygame.mixer.init()
-        self.button_press_sound = pygame.mixer.Sound("assets/button-press.ogg")
-        self.hit_sound = pygame.mixer.Sound("assets/hit.ogg")
-        self.score_reached_sound = pygame.mixer.Sound("assets/score-reached.ogg")
-        self.sprite_def = {
-            "CACTUS_LARGE": {'x': 332, 'y': 2},
-            "CACTUS_SMALL": {'x': 228, 'y': 2},
-            "CLOUD": {'x': 86, 'y': 2},
-            "HORIZON": {'x': 2, 'y': 54},
-            "MOON": {'x': 484, 'y': 2},
-            "PTERODACTYL": {'x': 134, 'y': 2},
-            "RESTART": {'x': 2, 'y': 2},
-            "TEXT_SPRITE": {'x': 655, 'y': 2},
-            "TREX": {'x': 848, 'y': 2},
-            "STAR": {'x': 645, 'y': 2}
-        }
+        self.sprite_def = SPRITE_DEFINITION
         self.playing_intro = True
         self.game_over_panel = None
+        self.font = pygame.font.Font(None, 24 * self.dimensions["SCALE"])
+        self.frame_pacer = FramePacer(FPS, target_fps)
         self.horizon = Horizon(
             self.screen,
             self.sprite_def,
             self.dimensions,
-            self.config["GAP_COEFFICIENT"]
+            self.config.GAP_COEFFICIENT,
+            SpeedCurve(
+                self.config.SPEED,
+                self.config.ACCELERATION,
+                self.config.MAX_SPEED,
+                self.config.CLEAR_TIME
+            ),
+            self.course_seed
         )
         self.distance_meter = DistanceMeter(
             self.screen,
             self.sprite_def["TEXT_SPRITE"],
             self.dimensions["WIDTH"]
         )
-        self.t_rex = TRex(self.screen, self.sprite_def["TREX"])
+        if self.score_store and self.score_store.best_distance:
+            self.highest_score = self.score_store.best_distance
+            self.distance_meter.set_high_score(self.highest_score)
+        self.t_rex = TRex(self.screen, self.sprite_def["TREX"], self.dimensions)
+        self.ghosts = [
+            Ghost(self.screen, self.sprite_def["TREX"], self.dimensions, replay)
+            for replay in ghosts or []
+        ]
+        self.second_player = Runner(
+            self.screen,
+            self.sprite_def["TREX"],
+            self.dimensions,
+            SECOND_PLAYER_ALPHA
+        ) if two_player else None
+        self.runners = self.ghosts + ([self.second_player] if two_player else [])
+        self.winner = None
+        if self.config.JUMP_TABLES:
+            self.t_rex.jump_table = JumpTable(
+                self.t_rex,
+                self.config.SPEED,
+                self.config.MAX_SPEED
+            )
+        if autopilot or policy:
+            self.autopilot = Autopilot(self, policy=policy)
+
+    def run(self, startup_timer=None):
+        """
+        Run the main loop. Audio is started once the first frame is shown.
+        Input is read right before the frame is simulated, and the latency
+        of inputs that changed the t-rex state is recorded once the frame
+        is shown. Every frame is simulated, but the frame pacer may skip
+        rendering some of them. While the screen is static the loop sleeps
+        until an input arrives. Autopilot inputs are applied after the
+        player's and are not counted in the latency.
+        """
+        static = False
+        unshown_inputs = []
+        t_rex_status = None
         while True:
-            self.clock.tick(FPS)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    sys.exit(0)
-                elif event.type == pygame.KEYDOWN:
-                    self.on_key_down(event)
-                elif event.type == pygame.KEYUP:
-                    self.on_key_up(event)
+            if static:
+                self.idle(self.get_idle_timeout())
+            frame_time = self.clock.tick(FPS)
+            if self.telemetry and self.playing:
+                self.telemetry.add_frame_time(frame_time)
+            frame_start = time.time()
             self.set_speed()
-            if not self.inverted:
-                self.screen.fill((247, 247, 247))
-            else:
-                self.screen.fill((0, 0, 0))
+            inputs = self.controls.poll()
+            if inputs and not unshown_inputs:
+                t_rex_status = self.t_rex.current_status
+            unshown_inputs.extend(inputs)
+            if self.autopilot:
+                inputs = inputs + self.autopilot.get_inputs()
+            for input_event in inputs:
+                self.input_time = input_event.time
+                if input_event.pressed:
+                    self.on_action_down(input_event.action)
+                else:
+                    self.on_action_up(input_event.action)
             self.update()
-            pygame.display.flip()
+            static = self.is_static()
+            update_end = time.time()
+            self.frame_pacer.add_update_cost((update_end - frame_start) * 1000)
+            if not (static or self.frame_pacer.should_render()):
+                continue
+            self.draw()
+            self.render_target.present()
+            if self.capture:
+                self.capture.add_frame(self.render_target.canvas)
+            self.frame_pacer.add_render_cost((time.time() - update_end) * 1000)
+            if unshown_inputs:
+                if self.t_rex.current_status != t_rex_status:
+                    self.controls.record_latency(unshown_inputs)
+                unshown_inputs = []
+            if not self.audio.started:
+                if startup_timer:
+                    startup_timer.mark("first frame")
+                self.audio.init()
+                if startup_timer:
+                    startup_timer.mark("audio")
+                    startup_timer.report()
+                    startup_timer = None
+
+    def is_static(self):
+        """
+        Return whether the screen only changes on input or for the t-rex
+        blink: waiting to start or crashed, with no score flash or night mode
+        fade running.
+        """
+        if self.playing or self.autopilot:
+            return False
+        if self.crashed:
+            return not (
+                self.distance_meter.achievement or
+                self.horizon.night_mode.is_fading(self.inverted)
+            )
+        return True
+
+    def get_idle_timeout(self):
+        """
+        Return the milliseconds until the t-rex blink animation changes, or
+        None if the screen stays the same until an input arrives.
+        """
+        if (
+                self.t_rex.current_status == self.t_rex.status["WAITING"] and
+                self.t_rex.blink_count < self.config.MAX_BLINK_COUNT
+        ):
+            return self.t_rex.get_blink_timeout(pygame.time.get_ticks())
+        return None
+
+    def idle(self, timeout=None):
+        """
+        Sleep until an input arrives or the timeout expires. Time slept until
+        an input is not counted as game time, so the game does not jump
+        ahead when it starts.
+        """
+        sleep_start = self.get_ticks()
+        if self.controls.wait(timeout):
+            self.time += self.get_ticks() - sleep_start
 
     def set_speed(self, opt_speed=None):
         """
@@ -132,20 +273,31 @@ class Game(object):
         self.playing = True
         self.playing_intro = False
         self.play_count += 1
+        self.start_runners()
+
+    def start_runners(self):
+        """
+        Start the ghosts and the second player over and begin recording the
+        run, if replays are recorded.
+        """
+        for runner in self.runners:
+            runner.reset()
+        self.winner = None
+        self.replay = Replay(self.horizon.course.seed) if self.record_replays else None
 
     def update(self):
         """
         Update the game frame.
         """
         self.update_pending = False
-        now = pygame.time.get_ticks()
+        now = self.get_ticks()
         delta_time = now - (self.time if self.time is not None else now)
         self.time = now
         if self.playing:
             if self.t_rex.jumping:
                 self.t_rex.update_jump(delta_time)
             self.running_time += delta_time
-            has_obstacles = self.running_time > self.config["CLEAR_TIME"]
+            has_obstacles = self.running_time > self.config.CLEAR_TIME
             if self.t_rex.jump_count == 1 and self.playing_intro:
                 self.start_game()
             if self.playing_intro:
@@ -162,20 +314,30 @@ class Game(object):
                     has_obstacles,
                     self.inverted
                 )
+            for ghost in self.ghosts:
+                ghost.play(self.running_time, self.current_speed)
+            for runner in self.runners:
+                runner.update(
+                    delta_time,
+                    self.current_speed,
+                    self.horizon.obstacles[0] if has_obstacles else None
+                )
             collision = has_obstacles and self.check_for_collision(self.horizon.obstacles[0])
-            if not collision:
+            if not (collision or (self.second_player and self.second_player.crashed)):
                 self.distance_ran += (self.current_speed * delta_time / self.ms_per_frame)
-                if self.current_speed < self.config["MAX_SPEED"]:
-                    self.current_speed += self.config["ACCELERATION"]
+                if self.current_speed < self.config.MAX_SPEED:
+                    self.current_speed += self.config.ACCELERATION
+            elif collision:
+                self.game_over(self.horizon.obstacles[0], collision)
             else:
-                self.game_over()
+                self.game_over(self.second_player.crash_obstacle)
             play_achievement_sound = self.distance_meter.update(
                 delta_time,
                 math.ceil(self.distance_ran)
             )
             if play_achievement_sound:
-                self.score_reached_sound.play()
-            if self.invert_timer > self.config["INVERT_FADE_DURATION"]:
+                self.audio.play("SCORE_REACHED")
+            if self.invert_timer > self.config.INVERT_FADE_DURATION:
                 self.invert_timer = 0
                 self.invert_trigger = False
                 self.invert()
@@ -184,15 +346,14 @@ class Game(object):
             else:
                 actual_distance = self.distance_meter.get_actual_distance(self.distance_ran)
                 if actual_distance > 0:
-                    self.invert_trigger = not actual_distance % self.config["INVERT_DISTANCE"]
+                    self.invert_trigger = not actual_distance % self.config.INVERT_DISTANCE
                     if self.invert_trigger and self.invert_timer == 0:
                         self.invert_timer += delta_time
                         self.invert()
-        if (self.playing or (self.t_rex.blink_count < self.config["MAX_BLINK_COUNT"])):
+        if (self.playing or (self.t_rex.blink_count < self.config.MAX_BLINK_COUNT)):
             self.t_rex.update(delta_time)
         if not self.playing:
             if (self.crashed and self.game_over_panel):
-                self.game_over_panel.draw()
                 self.horizon.update(
                     0,
                     self.current_speed,
@@ -203,72 +364,134 @@ class Game(object):
                     delta_time,
                     math.ceil(self.distance_ran)
                 )
-            if not self.crashed:
-                font = pygame.font.Font(None, 24)
-                text_surface = font.render("Press START to begin", True, (0, 0, 0))
-                self.screen.blit(text_surface, (5, 5))
 
-    def on_key_down(self, event):
+    def draw(self):
+        """
+        Draw the game frame.
+        """
+        if not self.inverted:
+            self.screen.fill((247, 247, 247))
+        else:
+            self.screen.fill((0, 0, 0))
+        show_t_rex = self.playing or self.t_rex.blink_count < self.config.MAX_BLINK_COUNT
+        if self.playing:
+            self.horizon.draw()
+            self.distance_meter.render()
+            for ghost in self.ghosts:
+                ghost.render()
+            self.t_rex.render()
+            if self.second_player:
+                self.second_player.render()
+        elif self.crashed and self.game_over_panel:
+            if show_t_rex:
+                self.t_rex.render()
+            self.game_over_panel.draw()
+            self.horizon.draw()
+            self.distance_meter.render()
+            for runner in self.runners:
+                runner.render()
+            if self.winner:
+                text_surface = self.font.render(self.winner, True, (0, 0, 0))
+                self.screen.blit(
+                    text_surface,
+                    (5, 5 + self.font.get_linesize() // self.dimensions["SCALE"])
+                )
+        else:
+            if show_t_rex:
+                self.t_rex.render()
+            text_surface = self.font.render("Press START to begin", True, (0, 0, 0))
+            self.screen.blit(text_surface, (5, 5))
+
+    def on_action_down(self, action):
         """
-        Process keydown.
+        Process a pressed action.
         """
-        if event.key == pygame.K_ESCAPE:
-            pygame.quit()
-            sys.exit()
-        if self.playing_intro and event.key == pygame.K_RETURN:
+        if action == "QUIT":
+            self.quit()
+        if action == "CAPTURE" and self.capture:
+            self.capture.trigger(time.strftime("%Y%m%d-%H%M%S"))
+        if self.playing_intro and action == "START":
             self.start_game()
             self.update()
             self.t_rex.start_jump(self.current_speed)
+            if self.replay:
+                self.replay.add_event(self.running_time, "JUMP", True)
+        if self.replay and self.playing and not self.crashed and action in REPLAY_ACTIONS:
+            self.replay.add_event(self.running_time, action, True)
+        if self.second_player and self.playing and action in SECOND_PLAYER_ACTIONS:
+            self.second_player.press(SECOND_PLAYER_ACTIONS[action], True, self.current_speed)
         if (
                 not self.crashed and self.playing and
-                (event.key == pygame.K_UP)
+                action == "JUMP"
         ):
             if not self.t_rex.jumping and not self.t_rex.ducking:
-                self.button_press_sound.play()
+                self.audio.play("BUTTON_PRESS", self.input_time)
                 self.t_rex.start_jump(self.current_speed)
-        if self.crashed and event.key == pygame.K_RETURN:
+                if self.telemetry:
+                    self.telemetry.add_action("JUMP")
+        if self.crashed and action == "START":
             self.restart()
         if (
                 self.playing and
                 not self.crashed and
-                (event.key == pygame.K_DOWN)
+                action == "DUCK"
         ):
             if self.t_rex.jumping:
                 self.t_rex.set_speed_drop()
+                if self.telemetry:
+                    self.telemetry.add_action("SPEED_DROP")
             elif not self.t_rex.jumping and not self.t_rex.ducking:
                 self.t_rex.set_duck(True)
+                if self.telemetry:
+                    self.telemetry.add_action("DUCK")
 
-    def on_key_up(self, event):
+    def on_action_up(self, action):
         """
-        Process key up.
+        Process a released action.
         """
-        is_jump_key = (event.key == pygame.K_UP)
+        is_jump_key = action == "JUMP"
+        if self.replay and self.playing and not self.crashed and action in REPLAY_ACTIONS:
+            self.replay.add_event(self.running_time, action, False)
+        if self.second_player and self.playing and action in SECOND_PLAYER_ACTIONS:
+            self.second_player.press(SECOND_PLAYER_ACTIONS[action], False, self.current_speed)
         if is_jump_key:
             self.t_rex.end_jump()
-        elif event.key == pygame.K_DOWN:
+        elif action == "DUCK":
             self.t_rex.speed_drop = False
             self.t_rex.set_duck(False)
         elif self.crashed:
-            delta_time = pygame.time.get_ticks() - self.time
+            delta_time = self.get_ticks() - self.time
             if (
-                    event.key == pygame.K_RETURN or
-                    (delta_time >= self.config["GAMEOVER_CLEAR_TIME"] and
-                     (event.key == pygame.K_UP))
+                    action == "START" or
+                    (delta_time >= self.config.GAMEOVER_CLEAR_TIME and
+                     is_jump_key)
             ):
                 self.restart()
         elif self.paused and is_jump_key:
             self.t_rex.reset()
             self.play()
 
-    def game_over(self):
+    def game_over(self, obstacle=None, collision=None):
         """
-        Game over state.
+        Game over state. The run is recorded with the obstacle hit and the
+        colliding boxes returned by check_for_collision. When only the second
+        player crashed, the obstacle is the one it hit and there are no boxes.
         """
-        self.hit_sound.play()
+        t_rex_status = self.t_rex.current_status
+        self.audio.play("HIT")
         self.stop()
         self.crashed = True
         self.distance_meter.achievement = False
-        self.t_rex.update(100, self.t_rex.status["CRASHED"])
+        if collision or not self.second_player:
+            self.t_rex.update(100, self.t_rex.status["CRASHED"])
+        if self.second_player:
+            if not collision:
+                self.winner = "Player 1 wins"
+            elif not self.second_player.crashed:
+                self.winner = "Player 2 wins"
+            else:
+                self.winner = "Draw"
+        ranked = not (self.autopilot or self.second_player)
         if not self.game_over_panel:
             self.game_over_panel = GameOverPanel(
                 self.screen,
@@ -276,12 +499,49 @@ class Game(object):
                 self.sprite_def["RESTART"],
                 self.dimensions
             )
-        else:
-            self.game_over_panel.draw()
-        if self.distance_ran > self.highest_score:
+        distance = int(math.ceil(self.distance_ran))
+        if self.distance_ran > self.highest_score and ranked:
             self.highest_score = math.ceil(self.distance_ran)
             self.distance_meter.set_high_score(self.highest_score)
-        self.time = pygame.time.get_ticks()
+            if self.capture:
+                self.capture.trigger("%s-%05d" % (
+                    time.strftime("%Y%m%d-%H%M%S"),
+                    self.distance_meter.get_actual_distance(distance)
+                ))
+        death_cause = obstacle.type_config.type if obstacle else None
+        if self.score_store and ranked:
+            self.score_store.add_run(
+                distance,
+                self.distance_meter.get_actual_distance(distance),
+                self.running_time,
+                death_cause,
+                self.horizon.course.seed
+            )
+        if self.telemetry:
+            self.telemetry.end_run(
+                distance=distance,
+                score=self.distance_meter.get_actual_distance(distance),
+                duration=self.running_time,
+                speed=round(self.current_speed, 3),
+                death_cause=death_cause,
+                obstacle_size=obstacle.size if obstacle else None,
+                t_rex_status=t_rex_status,
+                collision=[
+                    [box.x, box.y, box.width, box.height] for box in collision
+                ] if collision else None,
+                seed=self.horizon.course.seed,
+                autopilot=bool(self.autopilot),
+                two_player=bool(self.second_player)
+            )
+        if self.replay:
+            self.replay.distance = distance
+            self.replay.duration = self.running_time
+            self.replay.save("%s-%05d" % (
+                time.strftime("%Y%m%d-%H%M%S"),
+                self.distance_meter.get_actual_distance(distance)
+            ))
+            self.replay = None
+        self.time = self.get_ticks()
 
     def stop(self):
         """
@@ -298,7 +558,7 @@ class Game(object):
             self.playing = True
             self.paused = False
             self.t_rex.update(0, self.t_rex.status["RUNNING"])
-            self.time = pygame.time.get_ticks()
+            self.time = self.get_ticks()
             self.update()
 
     def restart(self):
@@ -310,15 +570,87 @@ class Game(object):
         self.playing = True
         self.crashed = False
         self.distance_ran = 0
-        self.set_speed(self.config["SPEED"])
-        self.time = pygame.time.get_ticks()
+        self.set_speed(self.config.SPEED)
+        self.time = self.get_ticks()
         self.distance_meter.reset()
-        self.horizon.reset()
+        self.horizon.reset(self.course_seed)
         self.t_rex.reset()
-        self.button_press_sound.play()
+        self.start_runners()
+        self.audio.play("BUTTON_PRESS", self.input_time)
         self.invert(True)
         self.update()
 
+    def get_state(self):
+        """
+        Return the state of a run in progress, including the random state.
+        """
+        state = dict((name, getattr(self, name)) for name in STATE_ATTRIBUTES)
+        state["random"] = random.getstate()
+        state["t_rex"] = self.t_rex.get_state()
+        state["horizon"] = self.horizon.get_state()
+        state["distance_meter"] = self.distance_meter.get_state()
+        return state
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state and carry on playing, without
+        the intro. The resumed run is not recorded as a replay.
+        """
+        for name in STATE_ATTRIBUTES:
+            setattr(self, name, state[name])
+        self.t_rex.set_state(state["t_rex"])
+        self.horizon.set_state(state["horizon"])
+        self.distance_meter.set_state(state["distance_meter"])
+        random.setstate(state["random"])
+        self.replay = None
+        self.playing = True
+        self.playing_intro = False
+        self.crashed = False
+        self.paused = False
+        self.time = self.get_ticks()
+
+    def resume(self):
+        """
+        Restore the run saved at the last quit, if any. The save is removed,
+        so it is resumed only once. A run is not resumed while racing ghosts
+        or a second player, as it has neither, or by the autopilot, which
+        would finish the player's run; the save is kept for a later start.
+        Returns whether a run was resumed.
+        """
+        if not self.save_state or self.runners or self.autopilot:
+            return False
+        state = self.save_state.load()
+        self.save_state.clear()
+        if state is None:
+            return False
+        self.set_state(state)
+        return True
+
+    def quit(self):
+        """
+        Save a player's run in progress, report the input and audio latency
+        and the autopilot budget, finish writing the scores and telemetry and
+        exit. Autopilot and two-player runs are not saved, as a resumed run
+        is recorded as a player's run.
+        """
+        if (
+                self.save_state and self.playing and not self.crashed and
+                not (self.autopilot or self.second_player)
+        ):
+            self.save_state.save(self.get_state())
+        if self.score_store:
+            self.score_store.close()
+        if self.telemetry:
+            self.telemetry.close()
+        if self.capture:
+            self.capture.close()
+        self.controls.report()
+        self.audio.report()
+        if self.autopilot:
+            self.autopilot.report()
+        pygame.quit()
+        sys.exit(0)
+
     def invert(self, reset=None):
         """
         Inverts the screen colors.
@@ -329,66 +661,189 @@ class Game(object):
         else:
             self.inverted = self.invert_trigger
 
-    def check_for_collision(self, obstacle):
+    def check_for_collision(self, obstacle, t_rex=None):
         """
-        Check for a collision.
+        Check for a collision of the t-rex, or of a simulated copy of it.
         """
-        obstacle_box = SCREEN_WIDTH + obstacle.x_pos
-        t_rex_box = CollisionBox(
-            self.t_rex.x_pos + 1,
-            self.t_rex.y_pos + 1,
-            self.t_rex.config["WIDTH"] - 2,
-            self.t_rex.config["HEIGHT"] - 2
-        )
-        obstacle_box = CollisionBox(
-            obstacle.x_pos + 1,
-            obstacle.y_pos + 1,
-            obstacle.type_config["width"] * obstacle.size - 2,
-            obstacle.type_config["height"] - 2
-        )
-        if box_compare(t_rex_box, obstacle_box):
-            collision_boxes = obstacle.collision_boxes
-            t_rex_collision_boxes = (self.t_rex.collision_boxes["DUCKING"]
-                                     if self.t_rex.ducking
-                                     else self.t_rex.collision_boxes["RUNNING"])
-            for _, t_rex_collision_box in enumerate(t_rex_collision_boxes):
-                for _, collision_box in enumerate(collision_boxes):
-                    adj_t_rex_box = create_adjusted_collision_box(
-                        t_rex_collision_box,
-                        t_rex_box
-                    )
-                    adj_obstacle_box = create_adjusted_collision_box(
-                        collision_box,
-                        obstacle_box
-                    )
-                    crashed = box_compare(adj_t_rex_box, adj_obstacle_box)
-                    if crashed:
-                        return [adj_t_rex_box, adj_obstacle_box]
-        return False
+        return check_obstacle_collision(t_rex or self.t_rex, obstacle)
 
-def create_adjusted_collision_box(box, adjustment):
+def parse_size(value):
     """
-    Adjust the collision box.
+    Parse a WIDTHxHEIGHT command line value.
     """
-    return CollisionBox(
-        box.x + adjustment.x,
-        box.y + adjustment.y,
-        box.width,
-        box.height
-    )
+    try:
+        width, height = [int(part) for part in value.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid size: %s" % value)
+    if width < 1 or height < 1:
+        raise argparse.ArgumentTypeError("invalid size: %s" % value)
+    return width, height
 
-def box_compare(t_rex_box, obstacle_box):
+def main():
     """
-    Compare two collision boxes for a collision.
+    Set up the display and the sprite atlas, then run the game. The mixer is
+    started by the game loop after the first frame. Assets are read from the
+    asset bundle when it has been built. A run saved at the last quit is
+    resumed.
     """
-    crashed = False
-    if (
-            t_rex_box.x < obstacle_box.x + obstacle_box.width and
-            t_rex_box.x + t_rex_box.width > obstacle_box.x and
-            t_rex_box.y < obstacle_box.y + obstacle_box.height and
-            t_rex_box.y + t_rex_box.height > obstacle_box.y
-    ):
-        crashed = True
-    return crashed
+    parser = argparse.ArgumentParser(description="T-Rex Runner")
+    parser.add_argument(
+        "--audio-mode",
+        choices=sorted(AUDIO_MODES),
+        default="default",
+        help="mixer settings; low-latency uses a small mono buffer"
+    )
+    parser.add_argument(
+        "--bind",
+        action="append",
+        default=[],
+        metavar="ACTION=INPUT[,INPUT]",
+        help="bind keys (pygame key names), BUTTON_<n> or HAT_<direction> "
+             "to JUMP, DUCK, START, QUIT, CAPTURE, JUMP_2 or DUCK_2"
+    )
+    parser.add_argument(
+        "--render-size",
+        type=parse_size,
+        metavar="WIDTHxHEIGHT",
+        help="draw at a lower resolution, e.g. 320x240, and scale the frame "
+             "to the screen"
+    )
+    parser.add_argument(
+        "--screen-size",
+        type=parse_size,
+        default=(SCREEN_WIDTH, SCREEN_HEIGHT),
+        metavar="WIDTHxHEIGHT",
+        help="display size"
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        help="integer sprite scale; by default the largest that fits the "
+             "600x150 game"
+    )
+    parser.add_argument(
+        "--target-fps",
+        type=int,
+        choices=[FPS, FPS // 2],
+        default=FPS,
+        help="highest render rate; frames are skipped below it when the "
+             "device cannot keep up"
+    )
+    parser.add_argument(
+        "--capture",
+        choices=CAPTURE_FORMATS,
+        help="keep the last seconds of play and save them as a PNG sequence "
+             "or a GIF (needs Pillow) after a new high score"
+    )
+    parser.add_argument(
+        "--capture-seconds",
+        type=int,
+        default=4,
+        help="seconds of play kept for a capture"
+    )
+    parser.add_argument(
+        "--no-telemetry",
+        action="store_true",
+        help="do not log runs to telemetry.jsonl"
+    )
+    parser.add_argument(
+        "--autopilot",
+        action="store_true",
+        help="let the game play itself, as a demo"
+    )
+    parser.add_argument(
+        "--policy",
+        metavar="FILE",
+        help="let the game play itself following a policy trained by train.py"
+    )
+    parser.add_argument(
+        "--ghost",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="race the ghost of a replay saved with --save-replays, on its "
+             "course; may be given several times for replays of one course"
+    )
+    parser.add_argument(
+        "--save-replays",
+        action="store_true",
+        help="save every run to replays/ to race it as a ghost later"
+    )
+    parser.add_argument(
+        "--two-player",
+        action="store_true",
+        help="race a second player on the same course; player 1 jumps and "
+             "ducks with the arrows, player 2 with A and B"
+    )
+    parser.add_argument(
+        "--config",
+        metavar="FILE",
+        help="read tuning values from a JSON file instead of config.json"
+    )
+    args = parser.parse_args()
+    try:
+        load_config(args.config)
+    except (IOError, OSError, ValueError) as error:
+        parser.error("invalid config %s: %s" % (args.config or "config.json", error))
+    bindings = dict(DEFAULT_BINDINGS)
+    if args.two_player:
+        bindings.update(TWO_PLAYER_BINDINGS)
+    for binding in args.bind:
+        action, _, names = binding.partition("=")
+        if action.upper() not in DEFAULT_BINDINGS or not names:
+            parser.error("invalid binding: %s" % binding)
+        bindings[action.upper()] = names.split(",")
+    startup_timer = StartupTimer()
+    pygame.display.init()
+    pygame.font.init()
+    display = pygame.display.set_mode(args.screen_size)
+    pygame.display.set_caption("T-Rex Runner")
+    try:
+        controls = Controls(bindings)
+    except ValueError as error:
+        parser.error(str(error))
+    policy = None
+    if args.policy:
+        try:
+            policy = Policy.load(args.policy)
+        except (IOError, OSError, ValueError, KeyError, TypeError) as error:
+            parser.error("invalid policy %s: %s" % (args.policy, error))
+    ghosts = []
+    for path in args.ghost:
+        try:
+            ghosts.append(Replay.load(path))
+        except (IOError, OSError, ValueError, KeyError, TypeError) as error:
+            parser.error("invalid replay %s: %s" % (path, error))
+    if len(set(replay.seed for replay in ghosts)) > 1:
+        parser.error("ghost replays must be of the same course")
+    render_target = RenderTarget(display, args.render_size, args.scale)
+    startup_timer.mark("display")
+    bundle = AssetBundle.open()
+    Sprite.load(bundle, render_target.scale)
+    startup_timer.mark("atlas")
+    audio = Audio(SOUND_FILES, bundle, args.audio_mode)
+    game = Game(
+        render_target,
+        audio,
+        controls,
+        args.target_fps,
+        ScoreStore.open(),
+        SaveState(),
+        None if args.no_telemetry else Telemetry(),
+        FrameCapture(
+            render_target.canvas,
+            args.capture_seconds,
+            capture_format=args.capture
+        ) if args.capture else None,
+        args.autopilot,
+        policy,
+        ghosts,
+        args.save_replays,
+        args.two_player
+    )
+    game.resume()
+    startup_timer.mark("game")
+    game.run(startup_timer)
 
-Game()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+This module provides the compiled game configuration.
+
+Tuning values are read once from an optional JSON file over the defaults
+below, validated, and compiled into read-only namedtuples, one per section,
+together with the sprite geometry and the values derived from them. Objects
+read their section when they are created, and the per-frame code reads
+attributes instead of looking up dict keys.
+"""
+
+import collections
+import json
+import math
+import numbers
+import os
+
+from constants import FPS
+
+CONFIG_FILE = "config.json"
+
+DEFAULTS = {
+    "game": {
+        "ACCELERATION": 0.001,
+        "CLEAR_TIME": 3000,
+        "GAMEOVER_CLEAR_TIME": 750,
+        "GAP_COEFFICIENT": 0.6,
+        "INVERT_DISTANCE": 700,
+        "INVERT_FADE_DURATION": 12000,
+        "JUMP_TABLES": False,
+        "MAX_BLINK_COUNT": 3,
+        "MAX_SPEED": 13,
+        "SPEED": 6
+    },
+    "t_rex": {
+        "DROP_VELOCITY": -5,
+        "GRAVITY": 0.6,
+        "INITIAL_JUMP_VELOCITY": -10,
+        "MAX_JUMP_HEIGHT": 30,
+        "MIN_JUMP_HEIGHT": 30,
+        "SPEED_DROP_COEFFICIENT": 3
+    },
+    "horizon": {
+        "BG_CLOUD_SPEED": 0.2,
+        "CLOUD_FREQUENCY": 0.5,
+        "MAX_CLOUDS": 6
+    },
+    "cloud": {
+        "MAX_CLOUD_GAP": 400,
+        "MIN_CLOUD_GAP": 100
+    },
+    "night_mode": {
+        "FADE_SPEED": 0.035,
+        "MOON_SPEED": 0.25,
+        "NUM_STARS": 2,
+        "STAR_SPEED": 0.3
+    },
+    "distance_meter": {
+        "ACHIEVEMENT_DISTANCE": 100,
+        "COEFFICIENT": 0.025,
+        "FLASH_DURATION": 250,
+        "FLASH_ITERATIONS": 3,
+        "MAX_DISTANCE_UNITS": 5
+    },
+    "obstacles": {
+        "MAX_GAP_COEFFICIENT": 1.5,
+        "MAX_OBSTACLE_DUPLICATION": 2,
+        "MAX_OBSTACLE_LENGTH": 3
+    },
+    "cactus_small": {
+        "MIN_GAP": 120,
+        "MIN_SPEED": 0,
+        "MULTIPLE_SPEED": 4
+    },
+    "cactus_large": {
+        "MIN_GAP": 120,
+        "MIN_SPEED": 0,
+        "MULTIPLE_SPEED": 7
+    },
+    "pterodactyl": {
+        "FRAME_RATE": 1000 / 6,
+        "MIN_GAP": 150,
+        "MIN_SPEED": 8.5,
+        "MULTIPLE_SPEED": 999,
+        "SPEED_OFFSET": 0.8
+    }
+}
+
+# Sprite geometry, which depends on the atlas and is not read from the file.
+FIXED = {
+    "t_rex": {
+        "HEIGHT": 47,
+        "HEIGHT_DUCK": 25,
+        "INTRO_DURATION": 1500,
+        "SPRITE_WIDTH": 262,
+        "START_X_POS": 50,
+        "WIDTH": 44,
+        "WIDTH_DUCK": 59
+    },
+    "horizon": {
+        "HORIZON_HEIGHT": 16
+    },
+    "cloud": {
+        "HEIGHT": 14,
+        "MAX_SKY_OFFSET": 30,
+        "MIN_SKY_OFFSET": 71,
+        "WIDTH": 46
+    },
+    "night_mode": {
+        "HEIGHT": 40,
+        "STAR_MAX_Y": 70,
+        "STAR_SIZE": 9,
+        "WIDTH": 20
+    }
+}
+
+WHOLE_NUMBERS = set([
+    "MAX_BLINK_COUNT", "MAX_CLOUDS", "MAX_CLOUD_GAP", "MIN_CLOUD_GAP", "NUM_STARS",
+    "ACHIEVEMENT_DISTANCE", "FLASH_ITERATIONS", "MAX_DISTANCE_UNITS", "INVERT_DISTANCE",
+    "MAX_OBSTACLE_DUPLICATION", "MAX_OBSTACLE_LENGTH"
+])
+NEGATIVE = set(["DROP_VELOCITY", "INITIAL_JUMP_VELOCITY"])
+
+# Longest and highest jump allowed, so jump arcs stay short and on screen.
+MAX_JUMP_FRAMES = 300
+MAX_JUMP_RISE = 1000
+
+def derive(section, values):
+    """
+    Return the values derived from the values of a section.
+    """
+    if section == "game":
+        return {
+            "MS_PER_FRAME": 1000 / FPS,
+            "PIXELS_PER_MS": FPS / 1000.0
+        }
+    if section == "horizon":
+        return {"CLOUD_SPEED_PER_MS": values["BG_CLOUD_SPEED"] / 1000.0}
+    return {}
+
+def get_section_name(section):
+    """
+    Return the class name of the compiled form of a section.
+    """
+    return "".join(part.title() for part in section.split("_")) + "Config"
+
+SECTION_TYPES = dict(
+    (section, collections.namedtuple(
+        get_section_name(section),
+        sorted(set(values) | set(FIXED.get(section, {})) | set(derive(section, values)))
+    ))
+    for section, values in DEFAULTS.items()
+)
+Config = collections.namedtuple("Config", sorted(DEFAULTS))
+
+def check_value(section, name, value):
+    """
+    Raise ValueError if a value from the file is not of the kind its
+    default is, or out of range.
+    """
+    default = DEFAULTS[section][name]
+    label = "%s.%s" % (section, name)
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError("%s must be true or false" % label)
+        return
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        raise ValueError("%s must be a number" % label)
+    if math.isinf(value) or math.isnan(value):
+        raise ValueError("%s must be a finite number" % label)
+    if name in WHOLE_NUMBERS and value != int(value):
+        raise ValueError("%s must be a whole number" % label)
+    if name in NEGATIVE:
+        if value >= 0:
+            raise ValueError("%s must be negative" % label)
+    elif value < 0:
+        raise ValueError("%s must not be negative" % label)
+
+def check_config(values):
+    """
+    Raise ValueError if merged values do not make a playable game.
+    """
+    checks = [
+        (values["game"]["SPEED"] > 0, "game.SPEED must be above 0"),
+        (values["game"]["SPEED"] <= values["game"]["MAX_SPEED"],
+         "game.SPEED must not be above game.MAX_SPEED"),
+        (values["game"]["INVERT_DISTANCE"] > 0, "game.INVERT_DISTANCE must be above 0"),
+        (values["cloud"]["MIN_CLOUD_GAP"] <= values["cloud"]["MAX_CLOUD_GAP"],
+         "cloud.MIN_CLOUD_GAP must not be above cloud.MAX_CLOUD_GAP"),
+        (values["night_mode"]["NUM_STARS"] > 0, "night_mode.NUM_STARS must be above 0"),
+        (values["distance_meter"]["MAX_DISTANCE_UNITS"] > 0,
+         "distance_meter.MAX_DISTANCE_UNITS must be above 0"),
+        (values["distance_meter"]["ACHIEVEMENT_DISTANCE"] > 0,
+         "distance_meter.ACHIEVEMENT_DISTANCE must be above 0"),
+        (values["obstacles"]["MAX_GAP_COEFFICIENT"] >= 1,
+         "obstacles.MAX_GAP_COEFFICIENT must be at least 1"),
+        (values["obstacles"]["MAX_OBSTACLE_DUPLICATION"] > 0,
+         "obstacles.MAX_OBSTACLE_DUPLICATION must be above 0"),
+        (values["obstacles"]["MAX_OBSTACLE_LENGTH"] > 0,
+         "obstacles.MAX_OBSTACLE_LENGTH must be above 0"),
+        (values["pterodactyl"]["FRAME_RATE"] > 0, "pterodactyl.FRAME_RATE must be above 0"),
+        (values["t_rex"]["GRAVITY"] > 0, "t_rex.GRAVITY must be above 0"),
+        (values["t_rex"]["SPEED_DROP_COEFFICIENT"] >= 1,
+         "t_rex.SPEED_DROP_COEFFICIENT must be at least 1"),
+        (values["t_rex"]["INITIAL_JUMP_VELOCITY"] < values["t_rex"]["DROP_VELOCITY"],
+         "t_rex.INITIAL_JUMP_VELOCITY must be below t_rex.DROP_VELOCITY")
+    ]
+    for passed, message in checks:
+        if not passed:
+            raise ValueError(message)
+    check_jump(values["t_rex"], values["game"]["MAX_SPEED"])
+
+def check_jump(t_rex, max_speed):
+    """
+    Raise ValueError if a full jump at the top speed, the longest and
+    highest one, would not land within MAX_JUMP_FRAMES or would rise more
+    than MAX_JUMP_RISE pixels. Only called once GRAVITY is known to be
+    positive, so every jump comes back down.
+    """
+    velocity = -(t_rex["INITIAL_JUMP_VELOCITY"] - float(max_speed) / 10)
+    if 2 * velocity / t_rex["GRAVITY"] > MAX_JUMP_FRAMES:
+        raise ValueError(
+            "a jump would last over %d frames: raise t_rex.GRAVITY or bring "
+            "t_rex.INITIAL_JUMP_VELOCITY closer to 0" % MAX_JUMP_FRAMES
+        )
+    if velocity * velocity / (2 * t_rex["GRAVITY"]) > MAX_JUMP_RISE:
+        raise ValueError(
+            "a jump would rise over %d pixels: raise t_rex.GRAVITY or bring "
+            "t_rex.INITIAL_JUMP_VELOCITY closer to 0" % MAX_JUMP_RISE
+        )
+
+def compile_config(overrides=None):
+    """
+    Validate values read from a config file, as a dict of sections of
+    values, merge them over the defaults and return the compiled
+    configuration. Raises ValueError for an unknown or invalid value.
+    """
+    values = dict((section, dict(defaults)) for section, defaults in DEFAULTS.items())
+    if overrides is None:
+        overrides = {}
+    if not isinstance(overrides, dict):
+        raise ValueError("the config must be an object of sections")
+    for section, section_values in overrides.items():
+        if section not in DEFAULTS:
+            raise ValueError("unknown config section %s" % section)
+        if not isinstance(section_values, dict):
+            raise ValueError("config section %s must be an object" % section)
+        for name, value in section_values.items():
+            if name not in DEFAULTS[section]:
+                raise ValueError("unknown config value %s.%s" % (section, name))
+            check_value(section, name, value)
+            values[section][name] = int(value) if name in WHOLE_NUMBERS else value
+    check_config(values)
+    sections = {}
+    for section, section_values in values.items():
+        fields = dict(section_values)
+        fields.update(FIXED.get(section, {}))
+        fields.update(derive(section, section_values))
+        sections[section] = SECTION_TYPES[section](**fields)
+    return Config(**sections)
+
+CONFIG = None
+
+def get_config():
+    """
+    Return the current configuration: the defaults until load_config is
+    called.
+    """
+    global CONFIG
+    if CONFIG is None:
+        CONFIG = compile_config()
+    return CONFIG
+
+def load_config(path=None):
+    """
+    Compile a config file and make it the current configuration, used by
+    the objects created from then on. Without a path, CONFIG_FILE is read
+    if it exists. Returns the configuration. Raises ValueError for an
+    invalid file and IOError if a given file cannot be read.
+    """
+    global CONFIG
+    overrides = None
+    if path is not None or os.path.exists(CONFIG_FILE):
+        with open(path or CONFIG_FILE) as config_file:
+            overrides = json.load(config_file)
+    CONFIG = compile_config(overrides)
+    return CONFIG
@@ -29,7 +29,7 @@ class GameOverPanel(object):
         }
         self.image_sprite = Sprite.image
         self.image_sprite.set_colorkey((152, 152, 152))
-        self.draw()
+        self.font = pygame.font.Font(None, 24 * screen_dimensions.get("SCALE", 1))
 
     def update_dimensions(self, width, opt_height):
         """
@@ -67,6 +67,5 @@ class GameOverPanel(object):
             text_target_height
         )
         self.screen.blit(self.image_sprite, destination_rect, sprite_position)
-        font = pygame.font.Font(None, 24)
-        text_surface = font.render("Press START to play again", True, (0, 0, 0))
+        text_surface = self.font.render("Press START to play again", True, (0, 0, 0))
         self.screen.blit(text_surface, (5, 5))
@@ -0,0 +1,37 @@
+"""
+This module provides the class Ghost.
+"""
+
+from runner import Runner
+
+GHOST_ALPHA = 96
+
+class Ghost(Runner):
+    """
+    A runner replaying a recorded run on the live course. Its key events are
+    applied at the run times they were recorded.
+    """
+    def __init__(self, screen, sprite_pos, dimensions, replay):
+        """
+        Initialize the ghost of a replay.
+        """
+        Runner.__init__(self, screen, sprite_pos, dimensions, GHOST_ALPHA)
+        self.replay = replay
+        self.event_index = 0
+
+    def reset(self):
+        """
+        Start the replay again.
+        """
+        Runner.reset(self)
+        self.event_index = 0
+
+    def play(self, running_time, speed):
+        """
+        Apply the events recorded before the run time.
+        """
+        events = self.replay.events
+        while self.event_index < len(events) and events[self.event_index][0] < running_time:
+            _, action, pressed = events[self.event_index]
+            self.press(action, pressed, speed)
+            self.event_index += 1
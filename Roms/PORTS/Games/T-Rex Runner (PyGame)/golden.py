@@ -0,0 +1,341 @@
+"""
+Golden-image check for the renderer.
+
+Fixed scenes are drawn headless at every sprite scale: the t-rex in each
+animation frame, every obstacle size and pterodactyl frame, the moon phases
+and star fade, the distance meter with and without the score flash, a
+seeded course at set frames, and a seeded game drawn by Game.draw at set
+frames of a clock the game is given. Each frame is hashed and compared with the
+hashes of the golden images in golden/. On a mismatch the rendered frame and
+a difference mask (black where pixels differ) are written to golden/diff/.
+Run it before and after a rendering change to prove the output is
+pixel-identical; update the goldens only for intended changes.
+
+Usage:
+    python golden.py
+    python golden.py --update
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+
+import pygame
+
+from audio import Audio, SOUND_FILES
+from controls import Controls
+from course import ObstacleRecord, SpeedCurve
+from distance_meter import DistanceMeter
+from game import Game, SPRITE_DEFINITION
+from game_config import get_config
+from horizon import Horizon, get_obstacle_types
+from night_mode import NightMode
+from obstacle import Obstacle
+from scaled_surface import ScaledSurface
+from sprite import Sprite
+from t_rex import TRex
+
+from constants import FPS
+
+GOLDEN_DIRECTORY = "golden"
+DIFF_DIRECTORY = os.path.join(GOLDEN_DIRECTORY, "diff")
+HASH_FILE = os.path.join(GOLDEN_DIRECTORY, "hashes.json")
+SCALES = [1, 2]
+SCENE_WIDTH = 600
+SCENE_HEIGHT = 150
+DIMENSIONS = {"WIDTH": SCENE_WIDTH, "HEIGHT": SCENE_HEIGHT}
+COURSE_SEED = 1
+COURSE_FRAMES = [200, 400, 600, 800]
+COURSE_NIGHT_FRAME = 700
+GAME_FRAMES = [150, 260]
+FRAME_TIME = 17
+
+def draw_t_rex(surface, dimensions):
+    """
+    Draw the t-rex in every animation frame of every status.
+    """
+    t_rex = TRex(surface, SPRITE_DEFINITION["TREX"], dimensions)
+    x_pos = 10
+    for status in ["RUNNING", "JUMPING", "CRASHED", "DUCKING", "WAITING"]:
+        t_rex.update(0, status)
+        t_rex.ducking = status == "DUCKING"
+        for frame in t_rex.current_anim_frames:
+            t_rex.x_pos = x_pos
+            t_rex.draw(frame, 0)
+            x_pos += t_rex.config.WIDTH_DUCK + 6 if t_rex.ducking else t_rex.config.WIDTH + 6
+
+def draw_obstacles(surface, dimensions):
+    """
+    Draw the cacti in every size and the pterodactyl in both frames, at
+    each of its heights.
+    """
+    x_pos = 10
+    for obstacle_type in get_obstacle_types(dimensions["HEIGHT"]):
+        if isinstance(obstacle_type.y_pos, tuple):
+            poses = [(1, frame, y_pos)
+                     for frame in range(obstacle_type.num_frames)
+                     for y_pos in obstacle_type.y_pos]
+        else:
+            poses = [(size, 0, obstacle_type.y_pos) for size in range(1, 4)]
+        for size, frame, y_pos in poses:
+            obstacle = Obstacle(
+                surface,
+                obstacle_type,
+                SPRITE_DEFINITION[obstacle_type.type],
+                dimensions,
+                ObstacleRecord(obstacle_type.type, size, y_pos, 0, 0, 0),
+                0
+            )
+            obstacle.x_pos = x_pos
+            obstacle.current_frame = frame
+            obstacle.draw()
+            x_pos += obstacle.width + 4
+
+def draw_night_phases(surface, dimensions):
+    """
+    Draw every moon phase at full opacity, with the stars.
+    """
+    random.seed(COURSE_SEED)
+    night_mode = NightMode(surface, SPRITE_DEFINITION["MOON"], SPRITE_DEFINITION["STAR"], dimensions)
+    night_mode.opacity = 1
+    for phase in range(len(night_mode.phases)):
+        night_mode.draw_stars = phase == 0
+        night_mode.current_phase = phase
+        night_mode.x_pos = 20 + phase * 80
+        night_mode.draw()
+
+def draw_night_fade(surface, dimensions):
+    """
+    Draw the moon and stars half faded in.
+    """
+    random.seed(COURSE_SEED)
+    night_mode = NightMode(surface, SPRITE_DEFINITION["MOON"], SPRITE_DEFINITION["STAR"], dimensions)
+    night_mode.opacity = 0.5
+    night_mode.draw_stars = True
+    night_mode.draw()
+
+def draw_distance_meter(surface, dimensions):
+    """
+    Draw a distance and the high score.
+    """
+    distance_meter = DistanceMeter(surface, SPRITE_DEFINITION["TEXT_SPRITE"], dimensions["WIDTH"])
+    distance_meter.set_high_score(12345)
+    distance_meter.update(0, 4920)
+    distance_meter.render()
+
+def draw_distance_meter_flash(surface, dimensions):
+    """
+    Draw the distance meter while a reached score flashes off.
+    """
+    distance_meter = DistanceMeter(surface, SPRITE_DEFINITION["TEXT_SPRITE"], dimensions["WIDTH"])
+    distance_meter.set_high_score(12345)
+    distance_meter.update(0, 4000)
+    distance_meter.update(FRAME_TIME, 4000)
+    distance_meter.render()
+
+def get_course_scenes():
+    """
+    Return scenes drawing a seeded course, run at a fixed frame time, at
+    each of COURSE_FRAMES.
+    """
+    def draw_course(surface, dimensions, frame_count):
+        """
+        Run the course for frame_count frames and draw it like the game.
+        """
+        config = get_config().game
+        random.seed(COURSE_SEED)
+        horizon = Horizon(
+            surface,
+            SPRITE_DEFINITION,
+            dimensions,
+            config.GAP_COEFFICIENT,
+            SpeedCurve(config.SPEED, config.ACCELERATION, config.MAX_SPEED, config.CLEAR_TIME),
+            COURSE_SEED
+        )
+        t_rex = TRex(surface, SPRITE_DEFINITION["TREX"], dimensions)
+        t_rex.update(0, t_rex.status["RUNNING"])
+        distance_meter = DistanceMeter(surface, SPRITE_DEFINITION["TEXT_SPRITE"], dimensions["WIDTH"])
+        speed = config.SPEED
+        distance = 0
+        for frame in range(frame_count):
+            horizon.update(
+                FRAME_TIME,
+                speed,
+                (frame + 1) * FRAME_TIME > config.CLEAR_TIME,
+                frame >= COURSE_NIGHT_FRAME
+            )
+            t_rex.update(FRAME_TIME)
+            distance += speed * FRAME_TIME * FPS / 1000.0
+            distance_meter.update(FRAME_TIME, distance)
+            speed += config.ACCELERATION
+        horizon.draw()
+        distance_meter.render()
+        t_rex.render()
+
+    return [
+        ("course-%04d" % frame_count,
+         lambda surface, dimensions, frame_count=frame_count:
+         draw_course(surface, dimensions, frame_count))
+        for frame_count in COURSE_FRAMES
+    ]
+
+class SceneClock(object):
+    """
+    Clock a scene's game reads its time from, moved on by hand.
+    """
+    def __init__(self):
+        """
+        Start the clock at 0.
+        """
+        self.ticks = 0
+
+    def get_ticks(self):
+        """
+        Return the milliseconds on the clock.
+        """
+        return self.ticks
+
+class SceneTarget(object):
+    """
+    Render target drawing a game into a scene surface.
+    """
+    def __init__(self, surface, dimensions):
+        """
+        Wrap a scene surface and its dimensions.
+        """
+        self.surface = surface
+        self.dimensions = dimensions
+
+    def get_dimensions(self):
+        """
+        Return the dimensions the game is laid out in.
+        """
+        return self.dimensions
+
+def get_game_scenes():
+    """
+    Return scenes drawing a seeded game, started with START and left to
+    run, with Game.draw at each of GAME_FRAMES of a clock moved on by
+    FRAME_TIME per frame.
+    """
+    def draw_game(surface, dimensions, frame_count):
+        """
+        Run the game for frame_count frames and draw it.
+        """
+        random.seed(COURSE_SEED)
+        clock = SceneClock()
+        game = Game(
+            SceneTarget(surface, dimensions),
+            Audio(SOUND_FILES),
+            Controls(),
+            get_ticks=clock.get_ticks
+        )
+        game.on_action_down("START")
+        for _ in range(frame_count):
+            clock.ticks += FRAME_TIME
+            game.update()
+        game.draw()
+
+    return [
+        ("game-%04d" % frame_count,
+         lambda surface, dimensions, frame_count=frame_count:
+         draw_game(surface, dimensions, frame_count))
+        for frame_count in GAME_FRAMES
+    ]
+
+SCENES = [
+    ("t_rex", draw_t_rex),
+    ("obstacles", draw_obstacles),
+    ("night_phases", draw_night_phases),
+    ("night_fade", draw_night_fade),
+    ("distance_meter", draw_distance_meter),
+    ("distance_meter_flash", draw_distance_meter_flash)
+] + get_course_scenes() + get_game_scenes()
+
+def render_scene(draw, scale):
+    """
+    Return a canvas with a scene drawn at a sprite scale.
+    """
+    canvas = pygame.Surface((SCENE_WIDTH * scale, SCENE_HEIGHT * scale)).convert()
+    canvas.fill((247, 247, 247))
+    surface = ScaledSurface(canvas, scale) if scale > 1 else canvas
+    dimensions = dict(DIMENSIONS, SCALE=scale)
+    draw(surface, dimensions)
+    return canvas
+
+def hash_surface(surface):
+    """
+    Return a hash of the RGB pixels of a surface.
+    """
+    return hashlib.sha1(pygame.image.tostring(surface, "RGB")).hexdigest()
+
+def write_diff(name, canvas):
+    """
+    Write the rendered frame and a mask of the pixels that differ from the
+    golden image. Returns the number of differing pixels, or None if there
+    is no golden image of the same size.
+    """
+    if not os.path.isdir(DIFF_DIRECTORY):
+        os.makedirs(DIFF_DIRECTORY)
+    pygame.image.save(canvas, os.path.join(DIFF_DIRECTORY, name + ".png"))
+    golden_path = os.path.join(GOLDEN_DIRECTORY, name + ".png")
+    if not os.path.exists(golden_path):
+        return None
+    golden = pygame.image.load(golden_path).convert()
+    if golden.get_size() != canvas.get_size():
+        return None
+    mask = pygame.PixelArray(canvas).compare(pygame.PixelArray(golden)).make_surface()
+    pygame.image.save(mask, os.path.join(DIFF_DIRECTORY, name + "-mask.png"))
+    return pygame.mask.from_threshold(mask, (0, 0, 0), (1, 1, 1, 255)).count()
+
+def main():
+    """
+    Render the scenes and compare them with the goldens, or update them.
+    """
+    parser = argparse.ArgumentParser(description="Compare rendered scenes with golden images.")
+    parser.add_argument("--update", action="store_true", help="write new golden images")
+    args = parser.parse_args()
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((1, 1))
+    hashes = {}
+    if os.path.exists(HASH_FILE):
+        with open(HASH_FILE) as hash_file:
+            hashes = json.load(hash_file)
+    failures = 0
+    for scale in SCALES:
+        Sprite.image = None
+        Sprite.load(None, scale)
+        for scene_name, draw in SCENES:
+            name = "%s-%dx" % (scene_name, scale)
+            canvas = render_scene(draw, scale)
+            frame_hash = hash_surface(canvas)
+            if args.update:
+                if not os.path.isdir(GOLDEN_DIRECTORY):
+                    os.makedirs(GOLDEN_DIRECTORY)
+                pygame.image.save(canvas, os.path.join(GOLDEN_DIRECTORY, name + ".png"))
+                hashes[name] = frame_hash
+                print("updated %s" % name)
+            elif hashes.get(name) == frame_hash:
+                print("ok       %s" % name)
+            else:
+                failures += 1
+                count = write_diff(name, canvas)
+                print("MISMATCH %s: %s pixels differ, see %s" % (
+                    name,
+                    "?" if count is None else count,
+                    DIFF_DIRECTORY
+                ))
+    if args.update:
+        with open(HASH_FILE, "w") as hash_file:
+            json.dump(hashes, hash_file, indent=1, sort_keys=True)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -2,105 +2,139 @@
 This module provides the class Horizon.
 """
 
+import collections
 import random
 
 from cloud import Cloud
 from collision_box import CollisionBox
+from course import Course, ObstacleRecord
+from game_config import get_config
 from horizon_line import HorizonLine
 from night_mode import NightMode
 from obstacle import Obstacle
+from pool import Pool
+from sky_layer import SkyLayer
 
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, BOTTOM_PAD
+from constants import BOTTOM_PAD
 
-MAX_OBSTACLE_DUPLICATION = 2
+ObstacleType = collections.namedtuple(
+    "ObstacleType",
+    [
+        "type", "width", "height", "y_pos", "multiple_speed", "min_gap", "min_speed",
+        "collision_boxes", "num_frames", "frame_rate", "speed_offset"
+    ]
+)
+
+def get_obstacle_types(height):
+    """
+    Return the obstacle types, placed on the ground of a screen height.
+    """
+    config = get_config()
+    return [
+        ObstacleType(
+            type="CACTUS_SMALL",
+            width=17,
+            height=35,
+            y_pos=height - 35 - BOTTOM_PAD,
+            multiple_speed=config.cactus_small.MULTIPLE_SPEED,
+            min_gap=config.cactus_small.MIN_GAP,
+            min_speed=config.cactus_small.MIN_SPEED,
+            collision_boxes=(
+                CollisionBox(0, 7, 5, 27),
+                CollisionBox(4, 0, 6, 34),
+                CollisionBox(10, 4, 7, 14)
+            ),
+            num_frames=None,
+            frame_rate=None,
+            speed_offset=None
+        ),
+        ObstacleType(
+            type="CACTUS_LARGE",
+            width=25,
+            height=50,
+            y_pos=height - 50 - BOTTOM_PAD,
+            multiple_speed=config.cactus_large.MULTIPLE_SPEED,
+            min_gap=config.cactus_large.MIN_GAP,
+            min_speed=config.cactus_large.MIN_SPEED,
+            collision_boxes=(
+                CollisionBox(0, 12, 7, 38),
+                CollisionBox(8, 0, 7, 49),
+                CollisionBox(13, 10, 10, 38)
+            ),
+            num_frames=None,
+            frame_rate=None,
+            speed_offset=None
+        ),
+        ObstacleType(
+            type="PTERODACTYL",
+            width=46,
+            height=40,
+            y_pos=(height - 50, height - 75, height - 100),
+            multiple_speed=config.pterodactyl.MULTIPLE_SPEED,
+            min_gap=config.pterodactyl.MIN_GAP,
+            min_speed=config.pterodactyl.MIN_SPEED,
+            collision_boxes=(
+                CollisionBox(15, 15, 16, 5),
+                CollisionBox(18, 21, 24, 6),
+                CollisionBox(2, 14, 4, 3),
+                CollisionBox(6, 10, 4, 7),
+                CollisionBox(10, 8, 6, 9)
+            ),
+            num_frames=2,
+            frame_rate=config.pterodactyl.FRAME_RATE,
+            speed_offset=config.pterodactyl.SPEED_OFFSET
+        )
+    ]
 
 class Horizon(object):
     """
     Horizon background class.
     """
-    def __init__(self, screen, sprite_pos, dimensions, gap_coefficient):
+    def __init__(self, screen, sprite_pos, dimensions, gap_coefficient, speed_curve, seed=None):
         """
         Initialise the horizon. Just add the line and a cloud. No obstacles.
         """
         self.screen = screen
-        self.config = {
-            "BG_CLOUD_SPEED": 0.2,
-            "CLOUD_FREQUENCY": 0.5,
-            "HORIZON_HEIGHT": 16,
-            "MAX_CLOUDS": 6
-        }
+        self.config = get_config().horizon
         self.dimensions = dimensions
         self.gap_coefficient = gap_coefficient
         self.obstacles = []
-        self.obstacle_history = []
-        self.horizon_offsets = [0, 0]
-        self.cloud_frequency = self.config["CLOUD_FREQUENCY"]
+        self.obstacle_pool = Pool(Obstacle)
+        self.cloud_frequency = self.config.CLOUD_FREQUENCY
         self.sprite_pos = sprite_pos
         self.night_mode = None
         self.clouds = []
-        self.cloud_speed = self.config["BG_CLOUD_SPEED"]
+        self.cloud_pool = Pool(Cloud)
+        self.cloud_layer = None
+        self.cloud_layer_cloud = None
+        self.cloud_layer_x_pos = 0
+        self.cloud_speed = self.config.CLOUD_SPEED_PER_MS
         self.horizon_line = None
         self.running_time = 0
-        self.types = [
-            {
-                "type": "CACTUS_SMALL",
-                "width": 17,
-                "height": 35,
-                "y_pos": SCREEN_HEIGHT - 35 - BOTTOM_PAD,
-                "multiple_speed": 4,
-                "min_gap": 120,
-                "min_speed": 0,
-                "collision_boxes": [
-                    CollisionBox(0, 7, 5, 27),
-                    CollisionBox(4, 0, 6, 34),
-                    CollisionBox(10, 4, 7, 14)
-                ],
-                "num_frames": None,
-                "speed_offset": None
-            },
-            {
-                "type": "CACTUS_LARGE",
-                "width": 25,
-                "height": 50,
-                "y_pos": SCREEN_HEIGHT - 50 - BOTTOM_PAD,
-                "multiple_speed": 7,
-                "min_gap": 120,
-                "min_speed": 0,
-                "collision_boxes": [
-                    CollisionBox(0, 12, 7, 38),
-                    CollisionBox(8, 0, 7, 49),
-                    CollisionBox(13, 10, 10, 38)
-                ],
-                "num_frames": None,
-                "speed_offset": None
-            },
-            {
-                "type": "PTERODACTYL",
-                "width": 46,
-                "height": 40,
-                "y_pos": [SCREEN_HEIGHT - 50, SCREEN_HEIGHT - 75, SCREEN_HEIGHT - 100],
-                "multiple_speed": 999,
-                "min_gap": 150,
-                "min_speed": 8.5,
-                "collision_boxes": [
-                    CollisionBox(15, 15, 16, 5),
-                    CollisionBox(18, 21, 24, 6),
-                    CollisionBox(2, 14, 4, 3),
-                    CollisionBox(6, 10, 4, 7),
-                    CollisionBox(10, 8, 6, 9)
-                ],
-                "num_frames": 2,
-                "frame_rate": 1000 / 6,
-                "speed_offset": 0.8
-            }
-        ]
-        self.add_cloud()
-        self.horizon_line = HorizonLine(self.screen, self.sprite_pos["HORIZON"])
+        self.types = get_obstacle_types(self.dimensions["HEIGHT"])
+        self.course = Course(
+            self.types,
+            self.gap_coefficient,
+            speed_curve,
+            self.dimensions["WIDTH"],
+            seed
+        )
+        self.course.fill()
+        cloud = self.cloud_pool.acquire(self.screen, self.sprite_pos["CLOUD"], self.dimensions)
+        self.cloud_layer = SkyLayer(
+            -cloud.config.WIDTH,
+            cloud.max_sky_level,
+            self.dimensions["WIDTH"] + cloud.config.WIDTH * 2,
+            cloud.min_sky_level - cloud.max_sky_level + cloud.config.HEIGHT,
+            self.dimensions.get("SCALE", 1)
+        )
+        self.clouds.append(cloud)
+        self.horizon_line = HorizonLine(self.screen, self.sprite_pos["HORIZON"], self.dimensions)
         self.night_mode = NightMode(
             self.screen,
             self.sprite_pos["MOON"],
             self.sprite_pos["STAR"],
-            self.dimensions["WIDTH"]
+            self.dimensions
         )
 
     def update(self, delta_time, current_speed, update_obstacles, show_night_mode):
@@ -114,11 +148,36 @@ class Horizon(object):
         if update_obstacles:
             self.update_obstacles(delta_time, current_speed)
 
+    def draw(self):
+        """
+        Draw the horizon line, night mode, clouds and obstacles.
+        """
+        self.horizon_line.draw()
+        self.night_mode.draw()
+        self.draw_clouds()
+        for obstacle in self.obstacles:
+            obstacle.draw()
+
+    def draw_clouds(self):
+        """
+        Draw the clouds. They all move at the same speed, so they are drawn
+        from the cloud layer, which is redrawn when a cloud comes or goes.
+        """
+        if not self.clouds:
+            return
+        if self.cloud_layer.dirty:
+            self.cloud_layer.clear()
+            for cloud in self.clouds:
+                cloud.draw(self.cloud_layer)
+            self.cloud_layer_cloud = self.clouds[0]
+            self.cloud_layer_x_pos = self.cloud_layer_cloud.x_pos
+        self.cloud_layer.draw(self.screen, self.cloud_layer_cloud.x_pos - self.cloud_layer_x_pos)
+
     def update_clouds(self, delta_time, speed):
         """
         Update the cloud positions.
         """
-        cloud_speed = self.cloud_speed / 1000 * delta_time * speed
+        cloud_speed = self.cloud_speed * delta_time * speed
         num_clouds = len(self.clouds)
 
         if num_clouds:
@@ -126,11 +185,15 @@ class Horizon(object):
                 cloud.update(cloud_speed)
             last_cloud = self.clouds[num_clouds - 1]
             if (
-                    num_clouds < self.config["MAX_CLOUDS"] and
+                    num_clouds < self.config.MAX_CLOUDS and
                     (self.dimensions["WIDTH"] - last_cloud.x_pos) > last_cloud.cloud_gap and
                     self.cloud_frequency > random.random()
             ):
                 self.add_cloud()
+            for cloud in self.clouds:
+                if cloud.remove:
+                    self.cloud_pool.release(cloud)
+                    self.cloud_layer.dirty = True
             self.clouds = [obj for obj in self.clouds if not obj.remove]
         else:
             self.add_cloud()
@@ -143,7 +206,7 @@ class Horizon(object):
         for obstacle in self.obstacles:
             obstacle.update(delta_time, current_speed)
             if obstacle.remove:
-                updated_obstacles.pop(0)
+                self.obstacle_pool.release(updated_obstacles.pop(0))
         self.obstacles = updated_obstacles
         if self.obstacles:
             last_obstacle = self.obstacles[-1]
@@ -154,64 +217,114 @@ class Horizon(object):
                     and (last_obstacle.x_pos + last_obstacle.width + last_obstacle.gap)
                     < self.dimensions["WIDTH"]
             ):
-                self.add_new_obstacle(current_speed)
+                self.add_new_obstacle()
                 last_obstacle.following_obstacle_created = True
+            else:
+                self.course.prefetch()
         else:
-            self.add_new_obstacle(current_speed)
+            self.add_new_obstacle()
 
     def remove_first_obstacle(self):
         """
         Remove first obstacle from obstacles.
         """
-        self.obstacles.pop(0)
+        self.obstacle_pool.release(self.obstacles.pop(0))
 
-    def add_new_obstacle(self, current_speed):
+    def add_new_obstacle(self):
         """
-        Add a new obstacle.
+        Add a new obstacle from the next record of the course.
         """
-        obstacle_type_index = random.randint(0, len(self.types) - 1)
-        obstacle_type = self.types[obstacle_type_index]
-        if (
-                self.duplicate_obstacle_check(obstacle_type["type"]) or
-                current_speed < obstacle_type["min_speed"]
-        ):
-            self.add_new_obstacle(current_speed)
-        else:
-            obstacle_sprite_pos = self.sprite_pos[obstacle_type["type"]]
-            self.obstacles.append(
-                Obstacle(
-                    self.screen,
-                    obstacle_type,
-                    obstacle_sprite_pos,
-                    self.dimensions,
-                    self.gap_coefficient,
-                    current_speed,
-                    obstacle_type["width"]
-                )
+        record = self.course.next_record()
+        obstacle_type = self.course.types_by_name[record.type]
+        obstacle_sprite_pos = self.sprite_pos[obstacle_type.type]
+        self.obstacles.append(
+            self.obstacle_pool.acquire(
+                self.screen,
+                obstacle_type,
+                obstacle_sprite_pos,
+                self.dimensions,
+                record,
+                obstacle_type.width
             )
-            self.obstacle_history.insert(0, obstacle_type["type"])
-            if len(self.obstacle_history) > 1:
-                del self.obstacle_history[MAX_OBSTACLE_DUPLICATION:]
+        )
+
+    def reset(self, seed=None):
+        """
+        Reset the horizon layer and start a new course.
+        """
+        for obstacle in self.obstacles:
+            self.obstacle_pool.release(obstacle)
+        self.obstacles = []
+        self.course.reset(seed)
+        self.course.fill()
+        self.horizon_line.reset()
+        self.night_mode.reset()
 
-    def duplicate_obstacle_check(self, next_obstacle_type):
+    def get_state(self):
         """
-        Returns whether the previous two obstacles are the same as the next one.
+        Return the state of the obstacles, clouds, line, night mode and course.
         """
-        duplicate_count = 0
-        for obstacle_type in self.obstacle_history:
-            duplicate_count = duplicate_count + 1 if obstacle_type == next_obstacle_type else 0
-        return duplicate_count >= MAX_OBSTACLE_DUPLICATION
+        return {
+            "running_time": self.running_time,
+            "obstacles": [obstacle.get_state() for obstacle in self.obstacles],
+            "clouds": [cloud.get_state() for cloud in self.clouds],
+            "horizon_line": self.horizon_line.get_state(),
+            "night_mode": self.night_mode.get_state(),
+            "course": self.course.get_state()
+        }
 
-    def reset(self):
+    def set_state(self, state):
         """
-        Reset the horizon layer.
+        Restore a state returned by get_state.
         """
+        self.running_time = state["running_time"]
+        for obstacle in self.obstacles:
+            self.obstacle_pool.release(obstacle)
         self.obstacles = []
-        self.horizon_line.reset()
-        self.night_mode.reset()
+        for obstacle_state in state["obstacles"]:
+            obstacle_type = self.course.types_by_name[obstacle_state["type"]]
+            record = ObstacleRecord(
+                obstacle_state["type"],
+                obstacle_state["size"],
+                obstacle_state["y_pos"],
+                obstacle_state["speed_offset"],
+                obstacle_state["gap"],
+                None
+            )
+            obstacle = self.obstacle_pool.acquire(
+                self.screen,
+                obstacle_type,
+                self.sprite_pos[obstacle_type.type],
+                self.dimensions,
+                record,
+                0
+            )
+            obstacle.set_state(obstacle_state)
+            self.obstacles.append(obstacle)
+        for cloud in self.clouds:
+            self.cloud_pool.release(cloud)
+        self.clouds = []
+        for cloud_state in state["clouds"]:
+            self.add_cloud()
+            self.clouds[-1].set_state(cloud_state)
+        self.horizon_line.set_state(state["horizon_line"])
+        self.night_mode.set_state(state["night_mode"])
+        self.course.set_state(state["course"])
 
     def add_cloud(self):
         """
         Add a new cloud to the horizon.
         """
-        self.clouds.append(Cloud(self.screen, self.sprite_pos["CLOUD"], self.dimensions["WIDTH"]))
+        self.clouds.append(
+            self.cloud_pool.acquire(self.screen, self.sprite_pos["CLOUD"], self.dimensions)
+        )
+        self.cloud_layer.dirty = True
+
+    def get_pool_stats(self):
+        """
+        Return the obstacle and cloud pool statistics.
+        """
+        return {
+            "obstacles": self.obstacle_pool.get_stats(),
+            "clouds": self.cloud_pool.get_stats()
+        }
@@ -6,14 +6,20 @@ import math
 import random
 import pygame
 
+from game_config import get_config
 from sprite import Sprite
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, BOTTOM_PAD
+from constants import BOTTOM_PAD
 
 class HorizonLine(object):
     """
-    Consists of two connecting lines. Randomly assigns a flat/bumpy horizon.
+    Consists of connecting lines, enough to cover the screen while it
+    scrolls. Randomly assigns a flat/bumpy horizon.
+
+    The segments are composited into a strip surface, which is drawn with a
+    single blit at the scroll offset. When a segment scrolls out on the left
+    the strip is shifted by one segment and only the new segment is drawn.
     """
-    def __init__(self, screen, sprite_pos):
+    def __init__(self, screen, sprite_pos, screen_dimensions):
         """
         Initialize the horizon line.
         """
@@ -23,15 +29,28 @@ class HorizonLine(object):
         self.dimensions = {
             "WIDTH": 600,
             "HEIGHT": 12,
-            "YPOS": SCREEN_HEIGHT - BOTTOM_PAD - 12
+            "YPOS": screen_dimensions["HEIGHT"] - BOTTOM_PAD - 12
         }
-        self.source_x_pos = [self.sprite_pos["x"], self.sprite_pos["x"] + self.dimensions["WIDTH"]]
-        self.x_pos = []
+        self.screen_width = screen_dimensions["WIDTH"]
+        self.scale = screen_dimensions.get("SCALE", 1)
+        self.num_segments = int(math.ceil(float(self.screen_width) / self.dimensions["WIDTH"])) + 1
+        self.source_x_pos = [
+            self.sprite_pos["x"] + (self.dimensions["WIDTH"] if i % 2 else 0)
+            for i in range(self.num_segments)
+        ]
+        self.x_pos = 0
         self.y_pos = 0
         self.bump_threshold = 0.5
+        self.pixels_per_ms = get_config().game.PIXELS_PER_MS
         self.image_sprite = Sprite.image
+        self.strip = pygame.Surface((
+            self.num_segments * self.dimensions["WIDTH"] * self.scale,
+            self.dimensions["HEIGHT"] * self.scale
+        )).convert()
+        self.strip.set_colorkey(self.image_sprite.get_colorkey())
         self.set_source_dimensions()
-        self.draw()
+        for i in range(self.num_segments):
+            self.draw_segment(i)
 
     def set_source_dimensions(self):
         """
@@ -39,7 +58,7 @@ class HorizonLine(object):
         """
         for dimension in self.dimensions:
             self.source_dimensions[dimension] = self.dimensions[dimension]
-        self.x_pos = [0, self.dimensions["WIDTH"]]
+        self.x_pos = 0
         self.y_pos = self.dimensions["YPOS"]
 
     def get_random_type(self):
@@ -48,66 +67,74 @@ class HorizonLine(object):
         """
         return self.dimensions["WIDTH"] if random.random() > self.bump_threshold else 0
 
+    def draw_segment(self, index):
+        """
+        Draw a segment into the strip.
+        """
+        scale = self.scale
+        segment_rect = pygame.Rect(
+            index * self.dimensions["WIDTH"] * scale,
+            0,
+            self.dimensions["WIDTH"] * scale,
+            self.dimensions["HEIGHT"] * scale
+        )
+        self.strip.fill(self.image_sprite.get_colorkey(), segment_rect)
+        self.strip.blit(self.image_sprite, segment_rect, pygame.Rect(
+            self.source_x_pos[index] * scale,
+            self.sprite_pos["y"] * scale,
+            self.source_dimensions["WIDTH"] * scale,
+            self.source_dimensions["HEIGHT"] * scale
+        ))
+
     def draw(self):
         """
         Draw the horizon line.
         """
         sprite_position = pygame.Rect(
-            self.source_x_pos[0],
-            self.sprite_pos["y"],
-            self.source_dimensions["WIDTH"],
-            self.source_dimensions["HEIGHT"]
-        )
-        destination_rect = pygame.Rect(
-            self.x_pos[0],
-            self.y_pos,
-            self.dimensions["WIDTH"],
-            self.dimensions["HEIGHT"]
-        )
-        self.screen.blit(self.image_sprite, destination_rect, sprite_position)
-        sprite_position = pygame.Rect(
-            self.source_x_pos[1],
-            self.sprite_pos["y"],
-            self.source_dimensions["WIDTH"],
-            self.source_dimensions["HEIGHT"]
-        )
-        destination_rect = pygame.Rect(
-            self.x_pos[1],
-            self.y_pos,
-            self.dimensions["WIDTH"],
+            -self.x_pos,
+            0,
+            self.screen_width,
             self.dimensions["HEIGHT"]
         )
-        self.screen.blit(self.image_sprite, destination_rect, sprite_position)
+        self.screen.blit(self.strip, (0, self.y_pos), sprite_position)
 
-    def update_x_pos(self, pos, increment):
+    def update_x_pos(self, increment):
         """
-        Update the x position of an individual piece of the line.
+        Move the line. A segment that scrolled out on the left moves behind
+        the last one with a new random type.
         """
-        line1 = pos
-        line2 = 1 if pos == 0 else 0
-
-        self.x_pos[line1] -= increment
-        self.x_pos[line2] = self.x_pos[line1] + self.dimensions["WIDTH"]
-
-        if self.x_pos[line1] <= -self.dimensions["WIDTH"]:
-            self.x_pos[line1] += self.dimensions["WIDTH"] * 2
-            self.x_pos[line2] = self.x_pos[line1] - self.dimensions["WIDTH"]
-            self.source_x_pos[line1] = self.get_random_type() + self.sprite_pos["x"]
+        self.x_pos -= increment
+        while self.x_pos <= -self.dimensions["WIDTH"]:
+            self.x_pos += self.dimensions["WIDTH"]
+            self.source_x_pos.append(self.get_random_type() + self.sprite_pos["x"])
+            del self.source_x_pos[0]
+            self.strip.scroll(-self.dimensions["WIDTH"] * self.scale, 0)
+            self.draw_segment(self.num_segments - 1)
 
     def update(self, delta_time, speed):
         """
         Update the horizon line.
         """
-        increment = math.floor(speed * (float(FPS) / 1000) * delta_time + 0.5)
-        if self.x_pos[0] <= 0:
-            self.update_x_pos(0, increment)
-        else:
-            self.update_x_pos(1, increment)
-        self.draw()
+        increment = math.floor(speed * self.pixels_per_ms * delta_time + 0.5)
+        self.update_x_pos(increment)
+
+    def get_state(self):
+        """
+        Return the scroll position and the segment types.
+        """
+        return {"x_pos": self.x_pos, "source_x_pos": list(self.source_x_pos)}
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state and redraw the strip.
+        """
+        self.x_pos = state["x_pos"]
+        self.source_x_pos = list(state["source_x_pos"])
+        for i in range(self.num_segments):
+            self.draw_segment(i)
 
     def reset(self):
         """
         Reset horizon to the starting position.
         """
-        self.x_pos[0] = 0
-        self.x_pos[1] = self.dimensions["WIDTH"]
+        self.x_pos = 0
@@ -0,0 +1,38 @@
+"""
+This module provides the jump physics shared by the t-rex and the offline tools.
+"""
+
+import math
+
+def start_jump_velocity(config, speed):
+    """
+    Return the initial jump velocity at the given game speed.
+    """
+    return config.INITIAL_JUMP_VELOCITY - (float(speed) / 10)
+
+def end_jump_velocity(config, jump_velocity, reached_min_height):
+    """
+    Return the velocity after the jump key is released.
+    """
+    if reached_min_height and jump_velocity < config.DROP_VELOCITY:
+        return config.DROP_VELOCITY
+    return jump_velocity
+
+def step_jump(config, min_jump_height, y_pos, jump_velocity, reached_min_height,
+              speed_drop, frames_elapsed):
+    """
+    Advance a jump by frames_elapsed frames. Returns the new y position, jump
+    velocity and whether the minimum height was reached.
+    """
+    if speed_drop:
+        y_pos += math.floor(
+            jump_velocity * config.SPEED_DROP_COEFFICIENT * frames_elapsed + 0.5
+        )
+    else:
+        y_pos += math.floor(jump_velocity * frames_elapsed + 0.5)
+    jump_velocity += (config.GRAVITY * frames_elapsed)
+    if y_pos < min_jump_height or speed_drop:
+        reached_min_height = True
+    if y_pos < config.MAX_JUMP_HEIGHT or speed_drop:
+        jump_velocity = end_jump_velocity(config, jump_velocity, reached_min_height)
+    return y_pos, jump_velocity, reached_min_height
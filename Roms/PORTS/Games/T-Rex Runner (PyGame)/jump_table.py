@@ -0,0 +1,142 @@
+"""
+This module provides the class JumpTable.
+"""
+
+from array import array
+
+from jump_physics import start_jump_velocity, end_jump_velocity, step_jump
+
+SPEED_BUCKET = 0.1
+
+class JumpTable(object):
+    """
+    Precomputed jump arcs. For every start speed bucket and every frame at
+    which releasing the jump key still changes the jump, the arc is stored as
+    the t-rex height above the ground and the jump velocity for each frame. A
+    speed drop falls the same way wherever it starts, so a single table of
+    drop offsets and velocities is shared.
+    """
+    def __init__(self, t_rex, min_speed, max_speed):
+        """
+        Build the tables for a t-rex and the range of game speeds.
+        """
+        self.config = t_rex.config
+        self.ground_y_pos = t_rex.ground_y_pos
+        self.min_jump_height = t_rex.min_jump_height
+        self.min_bucket = int(min_speed / SPEED_BUCKET)
+        self.max_bucket = int(max_speed / SPEED_BUCKET + 0.999)
+        self.arcs = []
+        self.first_release = []
+        for bucket in range(self.min_bucket, self.max_bucket + 1):
+            arcs, first_release = self.build_arcs(bucket * SPEED_BUCKET)
+            self.arcs.append(arcs)
+            self.first_release.append(first_release)
+        self.drop_arc, self.drop_velocities = self.build_drop_arc()
+
+    def simulate(self, speed, release_frame):
+        """
+        Return the heights of a jump with the key released before the given
+        frame, and the jump velocity after every frame.
+        """
+        heights = array("h")
+        velocities = array("d")
+        y_pos = self.ground_y_pos
+        jump_velocity = start_jump_velocity(self.config, speed)
+        reached_min_height = False
+        frame = 0
+        while True:
+            if frame == release_frame:
+                jump_velocity = end_jump_velocity(self.config, jump_velocity, reached_min_height)
+            y_pos, jump_velocity, reached_min_height = step_jump(
+                self.config,
+                self.min_jump_height,
+                y_pos,
+                jump_velocity,
+                reached_min_height,
+                False,
+                1
+            )
+            if y_pos > self.ground_y_pos:
+                return heights, velocities
+            heights.append(int(self.ground_y_pos - y_pos))
+            velocities.append(jump_velocity)
+            frame += 1
+
+    def build_arcs(self, speed):
+        """
+        Return the arcs for a start speed, as pairs of heights and
+        velocities, indexed by release frame from the first release that has
+        an effect, with the full jump last.
+        """
+        full_arc, velocities = self.simulate(speed, None)
+        first_release = 0
+        while (first_release < len(full_arc) and
+               self.ground_y_pos - full_arc[first_release] >= self.min_jump_height):
+            first_release += 1
+        first_release += 1
+        arcs = []
+        release_frame = first_release
+        while (release_frame < len(full_arc) and
+               velocities[release_frame - 1] < self.config.DROP_VELOCITY):
+            arcs.append(self.simulate(speed, release_frame))
+            release_frame += 1
+        arcs.append((full_arc, velocities))
+        return arcs, first_release
+
+    def build_drop_arc(self):
+        """
+        Return the height change and the jump velocity for every frame of a
+        speed drop.
+        """
+        offsets = array("h")
+        velocities = array("d")
+        y_pos = 0
+        jump_velocity = 1
+        while y_pos <= self.ground_y_pos:
+            y_pos, jump_velocity, _ = step_jump(
+                self.config,
+                self.min_jump_height,
+                y_pos,
+                jump_velocity,
+                True,
+                True,
+                1
+            )
+            offsets.append(int(y_pos))
+            velocities.append(jump_velocity)
+        return offsets, velocities
+
+    def get_bucket(self, speed):
+        """
+        Return the table index for a start speed.
+        """
+        bucket = int(speed / SPEED_BUCKET + 0.5)
+        return min(max(bucket, self.min_bucket), self.max_bucket) - self.min_bucket
+
+    def get_arc(self, bucket, release_frame=None):
+        """
+        Return the heights and velocities of the arc for a start speed
+        bucket and a release frame.
+        """
+        arcs = self.arcs[bucket]
+        if release_frame is None:
+            return arcs[-1]
+        index = release_frame - self.first_release[bucket]
+        if index < 0 or index >= len(arcs):
+            return arcs[-1]
+        return arcs[index]
+
+    def get_drop_y_pos(self, start_y_pos, frame):
+        """
+        Return the y position a frame into a speed drop, or None once landed.
+        """
+        y_pos = start_y_pos + self.drop_arc[frame] if frame < len(self.drop_arc) else None
+        if y_pos is None or y_pos > self.ground_y_pos:
+            return None
+        return y_pos
+
+    def get_drop_velocity(self, frame):
+        """
+        Return the jump velocity a frame into a speed drop.
+        """
+        return self.drop_velocities[frame]
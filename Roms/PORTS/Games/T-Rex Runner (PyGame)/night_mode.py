@@ -5,39 +5,46 @@ This module provides the class NightMode.
 import random
 import pygame
 
+from game_config import get_config
 from sprite import Sprite
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from sky_layer import SkyLayer
+from constants import get_sky_y_pos
+
+STATE_ATTRIBUTES = ("x_pos", "current_phase", "opacity", "draw_stars")
 
 class NightMode(object):
     """
-    Night mode shows a moon and stars on the horizon.
+    Night mode shows a moon and stars on the horizon. The stars move
+    together, so they are drawn from a star layer that is redrawn when the
+    stars are placed or one of them wraps around.
     """
-    def __init__(self, screen, sprite_pos_moon, sprite_pos_star, container_width):
+    def __init__(self, screen, sprite_pos_moon, sprite_pos_star, dimensions):
         """
         Initializes the night mode.
         """
         self.sprite_pos_moon = sprite_pos_moon
         self.sprite_pos_star = sprite_pos_star
         self.screen = screen
+        container_width = dimensions["WIDTH"]
+        self.sky_y_pos = get_sky_y_pos(dimensions["HEIGHT"])
         self.x_pos = container_width - 50
-        self.y_pos = (SCREEN_HEIGHT / 3) + 30
+        self.y_pos = self.sky_y_pos + 30
         self.current_phase = 0
         self.opacity = 0
         self.container_width = container_width
         self.draw_stars = False
-        self.config = {
-            "FADE_SPEED": 0.035,
-            "HEIGHT": 40,
-            "MOON_SPEED": 0.25,
-            "NUM_STARS": 2,
-            "STAR_SIZE": 9,
-            "STAR_SPEED": 0.3,
-            "STAR_MAX_Y": 70,
-            "WIDTH": 20
-        }
-        self.stars = [None] * self.config["NUM_STARS"]
+        self.config = get_config().night_mode
+        self.stars = [None] * self.config.NUM_STARS
         self.phases = [140, 120, 100, 60, 40, 20, 0]
         self.image_sprite = Sprite.image
+        self.star_layer = SkyLayer(
+            -self.config.WIDTH,
+            self.sky_y_pos,
+            container_width + self.config.WIDTH + self.config.STAR_SIZE,
+            self.config.STAR_MAX_Y + self.config.STAR_SIZE,
+            dimensions.get("SCALE", 1)
+        )
+        self.star_layer_x_pos = 0
         self.place_stars()
 
     def update(self, delta_time, activated):
@@ -49,29 +56,39 @@ class NightMode(object):
             if self.current_phase >= len(self.phases):
                 self.current_phase = 0
         if (activated and (self.opacity < 1 or self.opacity == 0)):
-            self.opacity += self.config["FADE_SPEED"]
+            self.opacity += self.config.FADE_SPEED
         elif self.opacity > 0:
-            self.opacity -= self.config["FADE_SPEED"]
+            self.opacity -= self.config.FADE_SPEED
         if self.opacity > 0:
             if delta_time:
-                self.x_pos = self.update_x_pos(self.x_pos, self.config["MOON_SPEED"])
+                self.x_pos = self.update_x_pos(self.x_pos, self.config.MOON_SPEED)
                 if self.draw_stars:
-                    for i in range(self.config["NUM_STARS"]):
-                        self.stars[i]["x"] = self.update_x_pos(
+                    for i in range(self.config.NUM_STARS):
+                        star_x_pos = self.update_x_pos(
                             self.stars[i]["x"],
-                            self.config["STAR_SPEED"]
+                            self.config.STAR_SPEED
                         )
-            self.draw()
+                        if star_x_pos > self.stars[i]["x"]:
+                            self.star_layer.dirty = True
+                        self.stars[i]["x"] = star_x_pos
         else:
             self.opacity = 0
             self.place_stars()
         self.draw_stars = True
 
+    def is_fading(self, activated):
+        """
+        Return whether the moon and stars are still fading in or out.
+        """
+        if activated:
+            return self.opacity < 1
+        return self.opacity > 0
+
     def update_x_pos(self, current_pos, speed):
         """
         Return updated x position of a moon or star.
         """
-        if current_pos < -self.config["WIDTH"]:
+        if current_pos < -self.config.WIDTH:
             current_pos = self.container_width
         else:
             current_pos -= speed
@@ -79,31 +96,19 @@ class NightMode(object):
 
     def draw(self):
         """
-        Draw the moon and stars on the screen.
+        Draw the moon and stars on the screen while they are shown.
         """
-        moon_source_width = (self.config["WIDTH"] * 2 if self.current_phase == 3
-                             else self.config["WIDTH"])
-        moon_source_height = self.config["HEIGHT"]
+        if self.opacity <= 0:
+            return
+        moon_source_width = (self.config.WIDTH * 2 if self.current_phase == 3
+                             else self.config.WIDTH)
+        moon_source_height = self.config.HEIGHT
         moon_source_x = self.sprite_pos_moon["x"] + self.phases[self.current_phase]
         moon_output_width = moon_source_width
-        star_size = self.config["STAR_SIZE"]
-        star_source_x = self.sprite_pos_star["x"]
-        self.image_sprite.set_alpha(round(self.opacity * 255))
+        alpha = round(self.opacity * 255)
         if self.draw_stars:
-            for i in range(self.config["NUM_STARS"]):
-                sprite_position = pygame.Rect(
-                    star_source_x,
-                    self.stars[i]["source_y"],
-                    star_size,
-                    star_size
-                )
-                destination_rect = pygame.Rect(
-                    round(self.stars[i]["x"]),
-                    self.stars[i]["y"],
-                    self.config["STAR_SIZE"],
-                    self.config["STAR_SIZE"]
-                )
-                self.screen.blit(self.image_sprite, destination_rect, sprite_position)
+            self.draw_star_layer(alpha)
+        self.image_sprite.set_alpha(alpha)
         sprite_position = pygame.Rect(
             moon_source_x,
             self.sprite_pos_moon["y"],
@@ -114,21 +119,60 @@ class NightMode(object):
             round(self.x_pos),
             self.y_pos,
             moon_output_width,
-            self.config["HEIGHT"]
+            self.config.HEIGHT
         )
         self.screen.blit(self.image_sprite, destination_rect, sprite_position)
         self.image_sprite.set_alpha(255)
 
+    def draw_star_layer(self, alpha):
+        """
+        Draw the stars from the star layer, redrawing the layer first if
+        the stars were placed or wrapped around since.
+        """
+        if self.star_layer.dirty:
+            self.star_layer.clear()
+            star_size = self.config.STAR_SIZE
+            for star in self.stars:
+                self.star_layer.blit_sprite(
+                    (self.sprite_pos_star["x"], star["source_y"], star_size, star_size),
+                    round(star["x"]),
+                    star["y"]
+                )
+            self.star_layer_x_pos = round(self.stars[0]["x"])
+        self.star_layer.draw(
+            self.screen,
+            int(round(self.stars[0]["x"]) - self.star_layer_x_pos),
+            alpha
+        )
+
     def place_stars(self):
         """
         Do star placement.
         """
-        segment_size = round(self.container_width / self.config["NUM_STARS"])
-        for i in range(self.config["NUM_STARS"]):
+        segment_size = round(self.container_width / self.config.NUM_STARS)
+        for i in range(self.config.NUM_STARS):
             self.stars[i] = {"x": None, "y": None, "source_y": None}
             self.stars[i]["x"] = random.randint(segment_size * i, segment_size * (i + 1))
-            self.stars[i]["y"] = (SCREEN_HEIGHT / 3) + random.randint(0, self.config["STAR_MAX_Y"])
-            self.stars[i]["source_y"] = self.sprite_pos_star["y"] + self.config["STAR_SIZE"] * i
+            self.stars[i]["y"] = self.sky_y_pos + random.randint(0, self.config.STAR_MAX_Y)
+            self.stars[i]["source_y"] = self.sprite_pos_star["y"] + self.config.STAR_SIZE * i
+        self.star_layer.dirty = True
+
+    def get_state(self):
+        """
+        Return the moon phase and position, the fade and the stars.
+        """
+        state = dict((name, getattr(self, name)) for name in STATE_ATTRIBUTES)
+        state["stars"] = [dict(star) for star in self.stars]
+        return state
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state.
+        """
+        for name in STATE_ATTRIBUTES:
+            setattr(self, name, state[name])
+        self.stars = [dict(star) for star in state["stars"]]
+        self.star_layer.dirty = True
 
     def reset(self):
         """
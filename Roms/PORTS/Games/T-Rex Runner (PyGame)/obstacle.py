@@ -6,59 +6,63 @@ import math
 import random
 import pygame
 
+from game_config import get_config
 from sprite import Sprite
 
 from collision_box import CollisionBox
 
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
-
-MAX_GAP_COEFFICIENT = 1.5
-MAX_OBSTACLE_LENGTH = 3
+def get_gap(width, min_gap, gap_coefficient, speed, rng=random):
+    """
+    Calculate a random gap size. Minimum gap gets wider as speed increses.
+    """
+    min_gap = math.floor(width * speed + min_gap * gap_coefficient + 0.5)
+    max_gap = math.floor(min_gap * get_config().obstacles.MAX_GAP_COEFFICIENT + 0.5)
+    return rng.randint(int(min_gap), int(max_gap))
 
 class Obstacle(object):
     """
     Obstacle class.
     """
-    def __init__(
-            self,
-            screen,
-            type_selected,
-            sprite_img_pos,
-            dimensions,
-            gap_coefficient,
-            speed,
-            opt_x_offset
-    ):
-        """
-        Initialise the obstacle.
+    __slots__ = (
+        "screen", "sprite_pos", "type_config", "size", "dimensions", "remove",
+        "x_pos", "y_pos", "width", "collision_boxes", "gap", "speed_offset",
+        "current_frame", "timer", "following_obstacle_created", "image_sprite", "pixels_per_ms",
+        "source_x", "source_y"
+    )
+
+    def __init__(self, screen, type_selected, sprite_img_pos, dimensions, record, opt_x_offset):
+        """
+        Create the obstacle.
+        """
+        self.collision_boxes = []
+        self.pixels_per_ms = get_config().game.PIXELS_PER_MS
+        self.init(screen, type_selected, sprite_img_pos, dimensions, record, opt_x_offset)
+
+    def init(self, screen, type_selected, sprite_img_pos, dimensions, record, opt_x_offset):
+        """
+        Initialise the obstacle from a course record. Called again when the
+        obstacle is recycled from the pool.
         """
         self.screen = screen
         self.sprite_pos = sprite_img_pos
         self.type_config = type_selected
-        self.gap_coefficient = gap_coefficient
-        self.size = random.randint(1, MAX_OBSTACLE_LENGTH)
+        self.size = record.size
         self.dimensions = dimensions
         self.remove = False
         self.x_pos = dimensions["WIDTH"] + (opt_x_offset or 0)
-        self.y_pos = 0
-        self.width = 0
-        self.collision_boxes = []
-        self.gap = 0
-        self.speed_offset = 0
+        self.y_pos = record.y_pos
+        self.width = self.type_config.width * self.size
+        self.gap = record.gap
+        self.speed_offset = record.speed_offset
         self.current_frame = 0
         self.timer = 0
         self.following_obstacle_created = None
         self.image_sprite = Sprite.image
+        self.source_x = (
+            self.type_config.width * self.size * (0.5 * (self.size - 1)) + self.sprite_pos["x"]
+        )
+        self.source_y = self.sprite_pos["y"]
         self.clone_collision_boxes()
-        if self.size > 1 and self.type_config["multiple_speed"] > speed:
-            self.size = 1
-        self.width = self.type_config["width"] * self.size
-        if isinstance(self.type_config["y_pos"], list):
-            y_pos_config = self.type_config["y_pos"]
-            self.y_pos = y_pos_config[random.randint(0, len(y_pos_config) - 1)]
-        else:
-            self.y_pos = self.type_config["y_pos"]
-        self.draw()
         if self.size > 1:
             self.collision_boxes[1].width = (
                 self.width -
@@ -66,34 +70,27 @@ class Obstacle(object):
                 self.collision_boxes[2].width
             )
             self.collision_boxes[2].x = self.width - self.collision_boxes[2].width
-        if self.type_config["speed_offset"]:
-            self.speed_offset = (
-                self.type_config["speed_offset"]
-                if random.random() > 0.5
-                else -self.type_config["speed_offset"]
-            )
-        self.gap = self.get_gap(self.gap_coefficient, speed)
 
     def draw(self):
         """
-        Draw and crop based on size.
+        Draw and crop based on size, from the atlas position set in init.
         """
-        source_width = self.type_config["width"]
-        source_height = self.type_config["height"]
-        source_x = (source_width * self.size) * (0.5 * (self.size - 1)) + self.sprite_pos["x"]
+        source_width = self.type_config.width
+        source_height = self.type_config.height
+        source_x = self.source_x
         if self.current_frame > 0:
             source_x += (source_width * self.current_frame)
         sprite_position = pygame.Rect(
             source_x,
-            self.sprite_pos["y"],
+            self.source_y,
             source_width * self.size,
             source_height
         )
         destination_rect = pygame.Rect(
             self.x_pos,
             self.y_pos,
-            self.type_config["width"] * self.size,
-            self.type_config["height"]
+            self.type_config.width * self.size,
+            self.type_config.height
         )
         self.screen.blit(self.image_sprite, destination_rect, sprite_position)
 
@@ -102,31 +99,57 @@ class Obstacle(object):
         Obstacle frame update.
         """
         if not self.remove:
-            if self.type_config["speed_offset"]:
+            if self.type_config.speed_offset:
                 speed += self.speed_offset
-            self.x_pos -= math.floor((speed * float(FPS) / 1000) * delta_time + 0.5)
-            if self.type_config["num_frames"]:
+            self.x_pos -= math.floor(speed * self.pixels_per_ms * delta_time + 0.5)
+            if self.type_config.num_frames:
                 self.timer += delta_time
-                if self.timer >= self.type_config["frame_rate"]:
+                if self.timer >= self.type_config.frame_rate:
                     self.current_frame = (
                         0
-                        if self.current_frame == self.type_config["num_frames"] - 1
+                        if self.current_frame == self.type_config.num_frames - 1
                         else self.current_frame + 1
                     )
                     self.timer = 0
-            self.draw()
             if not self.is_visible():
                 self.remove = True
 
-    def get_gap(self, gap_coefficient, speed):
+    def clone(self):
         """
-        Calculate a random gap size. Minimum gap gets wider as speed increses.
+        Return a shallow copy for simulating ahead. The type and collision
+        boxes are shared, as they are not changed by update.
         """
-        min_gap = math.floor(
-            self.width * speed + self.type_config["min_gap"] * gap_coefficient + 0.5
-        )
-        max_gap = math.floor(min_gap * MAX_GAP_COEFFICIENT + 0.5)
-        return random.randint(min_gap, max_gap)
+        clone = Obstacle.__new__(Obstacle)
+        for name in Obstacle.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def get_state(self):
+        """
+        Return the record the obstacle was created from and its position
+        and animation.
+        """
+        return {
+            "type": self.type_config.type,
+            "size": self.size,
+            "y_pos": self.y_pos,
+            "speed_offset": self.speed_offset,
+            "gap": self.gap,
+            "x_pos": self.x_pos,
+            "current_frame": self.current_frame,
+            "timer": self.timer,
+            "following_obstacle_created": self.following_obstacle_created
+        }
+
+    def set_state(self, state):
+        """
+        Restore the position and animation from a state returned by
+        get_state. The obstacle must have been created from its record.
+        """
+        self.x_pos = state["x_pos"]
+        self.current_frame = state["current_frame"]
+        self.timer = state["timer"]
+        self.following_obstacle_created = state["following_obstacle_created"]
 
     def is_visible(self):
         """
@@ -137,8 +160,18 @@ class Obstacle(object):
     def clone_collision_boxes(self):
         """
         Make a copy of the collision boxes, since these will change based on obstacle type and size.
+        Boxes left over from a previous use of this obstacle are reused.
         """
-        collision_boxes = self.type_config["collision_boxes"]
-        for i in range(len(collision_boxes) - 1, -1, -1):
+        collision_boxes = self.type_config.collision_boxes
+        num_boxes = len(collision_boxes)
+        del self.collision_boxes[num_boxes:]
+        for i in range(num_boxes):
             box = collision_boxes[i]
-            self.collision_boxes.insert(i, CollisionBox(box.x, box.y, box.width, box.height))
+            if i < len(self.collision_boxes):
+                clone = self.collision_boxes[i]
+                clone.x = box.x
+                clone.y = box.y
+                clone.width = box.width
+                clone.height = box.height
+            else:
+                self.collision_boxes.append(CollisionBox(box.x, box.y, box.width, box.height))
@@ -0,0 +1,80 @@
+"""
+This module provides the class ObstacleSampler.
+"""
+
+import bisect
+import random
+
+class ObstacleSampler(object):
+    """
+    Picks the next obstacle type and size with a single random draw.
+
+    The speeds at which a type becomes eligible ("min_speed") or may come in
+    groups ("multiple_speed") split the speed range into tiers. For every tier
+    and every type that the duplication rule may block, a table of (type
+    index, size) entries is built once, weighted so that a uniform pick gives
+    the same distribution as drawing a random type, rejecting ineligible ones
+    and then drawing a random size.
+    """
+    def __init__(self, types, max_duplication, max_length, rng=random):
+        """
+        Initialise the sampler and precompute the eligibility tables.
+        """
+        self.types = types
+        self.max_duplication = max_duplication
+        self.max_length = max_length
+        self.rng = rng
+        self.thresholds = sorted(set(
+            [obstacle_type.min_speed for obstacle_type in types] +
+            [obstacle_type.multiple_speed for obstacle_type in types]
+        ))
+        self.tables = {}
+        for tier in range(len(self.thresholds) + 1):
+            reached = self.thresholds[:tier]
+            for blocked in [None] + [obstacle_type.type for obstacle_type in types]:
+                self.tables[(tier, blocked)] = self.build_table(reached, blocked)
+        for tier in range(len(self.thresholds) + 1):
+            for blocked in [obstacle_type.type for obstacle_type in types]:
+                if not self.tables[(tier, blocked)]:
+                    self.tables[(tier, blocked)] = self.tables[(tier, None)]
+
+    def build_table(self, reached, blocked):
+        """
+        Return the (type index, size) entries eligible once the given speed
+        thresholds are reached and the blocked type may not be repeated.
+        """
+        entries = []
+        for i, obstacle_type in enumerate(self.types):
+            if obstacle_type.type == blocked or obstacle_type.min_speed not in reached:
+                continue
+            if obstacle_type.multiple_speed in reached:
+                entries.extend((i, size) for size in range(1, self.max_length + 1))
+            else:
+                entries.extend((i, 1) for _ in range(self.max_length))
+        return tuple(entries)
+
+    def get_tier(self, speed):
+        """
+        Return the speed tier for the current speed.
+        """
+        return bisect.bisect_right(self.thresholds, speed)
+
+    def get_blocked_type(self, history):
+        """
+        Return the type that was already repeated the maximum number of times, if any.
+        """
+        if len(history) < self.max_duplication:
+            return None
+        last_type = history[0]
+        for i in range(1, self.max_duplication):
+            if history[i] != last_type:
+                return None
+        return last_type
+
+    def sample(self, speed, history):
+        """
+        Return the type config and size of the next obstacle.
+        """
+        entries = self.tables[(self.get_tier(speed), self.get_blocked_type(history))]
+        type_index, size = entries[int(self.rng.random() * len(entries))]
+        return self.types[type_index], size
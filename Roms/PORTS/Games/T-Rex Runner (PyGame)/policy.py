@@ -0,0 +1,152 @@
+"""
+This module provides the class Policy.
+"""
+
+import json
+import math
+
+POLICY_VERSION = 1
+ACTIONS = ["NONE", "JUMP", "DUCK"]
+OBSTACLES_SEEN = 2
+FEATURES = [
+    "height", "velocity", "ducking", "speed_drop", "speed"
+] + [
+    "%s_%d" % (name, index)
+    for index in range(OBSTACLES_SEEN)
+    for name in ["distance", "width", "elevation", "height"]
+]
+NO_OBSTACLE = [6.0, 0.0, 0.0, 0.0]
+
+def get_features(t_rex, obstacles, speed):
+    """
+    Return the inputs of a policy: the t-rex height above the ground, jump
+    velocity, ducking and speed drop, the game speed, and for each of the
+    next obstacles not yet passed its distance ahead, width, elevation above
+    the ground and height. Lengths are in hundreds of pixels.
+    """
+    features = [
+        (t_rex.ground_y_pos - t_rex.y_pos) / 100.0,
+        t_rex.jump_velocity / 10.0 if t_rex.jumping else 0.0,
+        1.0 if t_rex.ducking else 0.0,
+        1.0 if t_rex.speed_drop else 0.0,
+        speed / 10.0
+    ]
+    front = t_rex.x_pos + t_rex.config.WIDTH
+    ground = t_rex.ground_y_pos + t_rex.config.HEIGHT
+    seen = 0
+    for obstacle in obstacles:
+        if obstacle.x_pos + obstacle.width <= t_rex.x_pos:
+            continue
+        height = obstacle.type_config.height
+        features.append((obstacle.x_pos - front) / 100.0)
+        features.append(obstacle.width / 100.0)
+        features.append((ground - obstacle.y_pos - height) / 100.0)
+        features.append(height / 100.0)
+        seen += 1
+        if seen == OBSTACLES_SEEN:
+            return features
+    for _ in range(OBSTACLES_SEEN - seen):
+        features.extend(NO_OBSTACLE)
+    return features
+
+def get_key_changes(action, jump_held, duck_held):
+    """
+    Return the (key, pressed) events that make the held keys match an
+    action, releases first.
+    """
+    changes = []
+    if duck_held and action != "DUCK":
+        changes.append(("DUCK", False))
+    if jump_held and action != "JUMP":
+        changes.append(("JUMP", False))
+    if action == "JUMP" and not jump_held:
+        changes.append(("JUMP", True))
+    elif action == "DUCK" and not duck_held:
+        changes.append(("DUCK", True))
+    return changes
+
+class Policy(object):
+    """
+    A small feed-forward network mapping the features of a frame to the
+    keys to hold: NONE, JUMP or DUCK. Hidden layers use tanh; the action
+    with the highest output is taken. The forward pass is plain Python, so
+    the game does not need NumPy to follow a policy trained by train.py.
+    """
+    def __init__(self, layers):
+        """
+        Initialize the policy from its layers, each a pair of a weight
+        matrix, one row per input, and a bias vector.
+        """
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a policy written by train.py. Raises ValueError if the file
+        is not a policy for these features and actions.
+        """
+        with open(path) as policy_file:
+            data = json.load(policy_file)
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a policy from its JSON form, checking it against the
+        features and actions.
+        """
+        if (
+                not isinstance(data, dict) or
+                data.get("version") != POLICY_VERSION or
+                data.get("features") != FEATURES or
+                data.get("actions") != ACTIONS
+        ):
+            raise ValueError("not a policy for this version of the game")
+        layers = []
+        inputs = len(FEATURES)
+        for layer in data.get("layers", []):
+            weights = [[float(value) for value in row] for row in layer["weights"]]
+            biases = [float(value) for value in layer["biases"]]
+            if len(weights) != inputs or any(len(row) != len(biases) for row in weights):
+                raise ValueError("policy layer sizes do not match")
+            layers.append((weights, biases))
+            inputs = len(biases)
+        if inputs != len(ACTIONS):
+            raise ValueError("policy outputs do not match the actions")
+        return cls(layers)
+
+    def to_dict(self):
+        """
+        Return the JSON form of the policy.
+        """
+        return {
+            "version": POLICY_VERSION,
+            "features": FEATURES,
+            "actions": ACTIONS,
+            "layers": [
+                {"weights": weights, "biases": biases}
+                for weights, biases in self.layers
+            ]
+        }
+
+    def save(self, path):
+        """
+        Write the policy as JSON.
+        """
+        with open(path, "w") as policy_file:
+            json.dump(self.to_dict(), policy_file)
+
+    def act(self, features):
+        """
+        Return the action for the features of a frame.
+        """
+        values = features
+        last = len(self.layers) - 1
+        for index, (weights, biases) in enumerate(self.layers):
+            outputs = list(biases)
+            for value, row in zip(values, weights):
+                if value:
+                    for output, weight in enumerate(row):
+                        outputs[output] += value * weight
+            values = outputs if index == last else [math.tanh(output) for output in outputs]
+        return ACTIONS[values.index(max(values))]
@@ -0,0 +1,50 @@
+"""
+This module provides the class Pool.
+"""
+
+class Pool(object):
+    """
+    Free list of reusable game objects.
+    """
+    def __init__(self, factory):
+        """
+        Initialize the pool. Objects are created by factory and re-initialized
+        through their init method when recycled.
+        """
+        self.factory = factory
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+
+    def acquire(self, *args):
+        """
+        Return a recycled object re-initialized with args, or a new one.
+        """
+        if self.free:
+            obj = self.free.pop()
+            obj.init(*args)
+            self.reused += 1
+        else:
+            obj = self.factory(*args)
+            self.created += 1
+        return obj
+
+    def release(self, obj):
+        """
+        Give an object back to the pool.
+        """
+        self.free.append(obj)
+        self.released += 1
+
+    def get_stats(self):
+        """
+        Return the pool statistics.
+        """
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "released": self.released,
+            "free": len(self.free),
+            "in_use": self.created - len(self.free)
+        }
@@ -0,0 +1,76 @@
+"""
+This module provides the class RenderTarget.
+"""
+
+import pygame
+
+from scaled_surface import ScaledSurface
+from constants import GAME_HEIGHT
+
+GAME_WIDTH = 600
+
+class RenderTarget(object):
+    """
+    Surface the game is drawn to. At the display size this is the display
+    itself; at a smaller render size it is an off-screen canvas that is
+    scaled to the display, keeping its aspect ratio, once per frame.
+
+    The layout is computed in a viewport that is an integer factor smaller
+    than the surface, so large screens show the game with crisp, enlarged
+    sprites. The factor defaults to the largest one that still fits the
+    600x150 game.
+    """
+    def __init__(self, display, size=None, scale=None):
+        """
+        Initialize the render target for a display, a render size and a
+        scale factor.
+        """
+        self.display = display
+        display_width, display_height = display.get_size()
+        if size is None or tuple(size) == (display_width, display_height):
+            self.canvas = display
+            self.present_surface = None
+        else:
+            width, height = size
+            present_scale = min(float(display_width) / width, float(display_height) / height)
+            present_width = int(width * present_scale)
+            present_height = int(height * present_scale)
+            self.canvas = pygame.Surface(size).convert()
+            self.present_surface = display.subsurface(pygame.Rect(
+                (display_width - present_width) // 2,
+                (display_height - present_height) // 2,
+                present_width,
+                present_height
+            ))
+        canvas_width, canvas_height = self.canvas.get_size()
+        if scale is None:
+            scale = min(canvas_width // GAME_WIDTH, canvas_height // GAME_HEIGHT)
+        self.scale = max(scale, 1)
+        if self.scale > 1:
+            self.surface = ScaledSurface(self.canvas, self.scale)
+        else:
+            self.surface = self.canvas
+        self.border_color = None
+
+    def get_dimensions(self):
+        """
+        Return the dimensions the game is laid out in.
+        """
+        width, height = self.canvas.get_size()
+        return {
+            "WIDTH": width // self.scale,
+            "HEIGHT": height // self.scale,
+            "SCALE": self.scale
+        }
+
+    def present(self):
+        """
+        Show the rendered frame on the display.
+        """
+        if self.present_surface is not None:
+            border_color = self.canvas.get_at((0, 0))
+            if border_color != self.border_color:
+                self.display.fill(border_color)
+                self.border_color = border_color
+            pygame.transform.scale(self.canvas, self.present_surface.get_size(), self.present_surface)
+        pygame.display.flip()
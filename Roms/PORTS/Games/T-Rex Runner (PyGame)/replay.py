@@ -0,0 +1,72 @@
+"""
+This module provides the class Replay.
+"""
+
+import json
+import os
+
+REPLAY_DIRECTORY = "replays"
+REPLAY_VERSION = 1
+REPLAY_ACTIONS = ("JUMP", "DUCK")
+
+class Replay(object):
+    """
+    The course seed of a run and its JUMP and DUCK key events, each with the
+    run time in ms at which it was applied, so the run can be raced again as
+    a ghost on the same course.
+    """
+    def __init__(self, seed, events=None, distance=0, duration=0):
+        """
+        Initialize the replay of a run on the course of a seed.
+        """
+        self.seed = seed
+        self.events = events if events is not None else []
+        self.distance = distance
+        self.duration = duration
+
+    def add_event(self, running_time, action, pressed):
+        """
+        Record a key event applied at a run time.
+        """
+        self.events.append((running_time, action, pressed))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a replay written by save. Raises ValueError if the file is not
+        a replay for this version of the game.
+        """
+        with open(path) as replay_file:
+            data = json.load(replay_file)
+        if not isinstance(data, dict) or data.get("version") != REPLAY_VERSION:
+            raise ValueError("not a replay for this version of the game")
+        events = []
+        for running_time, action, pressed in data["events"]:
+            if action not in REPLAY_ACTIONS:
+                raise ValueError("unknown action %s" % action)
+            events.append((running_time, action, bool(pressed)))
+        events.sort(key=lambda event: event[0])
+        return cls(int(data["seed"]), events, data.get("distance", 0), data.get("duration", 0))
+
+    def save(self, name, directory=REPLAY_DIRECTORY):
+        """
+        Write the replay as JSON under name in a directory, through a
+        temporary file. Returns the path written.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        path = os.path.join(directory, name + ".json")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as replay_file:
+            json.dump({
+                "version": REPLAY_VERSION,
+                "seed": self.seed,
+                "distance": self.distance,
+                "duration": self.duration,
+                "events": [
+                    [running_time, action, int(pressed)]
+                    for running_time, action, pressed in self.events
+                ]
+            }, replay_file, separators=(",", ":"))
+        os.rename(temp_path, path)
+        return path
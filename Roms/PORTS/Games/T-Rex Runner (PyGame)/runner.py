@@ -0,0 +1,72 @@
+"""
+This module provides the class Runner.
+"""
+
+import math
+
+from autopilot import apply_key
+from collision_box import check_obstacle_collision
+from game_config import get_config
+from sprite import Sprite
+from t_rex import TRex
+
+class Runner(object):
+    """
+    A t-rex running beside the player's on the same horizon: the second
+    player or the ghost of a replay. The world is updated once per frame for
+    all of them; a runner only adds its jump physics, a collision check
+    against the first obstacle of the shared horizon and a blit. Key events
+    are applied with the game's own rules. Once crashed it is carried off
+    the screen with the ground. It is drawn from a translucent copy of the
+    atlas made once, so no alpha changes per frame.
+    """
+    def __init__(self, screen, sprite_pos, dimensions, alpha):
+        """
+        Initialize the runner, drawn at an opacity from 0 to 255.
+        """
+        self.t_rex = TRex(screen, sprite_pos, dimensions)
+        self.t_rex.image_sprite = Sprite.get_translucent(alpha)
+        self.crashed = False
+        self.crash_obstacle = None
+        self.pixels_per_ms = get_config().game.PIXELS_PER_MS
+
+    def reset(self):
+        """
+        Start the runner over, running.
+        """
+        self.t_rex.reset()
+        self.t_rex.x_pos = 0
+        self.crashed = False
+        self.crash_obstacle = None
+
+    def press(self, action, pressed, speed):
+        """
+        Apply a JUMP or DUCK key event, unless the runner has crashed.
+        """
+        if not self.crashed:
+            apply_key(self.t_rex, action, pressed, speed)
+
+    def update(self, delta_time, speed, obstacle=None):
+        """
+        Move the t-rex and check it against the obstacle a collision is
+        checked with, if any. The obstacle it crashes into is kept.
+        """
+        t_rex = self.t_rex
+        if self.crashed:
+            t_rex.x_pos -= math.floor(speed * self.pixels_per_ms * delta_time + 0.5)
+            return
+        if t_rex.jumping:
+            t_rex.update_jump(delta_time)
+        if obstacle and check_obstacle_collision(t_rex, obstacle):
+            self.crashed = True
+            self.crash_obstacle = obstacle
+            t_rex.update(100, t_rex.status["CRASHED"])
+            return
+        t_rex.update(delta_time)
+
+    def render(self):
+        """
+        Draw the runner while it is on the screen.
+        """
+        if self.t_rex.x_pos > -self.t_rex.config.WIDTH:
+            self.t_rex.render()
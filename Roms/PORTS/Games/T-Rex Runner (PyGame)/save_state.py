@@ -0,0 +1,58 @@
+"""
+This module provides the class SaveState.
+"""
+
+import os
+import pickle
+
+SAVE_FILE = "savestate.bin"
+VERSION = 2
+
+class SaveState(object):
+    """
+    Save file for a run in progress. The state is pickled in one write to a
+    temporary file, which is synced and renamed over the save file, so a
+    power-off leaves either the old or the new save, never a partial one.
+    """
+    def __init__(self, path=SAVE_FILE):
+        """
+        Initialize the save file path.
+        """
+        self.path = path
+
+    def save(self, state):
+        """
+        Write a game state.
+        """
+        data = pickle.dumps({"version": VERSION, "state": state}, 2)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as save_file:
+            save_file.write(data)
+            save_file.flush()
+            os.fsync(save_file.fileno())
+        os.rename(temp_path, self.path)
+
+    def load(self):
+        """
+        Return the saved game state, or None if there is no usable save.
+        """
+        try:
+            with open(self.path, "rb") as save_file:
+                saved = pickle.loads(save_file.read())
+        except (
+                IOError, OSError, EOFError, ValueError, AttributeError, ImportError,
+                IndexError, KeyError, TypeError, pickle.UnpicklingError
+        ):
+            return None
+        if not isinstance(saved, dict) or saved.get("version") != VERSION:
+            return None
+        return saved["state"]
+
+    def clear(self):
+        """
+        Remove the save, once it has been resumed or the run has ended.
+        """
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
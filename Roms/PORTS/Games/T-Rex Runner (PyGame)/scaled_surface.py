@@ -0,0 +1,44 @@
+"""
+This module provides the class ScaledSurface.
+"""
+
+import pygame
+
+class ScaledSurface(object):
+    """
+    Draws in layout coordinates onto a surface that is an integer factor
+    larger. Blit positions and source areas are multiplied by the factor, so
+    blits from the atlas, which is scaled by the same factor when it is
+    loaded, pick the same sprites and need no scaling per frame.
+    """
+    def __init__(self, surface, scale):
+        """
+        Wrap a surface drawn at the given scale.
+        """
+        self.surface = surface
+        self.scale = scale
+
+    def blit(self, source, dest, area=None):
+        """
+        Blit a surface at a layout position, from a layout area of the source.
+        """
+        scale = self.scale
+        if area is not None:
+            area = pygame.Rect(area[0] * scale, area[1] * scale, area[2] * scale, area[3] * scale)
+        return self.surface.blit(source, (int(dest[0]) * scale, int(dest[1]) * scale), area)
+
+    def fill(self, color, rect=None):
+        """
+        Fill the surface, or a layout rectangle of it.
+        """
+        if rect is not None:
+            scale = self.scale
+            rect = pygame.Rect(rect[0] * scale, rect[1] * scale, rect[2] * scale, rect[3] * scale)
+        return self.surface.fill(color, rect)
+
+    def get_size(self):
+        """
+        Return the size in layout coordinates.
+        """
+        width, height = self.surface.get_size()
+        return width // self.scale, height // self.scale
@@ -0,0 +1,107 @@
+"""
+This module provides the class ScoreStore.
+"""
+
+import sys
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+SCORE_FILE = "scores.db"
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " id INTEGER PRIMARY KEY,"
+    " time REAL NOT NULL,"
+    " distance INTEGER NOT NULL,"
+    " score INTEGER NOT NULL,"
+    " duration INTEGER NOT NULL,"
+    " death_cause TEXT,"
+    " seed INTEGER"
+    ")",
+    "CREATE INDEX IF NOT EXISTS runs_distance ON runs (distance)"
+]
+
+class ScoreStore(object):
+    """
+    SQLite history of the runs played. The database is kept in WAL mode, so
+    a power-off while writing loses at most the run being written and never
+    corrupts the file. The best score is read at startup through the index
+    on the distance. Runs are written by a background thread, so game over
+    does not wait for the SD card.
+    """
+    def __init__(self, path):
+        """
+        Open the database, create the tables and read the best score, then
+        start the writer thread.
+        """
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+        self.best_distance = self.connection.execute(
+            "SELECT MAX(distance) FROM runs"
+        ).fetchone()[0] or 0
+        self.runs = queue.Queue()
+        self.writer = threading.Thread(target=self.write_runs)
+        self.writer.daemon = True
+        self.writer.start()
+
+    @classmethod
+    def open(cls, path=SCORE_FILE):
+        """
+        Return the store at path, or None if SQLite is missing or the
+        database cannot be opened.
+        """
+        if sqlite3 is None:
+            return None
+        try:
+            return cls(path)
+        except sqlite3.Error:
+            return None
+
+    def add_run(self, distance, score, duration, death_cause=None, seed=None):
+        """
+        Queue a finished run for writing. The distance is in pixels, as the
+        game keeps it, the score is the one shown by the distance meter and
+        the duration is in milliseconds.
+        """
+        self.best_distance = max(self.best_distance, distance)
+        self.runs.put((time.time(), distance, score, duration, death_cause, seed))
+
+    def write_runs(self):
+        """
+        Write queued runs until the store is closed, one transaction per run.
+        """
+        while True:
+            run = self.runs.get()
+            if run is None:
+                break
+            try:
+                with self.connection:
+                    self.connection.execute(
+                        "INSERT INTO runs (time, distance, score, duration, death_cause, seed)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        run
+                    )
+            except sqlite3.Error as error:
+                sys.stderr.write("scores: run not saved: %s\n" % error)
+        self.connection.close()
+
+    def close(self, timeout=1.0):
+        """
+        Write the queued runs and close the database, waiting at most timeout
+        seconds.
+        """
+        self.runs.put(None)
+        self.writer.join(timeout)
@@ -0,0 +1,60 @@
+"""
+This module provides the class SkyLayer.
+"""
+
+import pygame
+
+from sprite import Sprite
+
+class SkyLayer(object):
+    """
+    Cached surface for sky sprites that scroll together, such as the clouds
+    or the stars. The sprites are drawn into the layer once, and the layer is
+    drawn with one blit, offset by how far the sprites moved since. The owner
+    redraws the layer when a sprite enters or leaves, and can flag that with
+    dirty, which clear resets.
+    """
+    def __init__(self, x_pos, y_pos, width, height, scale=1):
+        """
+        Create a layer covering a screen area, at the atlas scale.
+        """
+        self.x_pos = x_pos
+        self.y_pos = y_pos
+        self.scale = scale
+        self.image_sprite = Sprite.image
+        self.colorkey = self.image_sprite.get_colorkey()
+        self.surface = pygame.Surface((width * scale, height * scale)).convert()
+        self.surface.set_colorkey(self.colorkey)
+        self.clear()
+        self.dirty = True
+
+    def clear(self):
+        """
+        Remove all sprites from the layer.
+        """
+        self.surface.fill(self.colorkey)
+        self.dirty = False
+
+    def blit_sprite(self, sprite_position, x_pos, y_pos):
+        """
+        Draw an area of the atlas into the layer at a screen position.
+        """
+        scale = self.scale
+        self.surface.blit(
+            self.image_sprite,
+            (int(x_pos - self.x_pos) * scale, int(y_pos - self.y_pos) * scale),
+            pygame.Rect(
+                sprite_position[0] * scale,
+                sprite_position[1] * scale,
+                sprite_position[2] * scale,
+                sprite_position[3] * scale
+            )
+        )
+
+    def draw(self, screen, x_offset, alpha=None):
+        """
+        Draw the layer, moved by x_offset since its sprites were drawn.
+        """
+        if alpha is not None:
+            self.surface.set_alpha(alpha)
+        screen.blit(self.surface, (self.x_pos + x_offset, self.y_pos))
@@ -4,9 +4,41 @@ This module provides the class Sprite.
 
 import pygame
 
+ATLAS_FILE = "assets/100-offline-sprite.png"
+
 class Sprite(object):
     """
-    Shared sprite.
+    Shared sprite. The atlas is loaded by Sprite.load once a display exists.
     """
-    image = pygame.image.load("assets/100-offline-sprite.png").convert()
-    image.set_colorkey((152, 152, 152))
+    image = None
+    translucent = {}
+
+    @classmethod
+    def load(cls, bundle=None, scale=1):
+        """
+        Load the atlas, from the asset bundle if there is one, convert it
+        to the display format and enlarge it by an integer scale factor.
+        """
+        if cls.image is None:
+            cls.translucent = {}
+            image = bundle.load_atlas() if bundle else pygame.image.load(ATLAS_FILE)
+            cls.image = image.convert()
+            if scale > 1:
+                width, height = cls.image.get_size()
+                cls.image = pygame.transform.scale(cls.image, (width * scale, height * scale))
+            cls.image.set_colorkey((152, 152, 152))
+        return cls.image
+
+    @classmethod
+    def get_translucent(cls, alpha):
+        """
+        Return a copy of the loaded atlas drawn at an opacity from 0 to 255.
+        The copy is made once per opacity and run-length encoded, so blits
+        from it need no alpha change per frame.
+        """
+        if alpha not in cls.translucent:
+            image = cls.image.copy()
+            image.set_colorkey(cls.image.get_colorkey(), pygame.RLEACCEL)
+            image.set_alpha(alpha, pygame.RLEACCEL)
+            cls.translucent[alpha] = image
+        return cls.translucent[alpha]
@@ -0,0 +1,35 @@
+"""
+This module provides the class StartupTimer.
+"""
+
+import sys
+import time
+
+class StartupTimer(object):
+    """
+    Records how long each startup phase takes.
+    """
+    def __init__(self):
+        """
+        Start timing.
+        """
+        self.start_time = time.time()
+        self.last_time = self.start_time
+        self.phases = []
+
+    def mark(self, phase):
+        """
+        Record the end of a phase.
+        """
+        now = time.time()
+        self.phases.append((phase, now - self.last_time))
+        self.last_time = now
+
+    def report(self, stream=sys.stdout):
+        """
+        Write the phase durations in milliseconds.
+        """
+        parts = ["%s %d ms" % (phase, duration * 1000) for phase, duration in self.phases]
+        parts.append("total %d ms" % ((self.last_time - self.start_time) * 1000))
+        stream.write("startup: %s\n" % ", ".join(parts))
+        stream.flush()
@@ -7,17 +7,25 @@ import random
 import pygame
 
 from collision_box import CollisionBox
+from game_config import get_config
+from jump_physics import start_jump_velocity, end_jump_velocity, step_jump
 
 from sprite import Sprite
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, BOTTOM_PAD
+from constants import FPS, BOTTOM_PAD
 
 BLINK_TIMING = 7000
+STATE_ATTRIBUTES = (
+    "x_pos", "y_pos", "current_status", "current_frame", "timer", "blink_delay",
+    "blink_count", "jumping", "ducking", "jump_velocity", "reached_min_height",
+    "speed_drop", "jump_count", "jump_bucket", "jump_arc", "jump_velocities",
+    "jump_released", "jump_time", "jump_frame", "drop_y_pos", "drop_frame"
+)
 
 class TRex(object):
     """
     T-rex game character.
     """
-    def __init__(self, screen, sprite_pos):
+    def __init__(self, screen, sprite_pos, dimensions):
         """
         T-rex player initaliser.
         """
@@ -33,21 +41,7 @@ class TRex(object):
         self.anim_start_time = 0
         self.timer = 0
         self.ms_per_frame = 1000 // FPS
-        self.config = {
-            "DROP_VELOCITY": -5,
-            "GRAVITY": 0.6,
-            "HEIGHT": 47,
-            "HEIGHT_DUCK": 25,
-            "INITIAL_JUMP_VELOCITY": -10,
-            "INTRO_DURATION": 1500,
-            "MAX_JUMP_HEIGHT": 30,
-            "MIN_JUMP_HEIGHT": 30,
-            "SPEED_DROP_COEFFICIENT": 3,
-            "SPRITE_WIDTH": 262,
-            "START_X_POS": 50,
-            "WIDTH": 44,
-            "WIDTH_DUCK": 59
-        }
+        self.config = get_config().t_rex
         self.status = {
             "CRASHED": "CRASHED",
             "DUCKING": "DUCKING",
@@ -63,6 +57,15 @@ class TRex(object):
         self.speed_drop = False
         self.jump_count = 0
         self.jumpspot_x = 0
+        self.jump_table = None
+        self.jump_bucket = 0
+        self.jump_arc = None
+        self.jump_velocities = None
+        self.jump_released = False
+        self.jump_time = 0
+        self.jump_frame = -1
+        self.drop_y_pos = None
+        self.drop_frame = 0
         self.collision_boxes = {
             "DUCKING": [
                 CollisionBox(1, 18, 55, 25)
@@ -99,10 +102,10 @@ class TRex(object):
             },
         }
         self.image_sprite = Sprite.image
-        self.ground_y_pos = SCREEN_HEIGHT - self.config["HEIGHT"] - BOTTOM_PAD
+        self.ground_y_pos = dimensions["HEIGHT"] - self.config.HEIGHT - BOTTOM_PAD
         self.y_pos = self.ground_y_pos
-        self.min_jump_height = self.ground_y_pos - self.config["MIN_JUMP_HEIGHT"]
-        self.draw(0, 0)
+        self.min_jump_height = self.ground_y_pos - self.config.MIN_JUMP_HEIGHT
+        self.jump_ms_per_frame = self.anim_frames[self.status["JUMPING"]]["ms_per_frame"]
         self.update(0, self.status["JUMPING"])
 
     def update(self, delta_time, opt_status=None):
@@ -117,11 +120,8 @@ class TRex(object):
             self.current_anim_frames = self.anim_frames[opt_status]["frames"]
             if opt_status == self.status["WAITING"]:
                 self.anim_start_time = pygame.time.get_ticks()
-                self.draw(self.current_anim_frames[self.current_frame], 0)
         if self.current_status == self.status["WAITING"]:
             self.blink(pygame.time.get_ticks())
-        else:
-            self.draw(self.current_anim_frames[self.current_frame], 0)
         if self.timer >= self.ms_per_frame:
             self.current_frame = (
                 0 if self.current_frame == len(self.current_anim_frames) - 1
@@ -132,6 +132,12 @@ class TRex(object):
             self.speed_drop = False
             self.set_duck(True)
 
+    def render(self):
+        """
+        Draw the current animation frame.
+        """
+        self.draw(self.current_anim_frames[self.current_frame], 0)
+
     def draw(self, x, y):
         """
         Draw the t-rex to a particular position.
@@ -139,11 +145,11 @@ class TRex(object):
         source_x = x
         source_y = y
         source_width = (
-            self.config["WIDTH_DUCK"]
+            self.config.WIDTH_DUCK
             if self.ducking and self.current_status != self.status["CRASHED"]
-            else self.config["WIDTH"]
+            else self.config.WIDTH
         )
-        source_height = self.config["HEIGHT"]
+        source_height = self.config.HEIGHT
 
         source_x += self.sprite_pos["x"]
         source_y += self.sprite_pos["y"]
@@ -152,8 +158,8 @@ class TRex(object):
             destination_rect = pygame.Rect(
                 self.x_pos,
                 self.y_pos,
-                self.config["WIDTH_DUCK"],
-                self.config["HEIGHT"]
+                self.config.WIDTH_DUCK,
+                self.config.HEIGHT
             )
             self.screen.blit(self.image_sprite, destination_rect, sprite_position)
         else:
@@ -161,8 +167,8 @@ class TRex(object):
             destination_rect = pygame.Rect(
                 self.x_pos,
                 self.y_pos,
-                self.config["WIDTH"],
-                self.config["HEIGHT"]
+                self.config.WIDTH,
+                self.config.HEIGHT
             )
             self.screen.blit(self.image_sprite, destination_rect, sprite_position)
 
@@ -178,19 +184,34 @@ class TRex(object):
         """
         delta_time = time - self.anim_start_time
         if delta_time >= self.blink_delay:
-            self.draw(self.current_anim_frames[self.current_frame], 0)
             if self.current_frame == 1:
                 self.set_blink_delay()
                 self.anim_start_time = time
                 self.blink_count += 1
 
+    def get_blink_timeout(self, time):
+        """
+        Return the milliseconds until the waiting animation next changes.
+        """
+        return max(
+            min(self.anim_start_time + self.blink_delay - time, self.ms_per_frame - self.timer),
+            0
+        )
+
     def start_jump(self, speed):
         """
         Initialise a jump.
         """
         if not self.jumping:
             self.update(0, self.status["JUMPING"])
-            self.jump_velocity = self.config["INITIAL_JUMP_VELOCITY"] - (float(speed) / 10)
+            self.jump_velocity = start_jump_velocity(self.config, speed)
+            if self.jump_table:
+                self.jump_bucket = self.jump_table.get_bucket(speed)
+                self.jump_arc, self.jump_velocities = self.jump_table.get_arc(self.jump_bucket)
+                self.jump_released = False
+                self.jump_time = 0
+                self.jump_frame = -1
+                self.drop_y_pos = None
             self.jumping = True
             self.reached_min_height = False
             self.speed_drop = False
@@ -199,37 +220,85 @@ class TRex(object):
         """
         Jump is complete, falling down.
         """
-        if self.reached_min_height and self.jump_velocity < self.config["DROP_VELOCITY"]:
-            self.jump_velocity = self.config["DROP_VELOCITY"]
+        if self.jump_table:
+            if (
+                    self.reached_min_height and
+                    not self.jump_released and
+                    self.drop_y_pos is None
+            ):
+                self.jump_arc, self.jump_velocities = self.jump_table.get_arc(
+                    self.jump_bucket,
+                    self.jump_frame + 1
+                )
+                self.jump_released = True
+            return
+        self.jump_velocity = end_jump_velocity(
+            self.config,
+            self.jump_velocity,
+            self.reached_min_height
+        )
 
     def update_jump(self, delta_time):
         """
         Update frame for a jump.
         """
-        ms_per_frame = self.anim_frames[self.current_status]["ms_per_frame"]
-        frames_elapsed = float(delta_time) / ms_per_frame
-        if self.speed_drop:
-            self.y_pos += math.floor(
-                self.jump_velocity * self.config["SPEED_DROP_COEFFICIENT"] * frames_elapsed + 0.5
-            )
-        else:
-            self.y_pos += math.floor(self.jump_velocity * frames_elapsed + 0.5)
-        self.jump_velocity += (self.config["GRAVITY"] * frames_elapsed)
-        if self.y_pos < self.min_jump_height or self.speed_drop:
-            self.reached_min_height = True
-        if self.y_pos < self.config["MAX_JUMP_HEIGHT"] or self.speed_drop:
-            self.end_jump()
+        if self.jump_table:
+            self.update_jump_from_table(delta_time)
+            return
+        frames_elapsed = float(delta_time) / self.ms_per_frame
+        self.y_pos, self.jump_velocity, self.reached_min_height = step_jump(
+            self.config,
+            self.min_jump_height,
+            self.y_pos,
+            self.jump_velocity,
+            self.reached_min_height,
+            self.speed_drop,
+            frames_elapsed
+        )
         if self.y_pos > self.ground_y_pos:
             self.reset()
             self.jump_count += 1
         self.update(delta_time)
 
+    def update_jump_from_table(self, delta_time):
+        """
+        Update frame for a jump by reading the precomputed arc at the frame
+        matching the time since the jump started. The jump velocity is read
+        with the height, so it is the same as in a simulated jump.
+        """
+        self.jump_time += delta_time
+        self.jump_frame = max(
+            self.jump_frame,
+            int(float(self.jump_time) / self.jump_ms_per_frame + 0.5) - 1
+        )
+        if self.jump_frame >= 0:
+            if self.drop_y_pos is not None:
+                if self.jump_frame >= self.drop_frame:
+                    drop_frame = self.jump_frame - self.drop_frame
+                    self.y_pos = self.jump_table.get_drop_y_pos(self.drop_y_pos, drop_frame)
+                    if self.y_pos is not None:
+                        self.jump_velocity = self.jump_table.get_drop_velocity(drop_frame)
+            elif self.jump_frame < len(self.jump_arc):
+                self.y_pos = self.ground_y_pos - self.jump_arc[self.jump_frame]
+                self.jump_velocity = self.jump_velocities[self.jump_frame]
+            else:
+                self.y_pos = None
+        if self.y_pos is None:
+            self.reset()
+            self.jump_count += 1
+        elif self.y_pos < self.min_jump_height or self.speed_drop:
+            self.reached_min_height = True
+        self.update(delta_time)
+
     def set_speed_drop(self):
         """
         Set the speed drop. Immediately cancels the current jump.
         """
         self.speed_drop = True
         self.jump_velocity = 1
+        if self.jump_table:
+            self.drop_y_pos = self.y_pos
+            self.drop_frame = self.jump_frame + 1
 
     def set_duck(self, is_ducking):
         """
@@ -242,6 +311,31 @@ class TRex(object):
             self.update(0, self.status["RUNNING"])
             self.ducking = False
 
+    def clone(self):
+        """
+        Return a shallow copy for simulating ahead. Configuration, collision
+        boxes and jump arcs are shared, as they are never changed in place.
+        """
+        clone = TRex.__new__(TRex)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def get_state(self):
+        """
+        Return the position, animation and jump state.
+        """
+        return dict((name, getattr(self, name)) for name in STATE_ATTRIBUTES)
+
+    def set_state(self, state):
+        """
+        Restore a state returned by get_state.
+        """
+        for name in STATE_ATTRIBUTES:
+            setattr(self, name, state[name])
+        self.ms_per_frame = self.anim_frames[self.current_status]["ms_per_frame"]
+        self.current_anim_frames = self.anim_frames[self.current_status]["frames"]
+        self.anim_start_time = pygame.time.get_ticks()
+
     def reset(self):
         """
         Reset the t-rex to running at start of game.
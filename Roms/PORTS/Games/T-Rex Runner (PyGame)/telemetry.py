@@ -0,0 +1,204 @@
+"""
+This module provides the class Telemetry.
+
+The game appends one JSON line per run to telemetry.jsonl, rotated to
+telemetry.jsonl.1 and so on as it grows. Run this module to summarize logs,
+e.g. copied from several devices, into death heatmaps by obstacle and speed:
+
+    python telemetry.py [--speed-bucket 1] [FILE ...]
+"""
+
+import argparse
+import collections
+import glob
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+TELEMETRY_FILE = "telemetry.jsonl"
+MAX_BYTES = 256 * 1024
+BACKUP_COUNT = 3
+QUEUE_SIZE = 64
+FRAME_TIME_BUCKET_MS = 4
+FRAME_TIME_BUCKETS = 16
+
+class Telemetry(object):
+    """
+    Per-run gameplay telemetry. Counters are kept in memory while a run is
+    played; at the end of the run a record is queued and a background thread
+    encodes and appends it, rotating the file once it exceeds max_bytes.
+    If the queue is full the record is dropped rather than blocking a frame.
+    """
+    def __init__(self, path=TELEMETRY_FILE, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        """
+        Initialize the counters and start the writer thread.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.frame_times = [0] * FRAME_TIME_BUCKETS
+        self.actions = collections.Counter()
+        self.dropped = 0
+        self.records = queue.Queue(QUEUE_SIZE)
+        self.writer = threading.Thread(target=self.write_records)
+        self.writer.daemon = True
+        self.writer.start()
+
+    def add_frame_time(self, frame_time):
+        """
+        Count a frame time in milliseconds in the run's histogram.
+        """
+        self.frame_times[min(int(frame_time) // FRAME_TIME_BUCKET_MS, FRAME_TIME_BUCKETS - 1)] += 1
+
+    def add_action(self, action):
+        """
+        Count an action taken in the run, e.g. a jump or a duck.
+        """
+        self.actions[action] += 1
+
+    def end_run(self, **fields):
+        """
+        Queue the run record with the given fields and the run's counters,
+        and reset the counters for the next run.
+        """
+        record = {
+            "time": int(time.time()),
+            "actions": dict(self.actions),
+            "frame_ms": list(self.frame_times),
+            "frame_bucket_ms": FRAME_TIME_BUCKET_MS
+        }
+        record.update(fields)
+        self.frame_times = [0] * FRAME_TIME_BUCKETS
+        self.actions.clear()
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def write_records(self):
+        """
+        Append queued records until closed. The file is flushed whenever
+        the queue runs empty.
+        """
+        log_file = open(self.path, "a")
+        while True:
+            record = self.records.get()
+            if record is None:
+                break
+            log_file.write(json.dumps(record, separators=(",", ":"), sort_keys=True) + "\n")
+            if self.records.empty():
+                log_file.flush()
+            if log_file.tell() >= self.max_bytes:
+                log_file.close()
+                self.rotate()
+                log_file = open(self.path, "a")
+        log_file.close()
+
+    def rotate(self):
+        """
+        Shift the log to the first backup and the backups up by one,
+        dropping the oldest.
+        """
+        for index in range(self.backup_count - 1, 0, -1):
+            source = "%s.%d" % (self.path, index)
+            if os.path.exists(source):
+                os.rename(source, "%s.%d" % (self.path, index + 1))
+        if self.backup_count:
+            os.rename(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+
+    def close(self, timeout=1.0):
+        """
+        Write the queued records and close the log, waiting at most timeout
+        seconds.
+        """
+        try:
+            self.records.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.writer.join(timeout)
+
+def read_records(paths):
+    """
+    Yield the run records of log files one at a time, skipping lines that
+    are not valid records, such as one cut short by a power-off.
+    """
+    for path in paths:
+        with open(path) as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+def summarize(records, speed_bucket):
+    """
+    Return the number of runs, the deaths by obstacle type and speed bucket,
+    the summed frame time histogram and the action totals.
+    """
+    runs = 0
+    deaths = collections.Counter()
+    frame_times = [0] * FRAME_TIME_BUCKETS
+    actions = collections.Counter()
+    for record in records:
+        runs += 1
+        if record.get("death_cause") and record.get("speed") is not None:
+            speed = math.floor(record["speed"] / speed_bucket) * speed_bucket
+            deaths[(record["death_cause"], speed)] += 1
+        for index, count in enumerate(record.get("frame_ms", [])[:FRAME_TIME_BUCKETS]):
+            frame_times[index] += count
+        actions.update(record.get("actions", {}))
+    return runs, deaths, frame_times, actions
+
+def print_report(runs, deaths, frame_times, actions, stream=sys.stdout):
+    """
+    Write the death heatmap, the frame time histogram and the action totals.
+    """
+    stream.write("%d runs, %d deaths\n" % (runs, sum(deaths.values())))
+    if deaths:
+        speeds = sorted(set(speed for _, speed in deaths))
+        causes = sorted(set(cause for cause, _ in deaths))
+        stream.write("\ndeaths by obstacle and speed:\n")
+        stream.write("  %-14s" % "speed" + "".join("%7.1f" % speed for speed in speeds) + "\n")
+        for cause in causes:
+            stream.write("  %-14s" % cause + "".join(
+                "%7d" % deaths[(cause, speed)] for speed in speeds
+            ) + "\n")
+    total_frames = sum(frame_times)
+    if total_frames:
+        stream.write("\nframe times:\n")
+        for index, count in enumerate(frame_times):
+            if count:
+                low = index * FRAME_TIME_BUCKET_MS
+                label = ("%d-%d ms" % (low, low + FRAME_TIME_BUCKET_MS - 1)
+                         if index < FRAME_TIME_BUCKETS - 1 else "%d+ ms" % low)
+                stream.write("  %-10s %6.2f%%\n" % (label, 100.0 * count / total_frames))
+    if actions:
+        stream.write("\nactions per run:\n")
+        for action, count in sorted(actions.items()):
+            stream.write("  %-10s %.1f\n" % (action, float(count) / max(runs, 1)))
+
+def main():
+    """
+    Summarize telemetry logs.
+    """
+    parser = argparse.ArgumentParser(description="Summarize gameplay telemetry.")
+    parser.add_argument("files", nargs="*", help="log files; by default the game's log and its backups")
+    parser.add_argument("--speed-bucket", type=float, default=1.0, help="speed bucket width")
+    args = parser.parse_args()
+    paths = args.files or sorted(glob.glob(TELEMETRY_FILE + "*"))
+    print_report(*summarize(read_records(paths), args.speed_bucket))
+
+if __name__ == "__main__":
+    main()
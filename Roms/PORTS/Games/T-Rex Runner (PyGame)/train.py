@@ -0,0 +1,376 @@
+"""
+Neuroevolution trainer for autopilot policies.
+
+A population of small networks (see policy.py) is evolved on seeded
+headless games. Every generation each network plays the same few seeds and
+scores the mean distance it ran; the best networks are kept and the rest of
+the population is replaced by mutated copies of them. Games are played in
+parallel across processes. A job plays one seed for a chunk of the
+population in lockstep: the horizon is simulated once for all of the
+t-rexes, as the obstacles do not depend on them, and the networks are
+evaluated in one batched forward pass per frame.
+
+The run is checkpointed after every generation and carries on from the
+checkpoint with --resume. The best policy so far is written as JSON for the
+game's --policy option.
+
+Usage:
+    python train.py --generations 50 --population 64 --workers 4
+    python train.py --resume --generations 100
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+import numpy
+import pygame
+
+from autopilot import apply_key
+from collision_box import check_obstacle_collision
+from course import SpeedCurve
+from game import SPRITE_DEFINITION
+from game_config import load_config
+from horizon import Horizon
+from policy import Policy, ACTIONS, FEATURES, get_features, get_key_changes
+from save_state import SaveState
+from sprite import Sprite
+from t_rex import TRex
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+
+CHECKPOINT_FILE = "train.ckpt"
+POLICY_FILE = "policy.json"
+
+# Whole-millisecond frame times of a 60 FPS clock over one second.
+FRAME_TIMES = [(frame + 1) * 1000 // FPS - frame * 1000 // FPS for frame in range(FPS)]
+
+ARENAS = {}
+
+def get_layer_sizes(hidden):
+    """
+    Return the layer sizes of a network with the given hidden layers.
+    """
+    return [len(FEATURES)] + list(hidden) + [len(ACTIONS)]
+
+def count_parameters(sizes):
+    """
+    Return the number of weights and biases of a network.
+    """
+    return sum(inputs * outputs + outputs for inputs, outputs in zip(sizes, sizes[1:]))
+
+def unpack(parameters, sizes):
+    """
+    Split a matrix of flat parameter vectors, one row per network, into the
+    weights and biases of each layer, stacked over the networks.
+    """
+    layers = []
+    offset = 0
+    for inputs, outputs in zip(sizes, sizes[1:]):
+        weights = parameters[:, offset:offset + inputs * outputs]
+        offset += inputs * outputs
+        biases = parameters[:, offset:offset + outputs]
+        offset += outputs
+        layers.append((weights.reshape(-1, inputs, outputs), biases))
+    return layers
+
+def forward(layers, inputs):
+    """
+    Return the action index picked by each network for its row of inputs,
+    as Policy.act does.
+    """
+    values = inputs
+    for index, (weights, biases) in enumerate(layers):
+        values = numpy.einsum("ki,kio->ko", values, weights) + biases
+        if index < len(layers) - 1:
+            values = numpy.tanh(values)
+    return values.argmax(axis=1)
+
+def to_policy(vector, sizes):
+    """
+    Return the policy of a flat parameter vector.
+    """
+    return Policy([
+        (weights[0].tolist(), biases[0].tolist())
+        for weights, biases in unpack(vector.reshape(1, -1), sizes)
+    ])
+
+def initial_population(rng, size, sizes):
+    """
+    Return random networks, with weights scaled by the number of inputs of
+    their layer.
+    """
+    columns = []
+    for inputs, outputs in zip(sizes, sizes[1:]):
+        columns.append(rng.randn(size, inputs * outputs) / numpy.sqrt(inputs))
+        columns.append(numpy.zeros((size, outputs)))
+    return numpy.concatenate(columns, axis=1)
+
+def next_generation(rng, population, fitness, elite, sigma):
+    """
+    Keep the elite networks and fill the population with mutated copies of
+    them.
+    """
+    order = numpy.argsort(-fitness, kind="mergesort")
+    elites = population[order[:elite]]
+    parents = elites[rng.randint(elite, size=len(population) - elite)]
+    children = parents + sigma * rng.randn(*parents.shape)
+    return numpy.concatenate([elites, children])
+
+class Arena(object):
+    """
+    Plays a seeded course for many t-rexes at once, with the game's horizon,
+    jump physics, key handling and collision check, at a steady 60 FPS.
+    """
+    def __init__(self, curve_args, gap_coefficient):
+        """
+        Initialise the horizon and a scratch surface for it to draw to.
+        """
+        if Sprite.image is None:
+            pygame.display.init()
+            pygame.display.set_mode((1, 1))
+            Sprite.load()
+        self.speed, self.acceleration, self.max_speed, self.clear_time = curve_args
+        self.surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.dimensions = {"WIDTH": SCREEN_WIDTH, "HEIGHT": SCREEN_HEIGHT, "SCALE": 1}
+        self.horizon = Horizon(
+            self.surface,
+            SPRITE_DEFINITION,
+            self.dimensions,
+            gap_coefficient,
+            SpeedCurve(*curve_args)
+        )
+        self.t_rexes = []
+
+    def play(self, layers, count, seed, max_frames):
+        """
+        Play a seed with one t-rex per network until all have crashed or
+        max_frames have passed. Returns the distance each ran and the number
+        of t-rex frames played.
+        """
+        horizon = self.horizon
+        horizon.reset(seed)
+        while len(self.t_rexes) < count:
+            self.t_rexes.append(TRex(self.surface, SPRITE_DEFINITION["TREX"], self.dimensions))
+        t_rexes = self.t_rexes[:count]
+        for t_rex in t_rexes:
+            t_rex.reset()
+        jump_held = [False] * count
+        duck_held = [False] * count
+        distances = numpy.zeros(count)
+        alive = list(range(count))
+        active_layers = layers
+        speed = self.speed
+        distance = 0.0
+        running_time = 0
+        t_rex_frames = 0
+        ms_per_frame = 1000.0 / FPS
+        for frame in range(max_frames):
+            frame_time = FRAME_TIMES[frame % FPS]
+            inputs = numpy.array([
+                get_features(t_rexes[lane], horizon.obstacles, speed) for lane in alive
+            ])
+            for lane, action in zip(alive, forward(active_layers, inputs)):
+                t_rex = t_rexes[lane]
+                for key, pressed in get_key_changes(ACTIONS[action], jump_held[lane], duck_held[lane]):
+                    apply_key(t_rex, key, pressed, speed)
+                    if key == "JUMP":
+                        jump_held[lane] = pressed
+                    else:
+                        duck_held[lane] = pressed
+                if t_rex.jumping:
+                    t_rex.update_jump(frame_time)
+            t_rex_frames += len(alive)
+            running_time += frame_time
+            if running_time > self.clear_time:
+                horizon.update_obstacles(frame_time, speed)
+                obstacle = horizon.obstacles[0]
+                crashed = [
+                    lane for lane in alive
+                    if check_obstacle_collision(t_rexes[lane], obstacle)
+                ]
+                if crashed:
+                    distances[crashed] = distance
+                    alive = [lane for lane in alive if lane not in crashed]
+                    if not alive:
+                        return distances, t_rex_frames
+                    active_layers = [
+                        (weights[alive], biases[alive]) for weights, biases in layers
+                    ]
+            distance += speed * frame_time / ms_per_frame
+            if speed < self.max_speed:
+                speed += self.acceleration
+            for lane in alive:
+                t_rexes[lane].update(frame_time)
+        distances[alive] = distance
+        return distances, t_rex_frames
+
+def play_job(job):
+    """
+    Play one seed for a chunk of the population in a worker process.
+    """
+    parameters, sizes, seed, max_frames, curve_args, gap_coefficient = job
+    key = (curve_args, gap_coefficient)
+    if key not in ARENAS:
+        ARENAS[key] = Arena(curve_args, gap_coefficient)
+    return ARENAS[key].play(unpack(parameters, sizes), len(parameters), seed, max_frames)
+
+def evaluate(pool, population, sizes, seeds, settings):
+    """
+    Return the mean distance of each network over the seeds, and the number
+    of t-rex frames played.
+    """
+    chunk = settings["chunk"]
+    jobs = [
+        (
+            population[start:start + chunk],
+            sizes,
+            int(seed),
+            settings["max_frames"],
+            settings["curve_args"],
+            settings["gap_coefficient"]
+        )
+        for seed in seeds
+        for start in range(0, len(population), chunk)
+    ]
+    results = pool.map(play_job, jobs) if pool else [play_job(job) for job in jobs]
+    distances = numpy.concatenate([result[0] for result in results]).reshape(len(seeds), -1)
+    return distances.mean(axis=0), sum(result[1] for result in results)
+
+def save_policy(path, policy):
+    """
+    Write a policy through a temporary file, so the game never reads a
+    partial one.
+    """
+    temp_path = path + ".tmp"
+    policy.save(temp_path)
+    os.rename(temp_path, path)
+
+def main():
+    """
+    Start or resume a training run.
+    """
+    parser = argparse.ArgumentParser(description="Evolve autopilot policies on headless games.")
+    parser.add_argument("--generations", type=int, default=30, help="generation to train up to")
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--elite", type=int, default=8, help="networks kept each generation")
+    parser.add_argument("--sigma", type=float, default=0.1, help="mutation scale")
+    parser.add_argument("--hidden", type=int, nargs="*", default=[8], help="hidden layer sizes")
+    parser.add_argument("--seeds", type=int, default=3, help="games per network per generation")
+    parser.add_argument("--max-frames", type=int, default=120 * FPS, help="frames per game")
+    parser.add_argument("--chunk", type=int, default=16, help="networks per job")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the training run")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--output", default=POLICY_FILE, help="file the best policy is written to")
+    parser.add_argument("--resume", action="store_true", help="carry on from the checkpoint, with its settings")
+    parser.add_argument("--config", help="JSON file of tuning values, instead of config.json")
+    parser.add_argument("--speed", type=float)
+    parser.add_argument("--acceleration", type=float)
+    parser.add_argument("--max-speed", type=float)
+    parser.add_argument("--clear-time", type=float)
+    parser.add_argument("--gap-coefficient", type=float)
+    args, _ = parser.parse_known_args()
+    try:
+        game_config = load_config(args.config).game
+    except (IOError, OSError, ValueError) as error:
+        parser.error("invalid config %s: %s" % (args.config or "config.json", error))
+    parser.set_defaults(
+        speed=game_config.SPEED,
+        acceleration=game_config.ACCELERATION,
+        max_speed=game_config.MAX_SPEED,
+        clear_time=game_config.CLEAR_TIME,
+        gap_coefficient=game_config.GAP_COEFFICIENT
+    )
+    args = parser.parse_args()
+    checkpoint = SaveState(args.checkpoint)
+
+    if args.resume:
+        state = checkpoint.load()
+        if state is None:
+            parser.error("no usable checkpoint in %s" % args.checkpoint)
+        settings = state["settings"]
+        rng = numpy.random.RandomState()
+        rng.set_state(state["rng"])
+        population = state["population"]
+        generation = state["generation"]
+        best_fitness = state["best_fitness"]
+        best = state["best"]
+    else:
+        if not 0 < args.elite < args.population:
+            parser.error("--elite must be between 1 and the population size")
+        settings = {
+            "sizes": get_layer_sizes(args.hidden),
+            "elite": args.elite,
+            "sigma": args.sigma,
+            "seeds": args.seeds,
+            "max_frames": args.max_frames,
+            "chunk": args.chunk,
+            "curve_args": (args.speed, args.acceleration, args.max_speed, args.clear_time),
+            "gap_coefficient": args.gap_coefficient
+        }
+        rng = numpy.random.RandomState(args.seed)
+        population = initial_population(rng, args.population, settings["sizes"])
+        generation = 0
+        best_fitness = -1.0
+        best = None
+    sizes = settings["sizes"]
+    print("%d networks of %s, %d parameters each" % (
+        len(population),
+        "-".join(str(size) for size in sizes),
+        count_parameters(sizes)
+    ))
+
+    pool = (
+        multiprocessing.Pool(args.workers, load_config, (args.config,))
+        if args.workers > 1 else None
+    )
+    try:
+        while generation < args.generations:
+            start = time.time()
+            seeds = rng.randint(0, 2 ** 31 - 1, size=settings["seeds"])
+            fitness, t_rex_frames = evaluate(pool, population, sizes, seeds, settings)
+            generation += 1
+            leader = int(numpy.argmax(fitness))
+            if fitness[leader] > best_fitness:
+                best_fitness = float(fitness[leader])
+                best = population[leader].copy()
+                save_policy(args.output, to_policy(best, sizes))
+            population = next_generation(
+                rng,
+                population,
+                fitness,
+                settings["elite"],
+                settings["sigma"]
+            )
+            checkpoint.save({
+                "settings": settings,
+                "rng": rng.get_state(),
+                "population": population,
+                "generation": generation,
+                "best_fitness": best_fitness,
+                "best": best
+            })
+            elapsed = time.time() - start
+            print("generation %d: best %.0f, mean %.0f, best so far %.0f, %.1f s, %d t-rex frames/s" % (
+                generation,
+                fitness[leader],
+                fitness.mean(),
+                best_fitness,
+                elapsed,
+                t_rex_frames / max(elapsed, 0.001)
+            ))
+            sys.stdout.flush()
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())